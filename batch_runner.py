@@ -0,0 +1,207 @@
+import copy
+import json
+import yaml
+from concurrent.futures import ThreadPoolExecutor
+from logging import Logger
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+from utils.datasets import DEFAULT_MEMORY_LIMIT, DatasetCache
+from utils.sinks import named_output, new_run_id, run_details
+from validation_processor import ValidationProcessor
+
+Projection = Optional[Dict[str, Optional[str]]]
+
+
+class BatchRunner:
+    """
+    Runs many configs in one process, loading each dataset once.
+
+    The configs are grouped by their storage section and engine: the configs of a group validate
+    the same files, every file is loaded once with the columns read by any of them, then the actions
+    of each config run over it and each config writes its own results (results/<name>/<run_id>/results
+    by default). Loaded datasets are kept in a DatasetCache bounded by `memory_limit` bytes, the least
+    recently used are evicted. Configs in streaming mode, sampling their files or over a database do
+    not load the dataset in memory, they are run on their own.
+    """
+
+    def __init__(self, configs: List[Union[str, Path]], logs: Logger, memory_limit: int = DEFAULT_MEMORY_LIMIT,
+                 use_cache: bool = True):
+        self.logs = logs
+        self.use_cache = use_cache
+        self.datasets = DatasetCache(memory_limit)
+        self.processors: Dict[str, ValidationProcessor] = {}
+        for path in self._config_files(configs):
+            self._add(path)
+
+    @staticmethod
+    def _config_files(configs: List[Union[str, Path]]) -> List[Path]:
+        """
+        Function to return the config files, a folder gives every *.yml and *.yaml file in it
+        """
+        files: List[Path] = []
+        for config in map(Path, configs):
+            if config.is_dir():
+                files += sorted([*config.glob("*.yml"), *config.glob("*.yaml")])
+            else:
+                files.append(config)
+        return files
+
+    def _add(self, path: Path):
+        if not path.exists():
+            raise FileNotFoundError(f"Schema not found: {path}")
+        with open(path, "r") as f:
+            schema = yaml.safe_load(f)
+        if not isinstance(schema, dict) or "storage" not in schema or "actions" not in schema:
+            self.logs.warning(f"Skipping {path}, it is not a validation config")
+            return
+        name, count = path.stem, 1
+        while name in self.processors:
+            count += 1
+            name = f"{path.stem}_{count}"
+        schema = copy.deepcopy(schema)
+        # the configs of a batch never overwrite the results of each other
+        schema["output"] = named_output(schema.get("output"), name)
+        self.processors[name] = ValidationProcessor(schema, self.logs, use_cache=self.use_cache,
+                                                    reuse_connection=True)
+
+    @staticmethod
+    def _engine(processor: ValidationProcessor) -> str:
+        return (processor.schema.get("execution") or {}).get("engine", "pandas")
+
+    @staticmethod
+    def _details(processor: ValidationProcessor) -> Optional[Dict]:
+        return (processor.schema.get("report") or {}).get("details")
+
+    def groups(self) -> Tuple[Dict[str, List[str]], List[str]]:
+        """
+        Function to return the configs sharing their datasets, by storage and engine, and the
+        configs run on their own (streaming mode, sample, database)
+        """
+        groups: Dict[str, List[str]] = {}
+        alone: List[str] = []
+        for name, processor in self.processors.items():
+            execution: Dict = processor.schema.get("execution") or {}
+            if processor._database or execution.get("mode") == "stream" or execution.get("sample"):
+                alone.append(name)
+                continue
+            key = json.dumps([processor.schema.get("storage"), self._engine(processor)], sort_keys=True, default=str)
+            groups.setdefault(key, []).append(name)
+        return groups, alone
+
+    def projection(self, names: List[str]) -> Projection:
+        """
+        Function to return the columns read by any config of a group, a dtype is kept when every
+        config reading the column loads it with the same dtype
+
+        :params names: Configs of the group
+        """
+        merged: Dict[str, List[Optional[str]]] = {}
+        for name in names:
+            processor = self.processors[name]
+            execution: Dict = processor.schema.get("execution") or {}
+            projection = processor._projection(self._details(processor), processor.schema.get("actions"),
+                                               execution.get("sample"))
+            if projection is None:
+                return None
+            for column, dtype in projection.items():
+                merged.setdefault(column, []).append(dtype)
+        return {column: dtypes[0] if len(set(dtypes)) == 1 else None for column, dtypes in merged.items()}
+
+    @staticmethod
+    def _select(data, projection: Projection):
+        """
+        Function to return the columns of a config from a dataset loaded for a whole group, a Table
+        is selected without a copy, a DataFrame only copies the columns of the config
+        """
+        if projection is None:
+            return data
+        table = hasattr(data, "column_names")
+        names = data.column_names if table else list(data.columns)
+        columns = [column for column in names if column in projection]
+        if len(columns) == len(names):
+            return data
+        return data.select(columns) if table else data[columns]
+
+    def run_group(self, names: List[str],
+                  run_ids: Optional[Dict[str, str]] = None) -> Dict[str, Union[List[Dict], Dict]]:
+        """
+        Function to validate the files of a group, each file is loaded once for all the configs
+
+        :params names: Configs of the group
+        :params run_ids: Identifier of the run of each config, its spilled details are kept under it
+        """
+        run_ids = run_ids or {name: new_run_id() for name in names}
+        first = self.processors[names[0]]
+        storage: Dict = first.schema.get("storage")
+        pattern: str = storage.get(storage.get("type"))
+        multi = first._is_multi_file(pattern)
+        files = first._list_files(pattern) if multi else [pattern]
+        projection = self.projection(names)
+        as_table = self._engine(first) == "arrow"
+        group = json.dumps(storage, sort_keys=True, default=str)
+        columns = "every column" if projection is None else f"{len(projection)} columns"
+        self.logs.info(f"Validating {pattern} for {len(names)} configs ({', '.join(names)}), loading {columns}")
+
+        # the columns of each config, the rows of its details only hold them as in a run of its own
+        own: Dict[str, Projection] = {name: self.projection([name]) for name in names}
+
+        def task(filepath: str) -> Dict[str, List[Dict]]:
+            identity = first.file_identity(filepath)
+            key = (group, as_table, json.dumps(projection, sort_keys=True), filepath, identity)
+            loaded: List = []
+
+            def load():
+                # the dataset is held by the task while its configs run, even when too large for the cache
+                if not loaded:
+                    loaded.append(self.datasets.get_or_load(key, lambda: first.load_file(
+                        filepath=filepath, as_table=as_table, projection=projection, identity=identity)))
+                return loaded[0]
+
+            reports: Dict[str, List[Dict]] = {}
+            for name in names:
+                processor = self.processors[name]
+                details = run_details(self._details(processor), run_ids[name])
+                if multi:
+                    details = processor.file_details(details, filepath)
+                reports[name] = processor.validate_file(filepath, details=details,
+                                                        load=lambda name=name: self._select(load(), own[name]))
+            return reports
+
+        concurrency = min(int((self.processors[name].schema.get("execution") or {}).get("concurrency", 4))
+                          for name in names)
+        with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as pool:
+            validated = dict(zip(files, pool.map(task, files)))
+
+        results: Dict[str, Union[List[Dict], Dict]] = {}
+        for name in names:
+            if multi:
+                per_file = {filepath: validated[filepath][name] for filepath in files}
+                results[name] = {"files": per_file, "dataset": self.processors[name]._aggregate(per_file)}
+            else:
+                results[name] = validated[pattern][name]
+        return results
+
+    def run(self) -> Dict[str, Union[List[Dict], Dict]]:
+        """
+        Function to run every config and write the results of each one
+        """
+        groups, alone = self.groups()
+        results: Dict[str, Union[List[Dict], Dict]] = {}
+        for names in groups.values():
+            run_ids = {name: new_run_id() for name in names}
+            try:
+                grouped = self.run_group(names, run_ids)
+            except Exception:
+                self.logs.exception(f"Validation of the configs {', '.join(names)} failed")
+                continue
+            for name in names:
+                self.processors[name].write_results(grouped[name], run_ids[name])
+                results[name] = grouped[name]
+        for name in alone:
+            try:
+                results[name] = self.processors[name].run()
+            except Exception:
+                self.logs.exception(f"Validation of the config {name} failed")
+        self.logs.info(f"{len(results)} of {len(self.processors)} configs validated, "
+                       f"{self.datasets.loads} datasets loaded")
+        return results
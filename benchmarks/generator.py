@@ -0,0 +1,164 @@
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from pipeline.pipeline import Pipeline
+
+FORMATS = ("csv", "parquet", "json", "xml", "xlsx")
+INVALID_TEXT = "__invalid__"
+
+
+class DatasetGenerator:
+    """
+    Generator of synthetic datasets for the columns checked by the actions of a validation.yml.
+
+    Every column gets values the checks on it accept (allowed values of CheckEnum, the range of
+    CheckRange, dates of CheckDateInterval, ...), then `null_ratio` of its values are set to null
+    and `invalid_ratio` replaced by values the checks reject. Key columns of CheckUnique get
+    `invalid_ratio` duplicated rows. Filler columns are added until the dataset has `width` columns.
+    """
+
+    def __init__(self, actions_config: List[Dict], rows: int, width: Optional[int] = None,
+                 null_ratio: float = 0.05, invalid_ratio: float = 0.01, cardinality: int = 1000,
+                 seed: int = 0):
+        self.actions_config = actions_config
+        self.rows = int(rows)
+        self.width = width
+        self.null_ratio = null_ratio
+        self.invalid_ratio = invalid_ratio
+        self.cardinality = max(int(cardinality), 1)
+        self.rng = np.random.default_rng(seed)
+
+    def _specs(self) -> Tuple[Dict[str, Tuple[str, Dict]], List[List[str]]]:
+        """
+        Function to find the kind of every checked column, the first check on a column that
+        tells what its values look like wins, and the keys of the unique checks
+        """
+        specs: Dict[str, Tuple[str, Dict]] = {}
+        keys: List[List[str]] = []
+        for action in Pipeline()._build_actions(self.actions_config):
+            kind = type(action).__name__
+            for check in action.checks():
+                column = check.get("column")
+                columns = column if isinstance(column, list) else [column]
+                if kind == "CheckUnique":
+                    keys.append(columns)
+                for col in columns:
+                    if kind in ("CheckNull", "CheckUnique"):
+                        specs.setdefault(col, ("text" if kind == "CheckNull" else "key", check))
+                    else:
+                        current = specs.get(col)
+                        if current is None or current[0] in ("text", "key"):
+                            specs[col] = (kind, check)
+        return specs, keys
+
+    def _dates(self, start, end, size: int) -> np.ndarray:
+        start, end = pd.Timestamp(start), pd.Timestamp(end)
+        days = self.rng.integers(0, max((end - start).days, 1) + 1, size)
+        return (start + pd.to_timedelta(days, unit="D")).strftime("%Y-%m-%d").to_numpy(dtype=object)
+
+    def _column(self, kind: str, check: Dict) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Function to return valid and invalid values for a column of the given kind
+        """
+        n, rng, card = self.rows, self.rng, self.cardinality
+        if kind == "CheckEnum":
+            allowed = np.array(check["allowed_values"], dtype=object)
+            return allowed[rng.integers(0, len(allowed), n)], np.full(n, INVALID_TEXT, dtype=object)
+        if kind == "CheckRange":
+            low, high = float(check.get("min")), float(check.get("max"))
+            above = high + 1 + rng.random(n) * max(high - low, 1)
+            return rng.uniform(low, high, n), above
+        if kind == "CheckDateInterval":
+            start, end = pd.Timestamp(check["start"]), pd.Timestamp(check["end"])
+            return self._dates(start, end, n), self._dates(start - pd.Timedelta(days=3650), start - pd.Timedelta(days=1), n)
+        if kind == "CheckPattern":
+            users = rng.integers(0, card, n)
+            return np.array([f"user{u}@example.com" for u in range(card)], dtype=object)[users], \
+                np.array([f"user{u}" for u in range(card)], dtype=object)[users]
+        if kind == "CheckType":
+            expected = check.get("type")
+            if expected == "int":
+                return rng.integers(0, card, n), np.full(n, INVALID_TEXT, dtype=object)
+            if expected == "float":
+                return rng.random(n) * card, np.full(n, INVALID_TEXT, dtype=object)
+            if expected == "bool":
+                return rng.random(n) > 0.5, np.full(n, INVALID_TEXT, dtype=object)
+            if expected in ("datetime", "date"):
+                return self._dates("1950-01-01", "2020-12-31", n), np.full(n, INVALID_TEXT, dtype=object)
+            return self._text(n), rng.integers(0, card, n)
+        if kind == "key":
+            return rng.permutation(n), rng.permutation(n)
+        return self._text(n), self._text(n)
+
+    def _text(self, size: int) -> np.ndarray:
+        vocabulary = np.array([f"value_{i}" for i in range(self.cardinality)], dtype=object)
+        return vocabulary[self.rng.integers(0, self.cardinality, size)]
+
+    def generate(self) -> pd.DataFrame:
+        """
+        Function to generate the dataset
+        """
+        specs, keys = self._specs()
+        key_columns = {col for key in keys for col in key}
+        data: Dict[str, np.ndarray] = {}
+        for col, (kind, check) in specs.items():
+            values, invalid = self._column(kind, check)
+            if col not in key_columns:
+                bad = self.rng.random(self.rows) < self.invalid_ratio
+                if bad.any():
+                    values = values.astype(object) if invalid.dtype != values.dtype else values.copy()
+                    values[bad] = invalid[bad]
+            data[col] = values
+
+        for key in keys:
+            # copy the key of other rows into invalid_ratio of the rows
+            duplicated = np.flatnonzero(self.rng.random(self.rows) < self.invalid_ratio)
+            sources = self.rng.integers(0, self.rows, len(duplicated))
+            for col in key:
+                data[col] = data[col].copy()
+                data[col][duplicated] = data[col][sources]
+
+        df = pd.DataFrame(data)
+        for col in df.columns:
+            if col not in key_columns and self.null_ratio > 0:
+                nulls = self.rng.random(self.rows) < self.null_ratio
+                if nulls.any():
+                    df[col] = df[col].astype(object).where(~nulls, None)
+
+        fillers = max((self.width or 0) - len(df.columns), 0)
+        for i in range(fillers):
+            df[f"filler_{i}"] = self.rng.random(self.rows) if i % 2 == 0 else self._text(self.rows)
+        return df
+
+
+def write_dataset(df: pd.DataFrame, folder: str, formats: Iterable[str] = ("csv", "parquet"),
+                  name: str = "dataset") -> Dict[str, str]:
+    """
+    Function to write a dataset in the given formats, JSON is written as one record per line
+
+    :params df: Dataset
+    :params folder: Folder of the files
+    :params formats: csv, parquet, json, xml and xlsx
+    :params name: Name of the files, without extension
+    """
+    Path(folder).mkdir(parents=True, exist_ok=True)
+    paths: Dict[str, str] = {}
+    for fmt in formats:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported benchmark format: {fmt}")
+        path = str(Path(folder) / f"{name}.{fmt}")
+        if fmt == "csv":
+            df.to_csv(path, index=False)
+        elif fmt == "parquet":
+            # mixed columns (invalid values) are written as text
+            df.astype({col: str for col in df.columns if df[col].dtype == object}).where(df.notna(), None) \
+                .to_parquet(path, index=False)
+        elif fmt == "json":
+            df.to_json(path, orient="records", lines=True, date_format="iso")
+        elif fmt == "xml":
+            df.to_xml(path, index=False, parser="etree")
+        else:
+            df.to_excel(path, index=False)
+        paths[fmt] = path
+    return paths
@@ -0,0 +1,162 @@
+import json
+import logging
+import platform
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+from pipeline.pipeline import Pipeline
+from utils.fileloader import FileLoader
+from utils.memory import PeakMemory
+
+# formats with a streaming reader in FileLoader.iter_file
+STREAMED_FORMATS = ("csv", "parquet", "json", "xml", "xlsx")
+ARROW_FORMATS = ("csv", "parquet", "json", "xml", "xlsx")
+
+
+def measure(function: Callable, repeat: int = 1) -> Tuple[object, Dict]:
+    """
+    Function to run a stage `repeat` times and return its last result with the best wall time
+    and the peak memory of the first run
+    """
+    best, result, memory = None, None, None
+    for attempt in range(max(repeat, 1)):
+        with PeakMemory() as peak:
+            start = time.perf_counter()
+            result = function()
+            elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        memory = memory or peak
+    return result, {
+        "seconds": round(best, 6),
+        "peak_memory_mib": round(memory.peak / 2**20, 1),
+        "memory_increase_mib": round(memory.increase / 2**20, 1)
+    }
+
+
+class BenchmarkRunner:
+    """
+    Runs every stage of a validation over generated files and records their time and memory:
+    the loaders of FileLoader (pandas, arrow and streamed), every action on each engine, all the
+    actions together and the serialization of the reports.
+    """
+
+    def __init__(self, actions_config: List[Dict], repeat: int = 1, chunksize: Optional[int] = None,
+                 engines: Tuple[str, ...] = ("pandas", "arrow"), logs: Optional[logging.Logger] = None):
+        self.actions_config = actions_config
+        self.repeat = repeat
+        self.chunksize = chunksize
+        self.engines = engines
+        self.logs = logs or logging.getLogger("benchmark")
+        self.results: List[Dict] = []
+        quiet = logging.getLogger("benchmark.loader")
+        quiet.setLevel(logging.WARNING)
+        self.loader = FileLoader(storage_connector=None, logs=quiet, local_mode=True)
+
+    def _record(self, stage: str, name: str, rows: int, metrics: Dict, fmt: str = None, engine: str = None):
+        seconds = metrics["seconds"]
+        entry = {
+            "stage": stage, "name": name, "format": fmt, "engine": engine, "rows": rows,
+            **metrics, "rows_per_second": round(rows / seconds, 1) if seconds else None
+        }
+        self.results.append(entry)
+        self.logs.info(f"{stage:<10} {name:<28} {fmt or '':<8} {engine or '':<7} "
+                       f"{seconds:>9.3f}s {entry['peak_memory_mib']:>9.1f} MiB")
+
+    def _stage(self, function: Callable, stage: str, name: str, rows: int, fmt: str = None, engine: str = None):
+        """
+        Function to measure and record a stage, a failing stage is logged and recorded with its error
+        """
+        try:
+            result, metrics = measure(function, self.repeat)
+        except Exception as e:
+            self.logs.warning(f"{stage} {name} ({fmt}, {engine}) failed: {e}")
+            self.results.append({"stage": stage, "name": name, "format": fmt, "engine": engine,
+                                 "rows": rows, "error": str(e)})
+            return None
+        self._record(stage, name, rows, metrics, fmt, engine)
+        return result
+
+    def run_loaders(self, paths: Dict[str, str], rows: int):
+        """
+        Function to time the loaders of every generated file
+        """
+        for fmt, path in paths.items():
+            self._stage(lambda: self.loader.load_file(path), "load", "load_file", rows, fmt, "pandas")
+            if "arrow" in self.engines and fmt in ARROW_FORMATS:
+                self._stage(lambda: self.loader.load_file(path, as_table=True), "load", "load_file", rows, fmt, "arrow")
+            if fmt in STREAMED_FORMATS:
+                def stream():
+                    return sum(len(chunk) for chunk in self.loader.iter_file(path, chunksize=self.chunksize))
+                self._stage(stream, "load", "iter_file", rows, fmt, "pandas")
+
+    def _data(self, path: str, engine: str):
+        if engine == "arrow":
+            return self.loader.load_file(path, as_table=True)
+        return self.loader.load_file(path)
+
+    def run_actions(self, path: str, fmt: str):
+        """
+        Function to time every action alone, then all of them together, on each engine
+        """
+        for engine in self.engines:
+            data = self._data(path, engine)
+            rows = data.num_rows if isinstance(data, pa.Table) else len(data)
+            for position, action in enumerate(self.actions_config):
+                name = f"{position}:{list(action)[0]}"
+                self._stage(lambda: Pipeline(df=data).run_actions([action]), "action", name, rows, fmt, engine)
+            reports = self._stage(lambda: Pipeline(df=data).run(self.actions_config), "actions", "all", rows, fmt, engine)
+            if reports is not None and engine == self.engines[0]:
+                self._stage(lambda: json.dumps(reports, ensure_ascii=True, indent=2, default=str),
+                            "serialize", "reports", rows, fmt, engine)
+            del data
+
+    def document(self, settings: Dict) -> Dict:
+        """
+        Function to return the machine readable results, with the settings and the environment
+        """
+        return {
+            "settings": settings,
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "pandas": pd.__version__,
+                "pyarrow": pa.__version__
+            },
+            "results": self.results
+        }
+
+
+KEY_FIELDS = ("stage", "name", "format", "engine")
+
+
+def _key(entry: Dict) -> Tuple:
+    return tuple(entry.get(field) for field in KEY_FIELDS)
+
+
+def compare(current: Dict, baseline: Dict, tolerance: float = 0.2) -> List[Dict]:
+    """
+    Function to compare results with a baseline, a stage regresses when its throughput is
+    `tolerance` lower than in the baseline or its memory increase `tolerance` higher
+
+    :params current: Results of the run
+    :params baseline: Stored results
+    :params tolerance: Allowed relative difference
+    """
+    reference = {_key(entry): entry for entry in baseline.get("results", [])}
+    regressions = []
+    for entry in current.get("results", []):
+        base = reference.get(_key(entry))
+        if base is None or "error" in entry or "error" in base:
+            continue
+        stage = {field: entry.get(field) for field in KEY_FIELDS}
+        if base.get("rows_per_second") and entry.get("rows_per_second") is not None \
+                and entry["rows_per_second"] < base["rows_per_second"] * (1 - tolerance):
+            regressions.append({**stage, "metric": "rows_per_second",
+                                "baseline": base["rows_per_second"], "current": entry["rows_per_second"]})
+        # increases of a few MiB are noise of the allocator
+        if base.get("memory_increase_mib", 0) >= 8 \
+                and entry["memory_increase_mib"] > base["memory_increase_mib"] * (1 + tolerance):
+            regressions.append({**stage, "metric": "memory_increase_mib",
+                                "baseline": base["memory_increase_mib"], "current": entry["memory_increase_mib"]})
+    return regressions
@@ -18,6 +18,10 @@ class Environments:
     def get_db_configuration(self):
         return self.db_configurations
 
+    @classmethod
+    def get_db_engine(self):
+        return os.getenv("db_engine", "postgres")
+
     @classmethod
     def get_s3_bucket(self):
         return os.getenv("S3_BUCKET")
@@ -34,6 +38,10 @@ class Environments:
     def get_s3_region(self):
         return os.getenv("S3_REGION")
 
+    @classmethod
+    def get_s3_endpoint_url(self):
+        return os.getenv("S3_ENDPOINT_URL")
+
     @classmethod
     def get_blob_user(self):
         return os.getenv("BLOBUSER")
@@ -44,4 +52,8 @@ class Environments:
     
     @classmethod
     def get_blob_container(self):
-        return os.getenv("CONTAINER")
\ No newline at end of file
+        return os.getenv("CONTAINER")
+
+    @classmethod
+    def get_blob_connection_string(self):
+        return os.getenv("BLOB_CONNECTION_STRING")
\ No newline at end of file
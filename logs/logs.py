@@ -1,10 +1,25 @@
+import json
 import logging
 
+class JsonFormatter(logging.Formatter):
+    """Formatter of structured records, one JSON object per line with the fields of `extra={"metric": ...}`"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            **getattr(record, "metric", {})
+        }
+        return json.dumps(payload, ensure_ascii=True, default=str)
+
+
 class LoggerFactory:
     _loggers = {}
 
     @staticmethod
-    def get_logger(name: str = 'default') -> logging.Logger:
+    def get_logger(name: str = 'default', structured: bool = False) -> logging.Logger:
         if name in LoggerFactory._loggers:
             return LoggerFactory._loggers[name]
 
@@ -12,10 +27,13 @@ class LoggerFactory:
         logger.setLevel(logging.INFO)
 
         if not logger.handlers:
-            formatter = logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
+            formatter = JsonFormatter() if structured else logging.Formatter('%(asctime)s [%(levelname)s] %(message)s')
             handler = logging.StreamHandler()
             handler.setFormatter(formatter)
             logger.addHandler(handler)
+            if structured:
+                # structured records are not repeated by the handlers of the root logger
+                logger.propagate = False
 
         LoggerFactory._loggers[name] = logger
         return logger
@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.tseries.api import guess_datetime_format
+from pipeline.arrow import ArrowFrame, to_mask
+from pipeline.base import ValidationAction
+
+class CheckDateInterval(ValidationAction):
+
+    action_name  = "Check Date Interval"
+
+    def __init__(self, params, pipeline):
+        super().__init__(params, pipeline)
+        self._format = None
+
+    def checks(self):
+        return [self.params]
+
+    def describe(self, check):
+        return {
+            "Start": str(pd.to_datetime(check["start"])),
+            "End": str(pd.to_datetime(check["end"]))
+        }
+
+    def begin(self, df, cache=None):
+        """
+        Function to start a chunk, the date format is inferred on the first chunk so
+        every chunk (and every worker) parses the column like the whole column would be
+        """
+        super().begin(df, cache)
+        col = self.params["column"]
+        if self._format is None and col in df.columns:
+            if isinstance(df, ArrowFrame):
+                first = df.column(col).drop_null()
+                first = first[0].as_py() if len(first) else None
+            else:
+                first = df[col].dropna()
+                first = first.iloc[0] if len(first) else None
+            guessed = guess_datetime_format(first) if isinstance(first, str) else None
+            self._format = guessed or "mixed"
+
+    def _parse(self, col: str) -> pd.Series:
+        """
+        Function to parse the dates with the format inferred on the first chunk
+        """
+        values = self.df[col]
+        if values.dtype == object:
+            return self.cache.datetimes(col, format=self._format)
+        return self.cache.datetimes(col)
+
+    def invalid_mask(self, check):
+        col = check["column"]
+        start = pd.to_datetime(check["start"])
+        end = pd.to_datetime(check["end"])
+
+        dates = self._parse(col)
+        return (dates < start) | (dates > end) | dates.isna()
+
+    def arrow_mask(self, check):
+        col = check["column"]
+        values = self.cache.arrow(col)
+        if pa.types.is_date(values.type) or (pa.types.is_timestamp(values.type) and values.type.tz is None):
+            dates = values.cast(pa.timestamp("ns"))
+        elif (pa.types.is_string(values.type) or pa.types.is_large_string(values.type)) and self._format != "mixed":
+            try:
+                dates = self.cache.arrow_datetimes(col, self._format)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                # format directives strptime does not know, like %f
+                return self.invalid_mask(check)
+        else:
+            return self.invalid_mask(check)
+
+        start = pa.scalar(pd.to_datetime(check["start"]).to_datetime64(), type=pa.timestamp("ns"))
+        end = pa.scalar(pd.to_datetime(check["end"]).to_datetime64(), type=pa.timestamp("ns"))
+        outside = to_mask(pc.or_(pc.less(dates, start), pc.greater(dates, end)))
+        return outside | to_mask(pc.is_null(dates))
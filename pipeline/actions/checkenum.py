@@ -1,20 +1,96 @@
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from numbers import Number
+from pipeline.arrow import to_mask
 from pipeline.base import ValidationAction
+from pipeline.distinct import evaluate
 
 class CheckEnum(ValidationAction):
 
     action_name  = "Check Enum"
-    
-    def run(self):
-        col = self.params["column"]
-        allowed = self.params["allowed_values"]
-        self.validate_column_exist(col)
-
-        invalid = self.df[~self.df[col].isin(allowed)]
-        self.report({
-            "Action": self.action_name ,
-            "Column": col,
-            "Allowed_values": allowed,
-            "Invalid_count": len(invalid),
-            "Valid_Column" : len(invalid)==0,
-            "Details": invalid.to_dict(orient="records")
-        })
+
+    def checks(self):
+        return [self.params]
+
+    def describe(self, check):
+        return {"Allowed_values": check["allowed_values"]}
+
+    def invalid_mask(self, check):
+        values = self.df[check["column"]]
+        distinct = self.cache.distinct(check["column"]) if self.cache is not None else None
+        if distinct is None:
+            return ~values.isin(check["allowed_values"])
+        # text columns with few distinct values are looked up once per distinct value
+        allowed = pd.Series(distinct.values, dtype=object).isin(check["allowed_values"]).to_numpy()
+        missing = values[distinct.missing].isin(check["allowed_values"]).to_numpy()
+        return ~distinct.expand(allowed, missing)
+
+    def dtype(self, check):
+        """
+        Function to load the column as a category when only text can be allowed: values
+        the loader would infer as numbers or booleans are invalid as text too
+        """
+        for value in check["allowed_values"]:
+            if not isinstance(value, str) or value.strip().lower() in ("true", "false"):
+                return None
+            try:
+                float(value)
+                return None
+            except ValueError:
+                pass
+        return "category"
+
+    def _family(self, type: pa.DataType) -> str:
+        if pa.types.is_dictionary(type):
+            return self._family(type.value_type)
+        if pa.types.is_string(type) or pa.types.is_large_string(type):
+            return "string"
+        if pa.types.is_integer(type) or pa.types.is_floating(type):
+            return "number"
+        return str(type)
+
+    def arrow_mask(self, check):
+        values = self.cache.arrow(check["column"])
+        try:
+            allowed = pa.array(check["allowed_values"])
+        except (pa.ArrowInvalid, pa.ArrowTypeError):
+            return self.invalid_mask(check)
+        # isin never matches values of another kind ("1" and 1), casting the allowed values would
+        if self._family(allowed.type) != self._family(values.type) or allowed.null_count:
+            return self.invalid_mask(check)
+        if pa.types.is_floating(allowed.type) and pc.any(pc.is_nan(allowed)).as_py():
+            # NaN matches the missing values in pandas, nulls never match NaN in Arrow
+            return self.invalid_mask(check)
+        try:
+            # the value set of a dictionary column is of the type of its dictionary
+            allowed = allowed.cast(values.type.value_type if pa.types.is_dictionary(values.type) else values.type)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            return self.invalid_mask(check)
+        encoded = self.cache.arrow_dictionary(check["column"])
+        if encoded is not None:
+            return ~to_mask(evaluate(encoded, lambda values: pc.is_in(values, value_set=allowed, skip_nulls=False)))
+        return ~to_mask(pc.is_in(values, value_set=allowed, skip_nulls=False))
+
+    def sql_predicate(self, check, columns):
+        from sqlalchemy import or_
+        from pipeline.sql import sql_family
+
+        col = columns[check["column"]]
+        allowed = check["allowed_values"]
+        if all(isinstance(value, str) for value in allowed):
+            family = "string"
+        elif all(isinstance(value, Number) and not isinstance(value, bool) and value == value for value in allowed):
+            family = "number"
+        else:
+            return None
+        # databases compare "1" and 1 as equal, pandas never does
+        if sql_family(col) not in (None, family):
+            return None
+        if family == "string":
+            # the collation of the column may compare "a" and "A" as equal, pandas never does
+            col = columns.text(check["column"])
+            if col is None:
+                return None
+        # missing values are never allowed, NOT IN alone is unknown on nulls
+        return or_(col.is_(None), col.not_in(allowed))
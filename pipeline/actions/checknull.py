@@ -1,3 +1,4 @@
+from pipeline.arrow import to_mask
 from pipeline.base import ValidationAction
 
 
@@ -5,17 +6,19 @@ class CheckNull(ValidationAction):
 
     action_name = "Check Null"
 
-    def run(self):
-   
-        cols:str = self.params["column"]
-        for col in cols:
-            self.validate_column_exist(col)
-
-            invalid = self.df[self.df[col].isnull() | (self.df[col].astype(str).str.strip() == "")]
-            self.report({
-                "Action": self.action_name,
-                "Column": col,
-                "Invalid_count": len(invalid),
-                "Valid_Column" : len(invalid)==0,
-                "Details": invalid.to_dict(orient="records")
-            })
+    def checks(self):
+        cols:list = self.params["column"]
+        return [{"column": col} for col in cols]
+
+    def invalid_mask(self, check):
+        col:str = check["column"]
+        return self.cache.blanks(col)
+
+    def arrow_mask(self, check):
+        return to_mask(self.cache.arrow_blanks(check["column"]))
+
+    def sql_predicate(self, check, columns):
+        from sqlalchemy import String, cast, func, or_
+
+        col = columns[check["column"]]
+        return or_(col.is_(None), func.trim(cast(col, String)) == "")
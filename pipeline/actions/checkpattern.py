@@ -1,21 +1,33 @@
+import pyarrow as pa
+import pyarrow.compute as pc
+from pipeline.arrow import to_mask
 from pipeline.base import ValidationAction
+from pipeline.distinct import evaluate
+from pipeline.strings import match_mask
 
 
 class CheckPattern(ValidationAction):
 
     action_name  = "Check Pattern"
-    
-    def run(self):
-        for check in self.params.get("checks", []):
-            col:str = check.get("column")
-            pattern:str = check.get("pattern")
-            self.validate_column_exist(column=col)
 
-            invalid = self.df[~self.df[col].astype(str).str.match(pattern)]
-            self.report({
-                "Action": self.action_name,
-                "Column": col,
-                "Invalid_count": len(invalid),
-                "Valid_Column" : len(invalid)==0,
-                "Details": invalid.to_dict(orient="records")
-            })
+    def invalid_mask(self, check):
+        col:str = check.get("column")
+        pattern:str = check.get("pattern")
+        texts = self.cache.texts(col)
+        if texts is None:
+            return ~self.cache.strings(col).str.match(pattern)
+        return ~match_mask(texts, pattern, check.get("regex_engine", "re"))
+
+    def arrow_mask(self, check):
+        col:str = check.get("column")
+        pattern:str = check.get("pattern")
+        def match(texts: pa.Array) -> pa.Array:
+            # str.match is anchored at the start of the value, RE2 searches anywhere
+            return pc.match_substring_regex(texts, pattern=f"^(?:{pattern})")
+        encoded = self.cache.arrow_texts(col)
+        try:
+            matched = match(self.cache.arrow_strings(col)) if encoded is None else evaluate(encoded, match)
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            # syntax RE2 does not support (lookarounds, backreferences)
+            return self.invalid_mask(check)
+        return ~to_mask(matched)
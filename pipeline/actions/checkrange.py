@@ -1,22 +1,38 @@
+from numbers import Number
+import pyarrow as pa
+import pyarrow.compute as pc
+from pipeline.arrow import to_mask
 from pipeline.base import ValidationAction
 
 
-class CheckPattern(ValidationAction):
+class CheckRange(ValidationAction):
 
     action_name  = "Check Range"
-    
-    def run(self):
-        for check in self.params.get("checks", []):
-            col:str = check.get("column")
-            min_val:float = check.get("min")
-            max_val:float = check.get("max")
-            self.validate_column_exist(column=col)
 
-            invalid = self.df[(self.df[col] < min_val) | (self.df[col] > max_val)]            
-            self.report({
-                "Action": self.action_name,
-                "Column": col,
-                "Invalid_count": len(invalid),
-                "Valid_Column" : len(invalid)==0,
-                "Details": invalid.to_dict(orient="records")
-            })
+    def invalid_mask(self, check):
+        col:str = check.get("column")
+        min_val:float = check.get("min")
+        max_val:float = check.get("max")
+        return (self.df[col] < min_val) | (self.df[col] > max_val)
+
+    def arrow_mask(self, check):
+        col:str = check.get("column")
+        min_val:float = check.get("min")
+        max_val:float = check.get("max")
+        values = self.cache.arrow(col)
+        numeric = pa.types.is_integer(values.type) or pa.types.is_floating(values.type)
+        if not (numeric and isinstance(min_val, Number) and isinstance(max_val, Number)):
+            return self.invalid_mask(check)
+        return to_mask(pc.or_(pc.less(values, min_val), pc.greater(values, max_val)))
+
+    def sql_predicate(self, check, columns):
+        from sqlalchemy import or_
+        from pipeline.sql import sql_family
+
+        col = columns[check.get("column")]
+        min_val:float = check.get("min")
+        max_val:float = check.get("max")
+        if not (isinstance(min_val, Number) and isinstance(max_val, Number)) or sql_family(col) not in (None, "number"):
+            return None
+        # nulls compare to unknown and are not invalid, like NaN in pandas
+        return or_(col < min_val, col > max_val)
@@ -1,8 +1,33 @@
 from pipeline.base import ValidationAction
+from typing import Dict, Optional
 import datetime
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pandas.tseries.api import guess_datetime_format
+from pipeline.arrow import to_mask
+from pipeline.distinct import DistinctValues
 
 class CheckType(ValidationAction):
+    """
+    Check that every value of a column is of the expected type.
+
+    The check is evaluated on whole columns: numeric, boolean and datetime dtypes are
+    answered from the dtype, object columns are classified by the type of their values
+    and datetime strings are parsed at once with an explicit (``format``) or inferred format.
+    Only the values that fail the vectorized parse are checked again one by one, once per
+    distinct value, so the result is the same as the TYPE_MAP rules applied to every value.
+    Text columns with few distinct values are checked once per distinct value.
+
+    With the arrow engine the Arrow types take the place of the dtypes and datetime strings are
+    parsed with pyarrow.compute.strptime, the result is the one of the column converted to pandas.
+
+    The optional ``strict`` flag changes how numbers are compared:
+        - not set: TYPE_MAP semantics, bools are ints and ints are not floats
+        - true: bools are not accepted as ints
+        - false: ints accept integral floats and floats accept ints
+    """
     action_name = "Check Type"
     TYPE_MAP = {
         "int": int,
@@ -12,32 +37,272 @@ class CheckType(ValidationAction):
         "datetime": datetime.datetime,
         "date": datetime.date
     }
-    
-    def run(self):
-        for check in self.params.get("checks", []):
-            col: str = check.get("column")
-            type: str = check.get("type")
-            self.validate_column_exist(column=col)
-
-            def is_valid_type(x):
-                if type in ["datetime", "date"]:
-                    if isinstance(x, self.TYPE_MAP[type]):
-                        return True
-                    try:
-                        parsed_date = pd.to_datetime(x, errors='raise', dayfirst=True)
-                        if type == "date":
-                            return isinstance(parsed_date.date(), datetime.date)
-                        return True
-                    except Exception:
-                        return False
-                return isinstance(x, self.TYPE_MAP[type])
-
-            invalid = self.df[~self.df[col].apply(is_valid_type)]
-
-            self.report({
-                "Action": self.action_name,
-                "Column": col,
-                "Invalid_count": len(invalid),
-                "Valid_Column": len(invalid) == 0,
-                "Details": invalid.to_dict(orient="records")
-            })
+    DATE_TYPES = ["datetime", "date"]
+    GUESS_SAMPLE = 100
+
+    def _is_valid_value(self, x, type: str) -> bool:
+        """
+        Function to validate a single value, reference rule of the vectorized checks
+        """
+        if type in self.DATE_TYPES:
+            if isinstance(x, self.TYPE_MAP[type]):
+                return True
+            try:
+                parsed_date = pd.to_datetime(x, errors='raise', dayfirst=True)
+                if type == "date":
+                    return isinstance(parsed_date.date(), datetime.date)
+                return True
+            except Exception:
+                return False
+        return isinstance(x, self.TYPE_MAP[type])
+
+    def _classes(self, values: np.ndarray):
+        """
+        Function to factorize an object array by the class of its values
+        """
+        types = np.frompyfunc(type, 1, 1)(values) if len(values) else np.zeros(0, dtype=object)
+        return pd.factorize(types)
+
+    def _class_mask(self, values: np.ndarray, predicate) -> np.ndarray:
+        """
+        Function to evaluate a predicate once per class and broadcast it to the values
+        """
+        codes, classes = self._classes(values)
+        lookup = np.array([predicate(cls) for cls in classes], dtype=bool)
+        return lookup[codes] if len(values) else np.zeros(0, dtype=bool)
+
+    def _valid_by_value(self, values: np.ndarray, type: str) -> np.ndarray:
+        """
+        Function to apply the single value rule once per distinct (class, value) pair
+        """
+        valid = np.zeros(len(values), dtype=bool)
+        codes, classes = self._classes(values)
+        for code in range(len(classes)):
+            rows = np.flatnonzero(codes == code)
+            try:
+                value_codes, uniques = pd.factorize(values[rows])
+            except TypeError:
+                valid[rows] = [self._is_valid_value(x, type) for x in values[rows]]
+                continue
+            lookup = np.array([self._is_valid_value(x, type) for x in uniques] + [False], dtype=bool)
+            valid[rows] = lookup[value_codes]
+            missing = value_codes < 0
+            if missing.any():
+                # missing values of the same class behave the same, factorize would hide which one they are
+                valid[rows[missing]] = self._is_valid_value(values[rows[missing][0]], type)
+        return valid
+
+    def _instance_mask(self, values: np.ndarray, target: type, strict: Optional[bool]) -> np.ndarray:
+        """
+        Function to return isinstance(value, target) for every value of an object array
+        """
+        def accepted(cls) -> bool:
+            is_bool = issubclass(cls, (bool, np.bool_))
+            if target is int and strict is True and is_bool:
+                return False
+            if target is float and strict is False and issubclass(cls, (int, np.integer)) and not is_bool:
+                return True
+            return issubclass(cls, target)
+
+        valid = self._class_mask(values, accepted)
+        if target is int and strict is False:
+            floats = self._class_mask(values, lambda cls: issubclass(cls, (float, np.floating)))
+            if floats.any():
+                numbers = values[floats].astype(float)
+                valid[floats] = np.isfinite(numbers) & (numbers == np.floor(numbers))
+        return valid
+
+    def _guess_format(self, text: np.ndarray) -> Optional[str]:
+        """
+        Function to infer the datetime format from the first values that have one
+        """
+        for sample in pd.unique(text[:self.GUESS_SAMPLE]):
+            format = guess_datetime_format(sample, dayfirst=True)
+            if format is not None:
+                return format
+        return None
+
+    def _valid_dates(self, values: np.ndarray, type: str, format: Optional[str], col: Optional[str] = None,
+                     sample: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Function to validate the values of an object array as dates,
+        when the array is a column its parsed dates are shared through the column cache,
+        the format is guessed from the sample when given
+        """
+        explicit = format is not None
+        valid = self._class_mask(values, lambda cls: issubclass(cls, self.TYPE_MAP[type]))
+        strings = ~valid & self._class_mask(values, lambda cls: issubclass(cls, str))
+
+        if strings.any():
+            text = values[strings]
+            if format is None:
+                format = self._guess_format(text if sample is None else sample)
+            if format is not None and col is not None:
+                parsed = self.cache.datetimes(col, format=format, dayfirst=True).to_numpy()
+                valid[strings & ~np.isnat(parsed)] = True
+            elif format is not None:
+                parsed = pd.to_datetime(pd.Series(text), errors="coerce", format=format, dayfirst=True)
+                valid[np.flatnonzero(strings)[parsed.notna().to_numpy()]] = True
+
+        pending = ~valid & ~strings if explicit else ~valid
+        if pending.any():
+            valid[pending] = self._valid_by_value(values[pending], type)
+        return valid
+
+    def _valid_array(self, values: np.ndarray, type: str, strict: Optional[bool], format: Optional[str],
+                     col: Optional[str] = None) -> np.ndarray:
+        """
+        Function to validate a numpy array, taking the fast path from its dtype when possible
+        """
+        kind = values.dtype.kind
+        n = len(values)
+
+        if kind in "iu":
+            if type in self.DATE_TYPES:
+                return pd.to_datetime(values, errors="coerce").notna()
+            return np.full(n, type == "int" or (type == "float" and strict is False))
+
+        if kind == "f":
+            if type in self.DATE_TYPES:
+                # floats never raise when parsed, out of range values become NaT
+                return np.ones(n, dtype=bool)
+            if type == "int" and strict is False:
+                return np.isfinite(values) & (values == np.floor(values))
+            return np.full(n, type == "float")
+
+        if kind == "b":
+            return np.full(n, type == "bool" or (type == "int" and strict is not True))
+
+        if kind == "M":
+            return np.full(n, type in self.DATE_TYPES)
+
+        values = values.astype(object)
+        if type in self.DATE_TYPES:
+            return self._valid_dates(values, type, format, col)
+        return self._instance_mask(values, self.TYPE_MAP[type], strict)
+
+    def _valid_series(self, series: pd.Series, type: str, strict: Optional[bool], format: Optional[str]) -> np.ndarray:
+        """
+        Function to unwrap the pandas dtypes into the values the single value rule would see
+        """
+        dtype = series.dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = self._valid_series(pd.Series(dtype.categories), type, strict, format)
+            codes = series.cat.codes.to_numpy()
+            return np.where(codes >= 0, categories[codes], False)
+        if isinstance(dtype, pd.DatetimeTZDtype):
+            return np.full(len(series), type in self.DATE_TYPES)
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype):
+            return self._valid_array(series.array.to_numpy(), type, strict, format)
+        col = series.name if series.dtype == object and self.cache is not None else None
+        distinct = self.cache.distinct(col) if col is not None else None
+        if distinct is not None:
+            return self._valid_distinct(series, distinct, type, strict, format)
+        return self._valid_array(series.to_numpy(), type, strict, format, col)
+
+    def _valid_distinct(self, series: pd.Series, distinct: DistinctValues, type: str, strict: Optional[bool],
+                        format: Optional[str]) -> np.ndarray:
+        """
+        Function to validate a text column once per distinct value, the missing values one by one
+        """
+        if type in self.DATE_TYPES:
+            sample = None
+            if format is None:
+                # the format is guessed from the first rows, the distinct values they hold come first
+                head = distinct.codes[~distinct.missing][:self.GUESS_SAMPLE]
+                sample = distinct.values[:head.max() + 1 if len(head) else 0]
+            per_value = self._valid_dates(distinct.values, type, format, sample=sample)
+        else:
+            per_value = self._instance_mask(distinct.values, self.TYPE_MAP[type], strict)
+        missing = distinct.missing
+        per_missing = self._valid_array(series.to_numpy()[missing], type, strict, format) if missing.any() else False
+        return distinct.expand(per_value, per_missing)
+
+    def _valid_arrow_dates(self, values: pa.Array, type: str, format: Optional[str], col: str) -> Optional[np.ndarray]:
+        """
+        Function to validate a string Arrow column as dates, like _valid_dates on its values
+        """
+        explicit = format is not None
+        strings = ~to_mask(pc.is_null(values))
+        valid = np.zeros(len(values), dtype=bool)
+
+        if strings.any():
+            if format is None:
+                sample = values.drop_null().slice(0, self.GUESS_SAMPLE)
+                format = self._guess_format(sample.to_numpy(zero_copy_only=False))
+            if format is not None:
+                try:
+                    valid = ~to_mask(pc.is_null(self.cache.arrow_datetimes(col, format)))
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                    # format directives strptime does not know, like %f
+                    return None
+
+        pending = ~valid & ~strings if explicit else ~valid
+        if pending.any():
+            pending_values = values.filter(pa.array(pending)).to_numpy(zero_copy_only=False).astype(object)
+            valid[pending] = self._valid_by_value(pending_values, type)
+        return valid
+
+    def _valid_arrow(self, values: pa.Array, type: str, strict: Optional[bool], format: Optional[str],
+                     col: str) -> Optional[np.ndarray]:
+        """
+        Function to validate an Arrow column like _valid_series validates it once converted to pandas,
+        None when the type of the column has no fast path
+        """
+        n = len(values)
+        nulls = to_mask(pc.is_null(values))
+
+        if pa.types.is_integer(values.type) and not nulls.any():
+            if type in self.DATE_TYPES:
+                return None
+            return np.full(n, type == "int" or (type == "float" and strict is False))
+
+        if pa.types.is_integer(values.type) or pa.types.is_floating(values.type):
+            # pandas turns integers with nulls into floats and nulls into NaN
+            if type in self.DATE_TYPES:
+                return np.ones(n, dtype=bool)
+            if type == "int" and strict is False:
+                numbers = values.cast(pa.float64())
+                return to_mask(pc.and_(pc.is_finite(numbers), pc.equal(numbers, pc.floor(numbers))))
+            return np.full(n, type == "float")
+
+        if pa.types.is_boolean(values.type):
+            accepted = type == "bool" or (type == "int" and strict is not True)
+            if not nulls.any():
+                return np.full(n, accepted)
+            if type in self.DATE_TYPES:
+                return None
+            # with nulls pandas keeps an object column where the nulls are None
+            return ~nulls & accepted
+
+        if pa.types.is_timestamp(values.type):
+            return np.full(n, type in self.DATE_TYPES)
+
+        if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+            if type == "str":
+                return ~nulls
+            if type in self.DATE_TYPES:
+                return self._valid_arrow_dates(values, type, format, col)
+            return np.zeros(n, dtype=bool)
+
+        return None
+
+    def arrow_mask(self, check: Dict):
+        col: str = check.get("column")
+        type: str = check.get("type")
+        if type not in self.TYPE_MAP:
+            raise ValueError(f"Unsupported type: {type}")
+
+        valid = self._valid_arrow(self.cache.arrow(col), type, check.get("strict"), check.get("format"), col)
+        if valid is None:
+            return self.invalid_mask(check)
+        return ~valid
+
+    def invalid_mask(self, check: Dict):
+        col: str = check.get("column")
+        type: str = check.get("type")
+        if type not in self.TYPE_MAP:
+            raise ValueError(f"Unsupported type: {type}")
+
+        valid = self._valid_series(self.df[col], type, check.get("strict"), check.get("format"))
+        return ~np.asarray(valid, dtype=bool)
@@ -1,20 +1,234 @@
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pipeline.arrow import ArrowFrame
 from pipeline.base import ValidationAction
+from pipeline.uniqueness import HashPartitions, HyperLogLog, RowStore, key_hashes
 
 
 class CheckUnique(ValidationAction):
+    """
+    Check that the values of a column, or of a list of columns (composite key), are unique.
+
+    Every check runs in one of three modes:
+    - memory (default): exact, the keys seen once are kept in memory between chunks
+    - spill: exact, the rows are spilled to disk in `partitions` hash partitions and every
+      partition is checked on its own, so the memory does not grow with the number of keys
+    - approx: a HyperLogLog sketch (`precision` bits) estimates the number of distinct keys,
+      the report has the estimated extra copies of the keys (rows minus distinct keys, not the
+      rows of the duplicate groups counted by the exact modes) and their error bound, no
+      Invalid_count and no details. The column is only reported valid when no row is estimated
+      repeated and unknown (None) when the repeated rows are within the bound
+    """
 
     action_name  = "Check Unique"
+    MODES = ("memory", "spill", "approx")
+    _NA = object()
+
+    def __init__(self, params, pipeline):
+        super().__init__(params, pipeline)
+        # value -> position of its row for values seen once, -1 once repeated
+        self._seen: Dict[int, Dict] = {}
+        # rows of the values seen once and positions of the ones repeated in a later chunk
+        self._rows: Dict[int, RowStore] = {}
+        self._firsts: Dict[int, List[int]] = {}
+        self._partitions: Dict[int, HashPartitions] = {}
+        self._sketches: Dict[int, HyperLogLog] = {}
+        # extra fields of the reports of the approx checks, by id of the check
+        self._estimates: Dict[int, Dict] = {}
+
+    def _mode(self, check) -> str:
+        mode = check.get("mode", "memory")
+        if mode not in self.MODES:
+            raise ValueError(f"Unsupported unique mode: {mode}")
+        return mode
+
+    @staticmethod
+    def _columns(check) -> List[str]:
+        column = check.get("column")
+        return column if isinstance(column, list) else [column]
+
+    def _keys(self, check) -> pd.DataFrame:
+        """
+        Function to return the key columns of a check for the current chunk
+        """
+        columns = self._columns(check)
+        if isinstance(self.df, ArrowFrame):
+            return pd.concat([self.df[col] for col in columns], axis=1)
+        return self.df[columns]
+
+    def invalid_mask(self, check):
+        if isinstance(check.get("column"), list):
+            return self._keys(check).duplicated(keep=False)
+        return self.df[check.get("column")].duplicated(keep=False)
+
+    def arrow_mask(self, check):
+        if isinstance(check.get("column"), list):
+            return self.invalid_mask(check)
+        values = self.cache.arrow(check.get("column"))
+        if pa.types.is_dictionary(values.type):
+            return self.invalid_mask(check)
+        if pa.types.is_floating(values.type):
+            # pandas sees the nulls of a float column as NaN, both are one value
+            values = pc.fill_null(values, float("nan"))
+        try:
+            codes = pc.dictionary_encode(values, null_encoding="encode").indices
+        except pa.ArrowNotImplementedError:
+            return self.invalid_mask(check)
+        codes = codes.to_numpy(zero_copy_only=False)
+        return np.bincount(codes, minlength=1)[codes] > 1
+
+    def sql_predicate(self, check, columns):
+        if self._mode(check) == "approx":
+            return None
+        from sqlalchemy import func
+
+        # keys are grouped as pandas groups them, "a" and "A" are two keys whatever the collation
+        keys = [columns.text(col) for col in self._columns(check)]
+        if any(key is None for key in keys):
+            return None
+        # like duplicated(keep=False): every row whose key appears more than once, nulls are one key
+        return func.count().over(partition_by=keys) > 1
+
+    def describe(self, check):
+        return self._estimates.get(id(check), {})
+
+    def invalid_count(self, check, partial):
+        # the estimate is reported as Estimated_duplicates, it does not count the rows of the duplicate groups
+        return None if id(check) in self._estimates else partial.invalid_count
+
+    def is_valid(self, check, partial):
+        estimate = self._estimates.get(id(check))
+        if estimate is None:
+            return super().is_valid(check, partial)
+        if not estimate["Estimated_duplicates"]:
+            return True
+        # repeated rows within the error bound can not be told from the noise of the estimate
+        return False if estimate["Estimated_duplicates"] > estimate["Error_bound"] else None
+
+    def parallel_safe(self):
+        return self.pipeline.chunks is None and all(self._mode(check) == "memory" for check in self.checks())
+
+    def __getstate__(self):
+        state = super().__getstate__()
+        state.update(_seen={}, _rows={}, _firsts={}, _partitions={}, _sketches={})
+        return state
+
+    def consume_check(self, position, check):
+        """
+        Function to validate one check over the current chunk. When the pipeline is fed with
+        chunks, the values seen in the previous chunks are kept (memory), spilled (spill) or
+        sketched (approx) so duplicates split across chunks are reported like in a full run.
+        In memory mode only the position of the values seen once is kept, their rows are
+        spilled to disk when the details keep rows
+        """
+        mode = self._mode(check)
+        if mode == "spill":
+            return self._spill(position, check)
+        if mode == "approx":
+            return self._sketch(position, check)
+        if self.pipeline.chunks is None:
+            return super().consume_check(position, check)
+
+        df = self.df
+        self.validate_column_exist(check.get("column"))
+        partial = self.partial(position, check)
+        seen = self._seen.setdefault(position, {})
+
+        if isinstance(check.get("column"), list):
+            keys = self._keys(check)
+            keys = pd.Series(list(zip(*(keys[col].astype(object).where(keys[col].notna(), self._NA)
+                                        for col in keys.columns))), dtype=object)
+        else:
+            col = check.get("column")
+            keys = df[col].astype(object).where(~self.cache.nulls(col), self._NA)
+        values = keys.tolist()
+        known = np.fromiter((key in seen for key in values), dtype=bool, count=len(values))
+        in_chunk = keys.duplicated(keep=False).to_numpy()
+        invalid = in_chunk | known
+
+        # the first row of a key seen once in a previous chunk is invalid now
+        firsts = []
+        for key in dict.fromkeys(key for key, repeated in zip(values, known) if repeated):
+            if seen[key] >= 0:
+                firsts.append(seen[key])
+                seen[key] = -1
+        if firsts and partial.keeps_rows:
+            # their rows are read back from disk when reporting
+            partial.invalid_count += len(firsts)
+            self._firsts.setdefault(position, []).extend(firsts)
+        else:
+            for first in firsts:
+                partial.add_record(first, None)
+
+        partial.add(df, np.flatnonzero(invalid), self.offset)
+
+        for key, repeated in zip(values, in_chunk & ~known):
+            if repeated:
+                seen[key] = -1
+        singles = np.flatnonzero(~invalid)
+        for key, pos in zip([values[i] for i in singles], (self.offset + singles).tolist()):
+            seen[key] = pos
+        if partial.keeps_rows and len(singles):
+            if position not in self._rows:
+                self._rows[position] = RowStore(check.get("path"))
+            self._rows[position].add(df.take(singles), self.offset + singles)
+
+    def _spill(self, position, check):
+        """
+        Function to spill the rows of the current chunk to the hash partitions of a check,
+        with every column when the details keep the rows and only the key columns otherwise
+        """
+        self.validate_column_exist(check.get("column"))
+        if position not in self._partitions:
+            self._partitions[position] = HashPartitions(
+                self._columns(check), check.get("partitions", 64), check.get("path")
+            )
+        if self.partial(position, check).keeps_rows:
+            frame = self.df.take(np.arange(len(self.df)))
+        else:
+            frame = self._keys(check)
+        self._partitions[position].add(frame, self.offset + np.arange(len(self.df)))
+
+    def _sketch(self, position, check):
+        """
+        Function to add the keys of the current chunk to the HyperLogLog sketch of a check
+        """
+        self.validate_column_exist(check.get("column"))
+        if position not in self._sketches:
+            self._sketches[position] = HyperLogLog(int(check.get("precision", 14)))
+        self._sketches[position].add(key_hashes(self._keys(check)))
 
-    def run(self):
-        for check in self.params.get("checks",[]):
-            col:str = check.get("column")
-            self.validate_column_exist(col)
-
-            invalid = self.df[self.df[col].duplicated(keep=False)]
-            self.report({
-                "Action": self.action_name,
-                "Column": col,
-                "Invalid_count": len(invalid),
-                "Valid_Column" : len(invalid)==0,
-                "Details": invalid.to_dict(orient="records")
-            })
+    def finalize(self):
+        """
+        Function to resolve the spilled partitions and the sketches before reporting
+        """
+        for position, check in enumerate(self.checks()):
+            partial = self.partial(position, check)
+            if position in self._rows:
+                store = self._rows.pop(position)
+                try:
+                    firsts = self._firsts.pop(position, [])
+                    if firsts:
+                        for frame, positions in store.take(np.array(firsts)):
+                            partial.add_details(frame, positions)
+                finally:
+                    store.close()
+            self._seen.pop(position, None)
+            if position in self._partitions:
+                for frame, positions in self._partitions.pop(position).duplicates():
+                    partial.add_frame(frame, positions)
+            if position in self._sketches:
+                sketch = self._sketches.pop(position)
+                distinct = sketch.distinct()
+                # 95% bound of the estimate, repeated rows within it can not be told from noise
+                bound = 1.96 * sketch.relative_error() * distinct
+                self._estimates[id(check)] = {
+                    "Approximate": True,
+                    "Estimated_distinct": int(round(distinct)),
+                    "Estimated_duplicates": max(int(round(sketch.count - distinct)), 0),
+                    "Error_bound": int(np.ceil(bound))
+                }
+        super().finalize()
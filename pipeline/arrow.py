@@ -0,0 +1,51 @@
+from typing import Dict, Hashable
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+class ArrowFrame:
+    """
+    Chunk of data held as an Arrow Table, used by the arrow engine.
+
+    The checks of the actions read the Arrow columns with pyarrow.compute kernels. For the checks
+    without a kernel it also behaves like the DataFrame they expect: `frame[col]` converts a single
+    column to pandas (once) and the invalid rows are only converted when their details are kept.
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+        self._series: Dict[Hashable, pd.Series] = {}
+
+    @property
+    def columns(self) -> pd.Index:
+        return pd.Index(self.table.column_names)
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    def column(self, col: str) -> pa.Array:
+        """Arrow column as a single array"""
+        return self.table.column(col).combine_chunks()
+
+    def __getitem__(self, col: str) -> pd.Series:
+        if col not in self._series:
+            series = self.table.column(col).to_pandas()
+            series.name = col
+            # setdefault keeps every thread on the same converted column
+            return self._series.setdefault(col, series)
+        return self._series[col]
+
+    def take(self, rows: np.ndarray) -> pd.DataFrame:
+        """Rows at the given positions, converted to pandas"""
+        return self.table.take(pa.array(rows, type=pa.int64())).to_pandas()
+
+
+def to_mask(values) -> np.ndarray:
+    """
+    Function to convert the result of a kernel into a numpy mask, nulls are not invalid
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    return pc.fill_null(values, False).to_numpy(zero_copy_only=False).astype(bool, copy=False)
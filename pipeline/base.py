@@ -1,6 +1,75 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+import numpy as np
+import pandas as pd
 from pipeline.pipeline import Pipeline
+from pipeline.arrow import ArrowFrame
+from pipeline.details import Details, FullDetails, build_details
+from pipeline.planner import ColumnCache
+
+if TYPE_CHECKING:
+    # only a database source needs sqlalchemy
+    from sqlalchemy.sql.expression import ColumnElement
+
+
+class PartialResult:
+    """
+    State of a single check, accumulated chunk by chunk
+    """
+
+    def __init__(self, details: Optional[Details] = None):
+        self.invalid_count: int = 0
+        self._details: Details = details if details is not None else FullDetails()
+
+    def add(self, df: pd.DataFrame, rows: np.ndarray, offset: int):
+        """
+        Function to add the invalid rows of a chunk
+
+        :params df: Chunk of data
+        :params rows: Positions of the invalid rows inside the chunk
+        :params offset: Position of the first row of the chunk in the whole dataset
+        """
+        self.invalid_count += len(rows)
+        self._details.add(df, rows, offset)
+
+    def add_frame(self, frame: pd.DataFrame, positions: np.ndarray):
+        """
+        Function to add invalid rows already taken from their chunk
+
+        :params frame: Invalid rows
+        :params positions: Position of each row in the whole dataset
+        """
+        self.invalid_count += len(positions)
+        self._details.add_frame(frame, positions)
+
+    def add_details(self, frame: pd.DataFrame, positions: np.ndarray):
+        """
+        Function to add the rows of invalid rows already counted
+
+        :params frame: Invalid rows
+        :params positions: Position of each row in the whole dataset
+        """
+        self._details.add_frame(frame, positions)
+
+    def add_record(self, position: int, record: Dict):
+        self.invalid_count += 1
+        self._details.add_record(position, record)
+
+    @property
+    def keeps_rows(self) -> bool:
+        return self._details.keeps_rows
+
+    @property
+    def rows_needed(self) -> Optional[int]:
+        return self._details.rows_needed
+
+    @property
+    def details(self):
+        """
+        Content of the "Details" field of the report, as configured by the details policy
+        """
+        return self._details.value()
+
 
 class ValidationAction(ABC):
 
@@ -8,14 +77,151 @@ class ValidationAction(ABC):
         self.params = params
         self.pipeline = pipeline
         self.df = pipeline.df
+        self.cache: Optional[ColumnCache] = None
+        self._partials: Dict[int, PartialResult] = {}
+        self.offset: int = 0
+        # position of the action in the configuration, set by the pipeline that builds it
+        self.index: int = 0
+
+    def checks(self) -> List[Dict]:
+        """
+        Function to return the list of checks of the action, each check produces one report
+        """
+        return self.params.get("checks", [])
 
     @abstractmethod
-    def run(self):
+    def invalid_mask(self, check: Dict) -> pd.Series:
+        """
+        Function to return the boolean mask of the invalid rows of self.df for one check
+        """
         pass
 
+    def arrow_mask(self, check: Dict) -> np.ndarray:
+        """
+        Function to return the boolean mask of the invalid rows when self.df is an ArrowFrame,
+        actions override it with pyarrow.compute kernels, by default the pandas check runs
+        on the columns converted to pandas
+        """
+        return self.invalid_mask(check)
+
+    def dtype(self, check: Dict) -> Optional[str]:
+        """
+        Function to return a dtype the column of a check can be loaded with without changing
+        the result of the check, None to let the loader infer it
+        """
+        return None
+
+    def sql_predicate(self, check: Dict, columns) -> Optional["ColumnElement"]:
+        """
+        Function to return a SQL expression true on the invalid rows of a check, so a database
+        source runs the check itself and only the invalid rows are read. `columns` are the
+        columns of the table or query (`SqlColumns`), text is compared with `columns.text(name)`. None when the check can not be expressed in SQL,
+        the rows are then streamed to the pandas check
+        """
+        return None
+
+    def describe(self, check: Dict) -> Dict:
+        """
+        Function to return the extra fields added to the report of a check
+        """
+        return {}
+
+    def invalid_count(self, check: Dict, partial: PartialResult) -> Optional[int]:
+        """
+        Function to return the Invalid_count of the report of a check, None when the rows are not counted
+        """
+        return partial.invalid_count
+
+    def is_valid(self, check: Dict, partial: PartialResult) -> Optional[bool]:
+        """
+        Function to return the Valid_Column of the report of a check, None when it is not known
+        """
+        return partial.invalid_count == 0
+
+    def run(self):
+        """
+        Run the action over the whole DataFrame of the pipeline
+        """
+        self.consume(self.df)
+        self.finalize()
+
+    def parallel_safe(self) -> bool:
+        """
+        Function to tell if the checks of the action can run in another process,
+        only the positions of the invalid rows come back so the action must not keep state
+        """
+        return True
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(pipeline=None, df=None, cache=None, _partials={})
+        return state
+
+    def begin(self, df: pd.DataFrame, cache: Optional[ColumnCache] = None):
+        """
+        Function to start the validation of a chunk of data
+        """
+        self.df = df
+        self.cache = cache if cache is not None else ColumnCache(df)
+
+    def consume_check(self, position: int, check: Dict):
+        """
+        Function to validate one check over the current chunk and accumulate its partial result
+        """
+        self.validate_column_exist(column=check.get("column"))
+        if isinstance(self.df, ArrowFrame):
+            mask = np.asarray(self.arrow_mask(check), dtype=bool)
+        else:
+            mask = np.asarray(self.invalid_mask(check), dtype=bool)
+        self.partial(position, check).add(self.df, np.flatnonzero(mask), self.offset)
+
+    def end(self):
+        """
+        Function to close the validation of the current chunk
+        """
+        self.offset += len(self.df)
+
+    def consume(self, df: pd.DataFrame, cache: Optional[ColumnCache] = None):
+        """
+        Function to validate one chunk of data and accumulate the partial results
+        """
+        self.begin(df, cache)
+        for position, check in enumerate(self.checks()):
+            self.consume_check(position, check)
+        self.end()
+
+    def partial(self, position: int, check: Dict) -> PartialResult:
+        """
+        Function to return the partial result of a check, created with the details policy
+        of the action (`details` in its params) or of the pipeline
+        """
+        if position not in self._partials:
+            config = self.params.get("details", self.pipeline.details)
+            # two actions of a type can check the same column, the index of the action tells them apart
+            name = f"{type(self).__name__}_{self.index}_{position}_{check.get('column')}"
+            self._partials[position] = PartialResult(build_details(config, name))
+        return self._partials[position]
+
+    def finalize(self):
+        """
+        Function to report the accumulated results of every check
+        """
+        for position, check in enumerate(self.checks()):
+            partial = self.partial(position, check)
+            self.report({
+                "Action": self.action_name,
+                "Column": check.get("column"),
+                **self.describe(check),
+                "Invalid_count": self.invalid_count(check, partial),
+                "Valid_Column": self.is_valid(check, partial),
+                "Details": partial.details
+            })
+
     def report(self, result):
         self.pipeline.report(result)
-    
-    def validate_column_exist(self, column:str):
-        if column not in self.df.columns:
-            raise ValueError(f"Missing columns: {column}")
\ No newline at end of file
+
+    def validate_column_exist(self, column:Union[str, List[str]]):
+        columns = column if isinstance(column, list) else [column]
+        missing = [col for col in columns if col not in self.df.columns]
+        if missing:
+            raise ValueError(f"Missing columns: {', '.join(map(str, missing))}")
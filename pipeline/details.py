@@ -0,0 +1,327 @@
+import re
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+class Details(ABC):
+    """
+    Collector of the invalid rows of a check, it decides what ends in the "Details" of the report.
+    Rows are identified by their position in the whole dataset, whatever the chunk they are found in.
+    """
+
+    keeps_rows: bool = True
+    # number of first invalid rows the collector uses, None when it uses all of them
+    rows_needed: Optional[int] = None
+
+    def add(self, df: pd.DataFrame, rows: np.ndarray, offset: int):
+        """
+        Function to collect the invalid rows of a chunk
+
+        :params df: Chunk of data, a DataFrame or an ArrowFrame (only the taken rows are converted)
+        :params rows: Positions of the invalid rows inside the chunk
+        :params offset: Position of the first row of the chunk in the dataset
+        """
+        self.add_frame(df.take(rows), offset + rows)
+
+    @abstractmethod
+    def add_frame(self, frame: pd.DataFrame, positions: np.ndarray):
+        """
+        Function to collect invalid rows already taken from their chunk
+
+        :params frame: Invalid rows
+        :params positions: Position of each row in the dataset
+        """
+        pass
+
+    @abstractmethod
+    def add_record(self, position: int, record: Dict):
+        """
+        Function to collect an invalid row already converted to a record
+        """
+        pass
+
+    @abstractmethod
+    def value(self):
+        """
+        Function to return the content of the "Details" field of the report
+        """
+        pass
+
+
+class FullDetails(Details):
+    """Keep every invalid row, the default behaviour"""
+
+    def __init__(self):
+        self._rows: List[Tuple[int, Dict]] = []
+
+    def add_frame(self, frame, positions):
+        self._rows.extend(zip(np.asarray(positions).tolist(), frame.to_dict(orient="records")))
+
+    def add_record(self, position, record):
+        self._rows.append((position, record))
+
+    def value(self):
+        return [row for _, row in sorted(self._rows, key=lambda item: item[0])]
+
+
+class IndexDetails(Details):
+    """Keep only the positions of the invalid rows"""
+
+    keeps_rows = False
+
+    def __init__(self):
+        self._positions: List[np.ndarray] = []
+
+    def add(self, df, rows, offset):
+        self._positions.append(offset + rows)
+
+    def add_frame(self, frame, positions):
+        self._positions.append(np.asarray(positions))
+
+    def add_record(self, position, record):
+        self._positions.append(np.array([position]))
+
+    def value(self):
+        if not self._positions:
+            return []
+        return np.sort(np.concatenate(self._positions)).tolist()
+
+
+class HeadDetails(Details):
+    """Keep the first N invalid rows of the dataset"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.rows_needed = limit
+        self._rows: List[Tuple[int, Dict]] = []
+
+    def _truncate(self):
+        if len(self._rows) > self.limit:
+            self._rows = sorted(self._rows, key=lambda item: item[0])[:self.limit]
+
+    def add(self, df, rows, offset):
+        rows = rows[:self.limit]
+        self.add_frame(df.take(rows), offset + rows)
+
+    def add_frame(self, frame, positions):
+        positions = np.asarray(positions)
+        first = np.argsort(positions, kind="stable")[:self.limit]
+        records = frame.take(first).to_dict(orient="records")
+        self._rows.extend(zip(positions[first].tolist(), records))
+        self._truncate()
+
+    def add_record(self, position, record):
+        self._rows.append((position, record))
+        self._truncate()
+
+    def value(self):
+        return [row for _, row in sorted(self._rows, key=lambda item: item[0])]
+
+
+class SampleDetails(Details):
+    """Keep a uniform reservoir sample of N invalid rows"""
+
+    def __init__(self, limit: int, seed: Optional[int] = None):
+        self.limit = limit
+        self.seen: int = 0
+        self._rng = np.random.default_rng(seed)
+        self._rows: List[Tuple[int, Dict]] = []
+
+    def _slots(self, count: int) -> Dict[int, int]:
+        """
+        Function to run the reservoir algorithm over `count` new rows,
+        returning the slot taken by each accepted row
+        """
+        slots: Dict[int, int] = {}
+        fill = min(max(self.limit - self.seen, 0), count)
+        for i in range(fill):
+            slots[i] = self.seen + i
+        if count > fill:
+            seen = self.seen + np.arange(fill, count)
+            draws = self._rng.integers(0, seen + 1)
+            for i in np.flatnonzero(draws < self.limit):
+                slots[fill + i] = int(draws[i])
+        self.seen += count
+        return slots
+
+    def _place(self, slot: int, item: Tuple[int, Dict]):
+        if slot < len(self._rows):
+            self._rows[slot] = item
+        else:
+            self._rows.append(item)
+
+    def add(self, df, rows, offset):
+        slots = self._slots(len(rows))
+        if not slots:
+            return
+        picked = np.fromiter(slots.keys(), dtype=int)
+        records = df.take(rows[picked]).to_dict(orient="records")
+        for i, record in zip(picked, records):
+            self._place(slots[i], (int(offset + rows[i]), record))
+
+    def add_frame(self, frame, positions):
+        slots = self._slots(len(positions))
+        if not slots:
+            return
+        picked = np.fromiter(slots.keys(), dtype=int)
+        records = frame.take(picked).to_dict(orient="records")
+        for i, record in zip(picked, records):
+            self._place(slots[i], (int(positions[i]), record))
+
+    def add_record(self, position, record):
+        for slot in self._slots(1).values():
+            self._place(slot, (position, record))
+
+    def value(self):
+        return [row for _, row in sorted(self._rows, key=lambda item: item[0])]
+
+
+class SpillDetails(Details):
+    """
+    Write every invalid row to a Parquet file and report its path.
+
+    The chunks of a stream are typed one by one (a column of ints can hold floats or text in a
+    later chunk). Chunks go straight to the file while their types match, a chunk of other types
+    starts a part file next to it; when the file is closed the columns are widened to a type holding
+    every chunk (int to float, text when they do not agree) and the parts are merged into the file.
+    """
+
+    POSITION_COLUMN = "_position"
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._writer = None
+        self._schema = None
+        self._parts: List[Path] = []
+        self._pending: List[Tuple[int, Dict]] = []
+
+    @staticmethod
+    def _table(frame: pd.DataFrame, schema=None):
+        import pyarrow as pa
+
+        try:
+            return pa.Table.from_pandas(frame, schema=schema, preserve_index=False)
+        except (pa.ArrowTypeError, pa.ArrowInvalid):
+            if schema is not None:
+                raise
+            # columns of mixed objects are written as their text
+            return pa.Table.from_pandas(frame.astype(str), preserve_index=False)
+
+    def _write(self, frame: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._schema is None:
+            table = self._table(frame)
+            self._schema = table.schema
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+            self._writer.write_table(table)
+            return
+        try:
+            table = self._table(frame, self._schema)
+        except (pa.ArrowTypeError, pa.ArrowInvalid, KeyError):
+            # the rows stay in the order of their positions, the next chunks go to the new part
+            table = self._table(frame)
+            self._writer.close()
+            part = self.path.with_name(f"{self.path.stem}.part{len(self._parts)}.parquet")
+            self._parts.append(part)
+            self._schema = table.schema
+            self._writer = pq.ParquetWriter(part, self._schema)
+        self._writer.write_table(table)
+
+    @staticmethod
+    def _widen(schemas: List):
+        """
+        Function to return a schema holding the tables of every schema, a column is promoted
+        (null to any type, int to float, ...) or written as text when its types do not agree
+        """
+        import pyarrow as pa
+
+        fields: Dict[str, List] = {}
+        for schema in schemas:
+            for field in schema:
+                fields.setdefault(field.name, []).append(field.type)
+        widened = []
+        for name, types in fields.items():
+            try:
+                merged = pa.unify_schemas([pa.schema([(name, type)]) for type in types],
+                                          promote_options="permissive").field(name).type
+            except (pa.ArrowTypeError, pa.ArrowInvalid, pa.ArrowNotImplementedError):
+                merged = pa.string()
+            widened.append(pa.field(name, merged))
+        return pa.schema(widened)
+
+    def _merge_parts(self):
+        """
+        Function to rewrite the file and its parts as one file with the widened schema
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        files = [self.path, *self._parts]
+        schema = self._widen([pq.read_schema(file) for file in files])
+        merged = self.path.with_name(f".{self.path.name}.tmp")
+        with pq.ParquetWriter(merged, schema) as writer:
+            for file in files:
+                reader = pq.ParquetFile(file)
+                for group in range(reader.num_row_groups):
+                    table = reader.read_row_group(group)
+                    columns = [table.column(field.name).cast(field.type) if field.name in table.column_names
+                               else pa.nulls(table.num_rows, field.type) for field in schema]
+                    writer.write_table(pa.Table.from_arrays(columns, schema=schema))
+        merged.replace(self.path)
+        for part in self._parts:
+            part.unlink()
+        self._parts = []
+
+    def add_frame(self, frame, positions):
+        if not len(positions):
+            return
+        frame = frame.reset_index(drop=True)
+        frame.insert(0, self.POSITION_COLUMN, positions)
+        self._write(frame)
+
+    def add_record(self, position, record):
+        self._pending.append((position, record))
+
+    def value(self):
+        if self._pending:
+            frame = pd.DataFrame([record for _, record in self._pending])
+            frame.insert(0, self.POSITION_COLUMN, [position for position, _ in self._pending])
+            self._pending = []
+            self._write(frame)
+        if self._writer is None:
+            return None
+        self._writer.close()
+        if self._parts:
+            self._merge_parts()
+        return str(self.path)
+
+
+def build_details(config: Optional[Dict], name: str) -> Details:
+    """
+    Function to build the details collector of a check from the details configuration
+
+    :params config: details configuration, {"mode": full|indices|head|sample|spill, "limit": N, "path": folder}
+    :params name: unique name of the check, used to name the spill file
+    """
+    config = config or {}
+    mode = config.get("mode", "full")
+    limit = int(config.get("limit", 100))
+
+    if mode == "full":
+        return FullDetails()
+    if mode == "indices":
+        return IndexDetails()
+    if mode == "head":
+        return HeadDetails(limit)
+    if mode == "sample":
+        return SampleDetails(limit, config.get("seed"))
+    if mode == "spill":
+        filename = re.sub(r"[^0-9A-Za-z_.-]+", "_", name) + ".parquet"
+        return SpillDetails(Path(config.get("path", "results/details")) / filename)
+    raise ValueError(f"Unsupported details mode: {mode}")
@@ -0,0 +1,111 @@
+from typing import Callable, Optional, Union
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+# at most one distinct value every DISTINCT_RATIO rows
+DISTINCT_RATIO: float = 0.2
+# rows of the column looked at before encoding it
+DISTINCT_SAMPLE: int = 10_000
+
+
+class DistinctValues:
+    """
+    Distinct values of a text column and the code of every row (-1 for the missing values), so
+    a check evaluates its predicate once per distinct value and broadcasts the result to the rows.
+    The distinct values are in the order they first appear in the column.
+    """
+
+    def __init__(self, codes: np.ndarray, values: np.ndarray):
+        self.codes = codes
+        self.values = values
+
+    @classmethod
+    def build(cls, values: pd.Series, ratio: float = DISTINCT_RATIO) -> Optional["DistinctValues"]:
+        """
+        Function to factorize an object column holding only text, None for other columns and
+        for columns with more than `ratio` distinct values per row
+
+        :params values: Column
+        :params ratio: Highest ratio of distinct values to rows
+        """
+        if values.dtype != object or not len(values):
+            return None
+        # a strided sample avoids factorizing columns of unique values, sorted or not
+        sample = values.iloc[::max(len(values) // DISTINCT_SAMPLE, 1)]
+        if pd.api.types.infer_dtype(sample, skipna=True) != "string" or sample.nunique() > ratio * len(sample):
+            return None
+        # values of different text can be equal (1, 1.0 and True), they are never merged
+        if pd.api.types.infer_dtype(values, skipna=True) != "string":
+            return None
+        codes, uniques = pd.factorize(values)
+        if len(uniques) > ratio * len(values):
+            return None
+        return cls(codes, np.asarray(uniques, dtype=object))
+
+    @property
+    def missing(self) -> np.ndarray:
+        """Mask of the rows with a missing value"""
+        return self.codes < 0
+
+    def expand(self, per_value: np.ndarray, missing: Union[np.ndarray, object]) -> np.ndarray:
+        """
+        Function to expand a result computed per distinct value to every row
+
+        :params per_value: Result of every distinct value
+        :params missing: Result of the rows with a missing value, one for all or one per row
+        """
+        result = per_value[np.maximum(self.codes, 0)] if len(per_value) else np.empty(len(self.codes), per_value.dtype)
+        rows = self.missing
+        if rows.any():
+            result[rows] = missing
+        return result
+
+
+def _is_text(type: pa.DataType) -> bool:
+    return pa.types.is_string(type) or pa.types.is_large_string(type)
+
+
+def encode(values: pa.Array, ratio: float = DISTINCT_RATIO) -> Optional[pa.DictionaryArray]:
+    """
+    Function to return the dictionary encoding of a text Arrow column, the column itself when it
+    is already dictionary encoded (Parquet, category), None for other columns and for columns
+    with more than `ratio` distinct values per row
+
+    :params values: Arrow column
+    :params ratio: Highest ratio of distinct values to rows
+    """
+    if pa.types.is_dictionary(values.type):
+        return values if _is_text(values.type.value_type) else None
+    if not _is_text(values.type) or not len(values):
+        return None
+    sample = values.take(pa.array(np.arange(0, len(values), max(len(values) // DISTINCT_SAMPLE, 1))))
+    if pc.count_distinct(sample).as_py() > ratio * len(sample):
+        return None
+    encoded = values.dictionary_encode()
+    if len(encoded.dictionary) > ratio * len(values):
+        return None
+    return encoded
+
+
+def fill_missing(encoded: pa.DictionaryArray, value: str) -> pa.DictionaryArray:
+    """
+    Function to replace the nulls of a dictionary encoded column by a value of the dictionary
+    """
+    if not encoded.null_count:
+        return encoded
+    dictionary = pa.concat_arrays([encoded.dictionary, pa.array([value], type=encoded.dictionary.type)])
+    indices = pc.fill_null(encoded.indices, pa.scalar(len(encoded.dictionary), type=encoded.indices.type))
+    return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+
+def evaluate(encoded: pa.DictionaryArray, kernel: Callable[[pa.Array], pa.Array]) -> pa.Array:
+    """
+    Function to run a kernel once per value of the dictionary and broadcast the result to the rows,
+    null rows give null
+
+    :params encoded: Dictionary encoded column
+    :params kernel: Element-wise function of an Arrow array
+    """
+    return kernel(encoded.dictionary).take(encoded.indices)
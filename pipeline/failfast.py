@@ -0,0 +1,51 @@
+from typing import Dict, Optional
+
+
+class FailFast:
+    """
+    Threshold stopping a check as soon as it found too many invalid rows (`execution.fail_fast`,
+    or `fail_fast` in the params of an action).
+
+    A check stops once it found more than `max_invalid` invalid rows, or once more than
+    `max_invalid_ratio` of its rows are invalid after at least `min_rows` rows. With the scope
+    `check` only that check stops and the others go on, with `pipeline` the run stops and the
+    rest of the file is not read. A DataFrame loaded whole is checked in slices of `chunk_rows`
+    rows so a check can stop before the end of it.
+    """
+
+    SCOPES = ("check", "pipeline")
+
+    def __init__(self, max_invalid: Optional[int] = None, max_invalid_ratio: Optional[float] = None,
+                 min_rows: int = 1000, scope: str = "check", chunk_rows: int = 100_000):
+        if max_invalid is None and max_invalid_ratio is None:
+            raise ValueError("Fail fast needs max_invalid or max_invalid_ratio")
+        if scope not in self.SCOPES:
+            raise ValueError(f"Unsupported fail fast scope: {scope}")
+        self.max_invalid = None if max_invalid is None else int(max_invalid)
+        self.max_invalid_ratio = None if max_invalid_ratio is None else float(max_invalid_ratio)
+        self.min_rows = int(min_rows)
+        self.scope = scope
+        self.chunk_rows = max(int(chunk_rows), 1)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> Optional["FailFast"]:
+        """
+        Function to build the threshold of a fail fast section, None when not configured
+
+        :params config: {"max_invalid": N, "max_invalid_ratio": R, "min_rows": 1000,
+                        "scope": check|pipeline, "chunk_rows": 100000}
+        """
+        if not config:
+            return None
+        return cls(max_invalid=config.get("max_invalid"), max_invalid_ratio=config.get("max_invalid_ratio"),
+                   min_rows=config.get("min_rows", 1000), scope=config.get("scope", "check"),
+                   chunk_rows=config.get("chunk_rows", 100_000))
+
+    def exceeded(self, invalid: int, rows: int) -> bool:
+        """
+        Function to tell if a check with `invalid` invalid rows out of `rows` must stop
+        """
+        if self.max_invalid is not None and invalid > self.max_invalid:
+            return True
+        return self.max_invalid_ratio is not None and rows >= self.min_rows \
+            and invalid > self.max_invalid_ratio * rows
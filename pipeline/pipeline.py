@@ -1,8 +1,25 @@
 import importlib
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+import pyarrow as pa
+from pipeline.arrow import ArrowFrame
+from pipeline.failfast import FailFast
+from pipeline.planner import ExecutionPlan
+from utils.metrics import CheckTimer
+from utils.sampling import Sampler
 
 class Pipeline:
-    def __init__(self, df):
+    def __init__(self, df=None, chunks:Optional[Iterable]=None, details:Optional[Dict]=None,
+                 executor:str="serial", workers:Optional[int]=None, source=None, metrics=None,
+                 sample:Optional[Sampler]=None, fail_fast:Optional[Dict]=None):
         self.df = df
+        self.chunks = chunks
+        self.source = source
+        self.details = details
+        self.executor = executor
+        self.workers = workers
+        self.metrics = metrics
+        self.sample = sample
+        self.fail_fast = fail_fast
         self.reports = []
 
     def report(self, result):
@@ -15,16 +32,173 @@ class Pipeline:
         else:
             self.reports.append(result)
 
-    def run(self, actions_config):
+    def _build_actions(self, actions_config):
         """
-        Run a sequence of actions defined in the validation.yml in config folder,
-        and return all reports generated by the actions
+        Function to instantiate the actions defined in the validation.yml
         """
-        for action_dict in actions_config:
+        actions = []
+        for index, action_dict in enumerate(actions_config):
             action_name, params = list(action_dict.items())[0]
             module = importlib.import_module(f"pipeline.actions.{action_name.lower()}")
             action_class = getattr(module, action_name)
-            action_instance = action_class(params, self)
-            action_instance.run()
+            action = action_class(params, self)
+            action.index = index
+            actions.append(action)
+        return actions
+
+    def _projection(self, actions) -> Dict[str, Optional[str]]:
+        dtypes: Dict[str, set] = {}
+        for action in actions:
+            for check in action.checks():
+                column = check.get("column")
+                if isinstance(column, list):
+                    # a check on several columns does not push a dtype to any of them
+                    for col in column:
+                        dtypes.setdefault(col, set()).add(None)
+                else:
+                    dtypes.setdefault(column, set()).add(action.dtype(check))
+        return {col: next(iter(found)) if len(found) == 1 else None for col, found in dtypes.items()}
+
+    def projection(self, actions_config) -> Dict[str, Optional[str]]:
+        """
+        Function to return the columns read by the actions defined in the validation.yml,
+        with the dtype they can be loaded with when every check on the column agrees on one
+        """
+        return self._projection(self._build_actions(actions_config))
+
+    def _gates(self, actions) -> Dict[int, FailFast]:
+        """
+        Function to return the fail fast threshold of each action, from its params (`fail_fast`)
+        or from the pipeline
+        """
+        gates = {}
+        for action in actions:
+            params = action.params if isinstance(action.params, dict) else {}
+            gate = FailFast.from_config(params.get("fail_fast", self.fail_fast))
+            if gate is not None:
+                gates[id(action)] = gate
+        return gates
 
-        return self.reports
\ No newline at end of file
+    @staticmethod
+    def _slices(data, rows: int) -> Iterator:
+        """
+        Function to split a DataFrame or an Arrow Table loaded whole into slices of rows, without copying it
+        """
+        total = data.num_rows if isinstance(data, pa.Table) else len(data)
+        for start in range(0, max(total, 1), rows):
+            yield data.slice(start, rows) if isinstance(data, pa.Table) else data.iloc[start:start + rows]
+
+    @staticmethod
+    def _invalid_counts(plan: ExecutionPlan) -> Dict[Tuple[int, int], int]:
+        return {(id(action), position): action.partial(position, check).invalid_count
+                for steps in plan.columns.values() for action, position, check in steps}
+
+    def _stop_checks(self, plan: ExecutionPlan, gates: Dict[int, FailFast], stopped: Dict[Tuple[int, int], int]) -> bool:
+        """
+        Function to stop the checks whose invalid rows crossed their fail fast threshold,
+        True when the whole pipeline must stop
+        """
+        for steps in list(plan.columns.values()):
+            for action, position, check in steps:
+                gate = gates.get(id(action))
+                key = (id(action), position)
+                if gate is None or key in stopped:
+                    continue
+                if gate.exceeded(action.partial(position, check).invalid_count, action.offset):
+                    stopped[key] = action.offset
+                    if gate.scope == "pipeline":
+                        return True
+                    plan.drop(action, position)
+        # nothing left to check, the rest of the data is not read
+        return not plan.columns
+
+    def run_actions(self, actions_config) -> List[List[Dict]]:
+        """
+        Run a sequence of actions defined in the validation.yml in config folder,
+        and return the reports generated by each action.
+        The actions are compiled into a per column ExecutionPlan, when the pipeline was built
+        with chunks every chunk is fed to the plan and the reports are built once the last
+        chunk is consumed. The columns of the plan run on the configured executor
+        (serial, threads or processes), the reports keep the order of the configuration.
+        Arrow Tables are validated by the arrow engine, with the pyarrow.compute kernels of the actions.
+        With a database source the actions whose checks compile to SQL run in the database and
+        the rows are only streamed for the other actions.
+        With a Metrics recorder the measures of every check are added to its report ("Metrics")
+        and the checks and actions are recorded.
+        With a Sampler the actions run on a sample of the rows and the report of every check holds
+        the estimated invalid ratio and its confidence interval. With a fail fast threshold a check
+        (or the whole pipeline) stops as soon as it found too many invalid rows, its report holds
+        the rows it checked ("Rows_checked") and if it stopped ("Stopped").
+        """
+        actions = self._build_actions(actions_config)
+        pushed: List[int] = []
+        if self.source is not None:
+            pushed = [position for position, action in enumerate(actions)
+                      if self.source.predicates(action) is not None]
+            streamed = len(pushed) < len(actions)
+            self.chunks = self.source.chunks(self.source.columns) if streamed else []
+            if streamed and self.metrics is not None:
+                self.chunks = self.metrics.measure_iter("load", self.source.name, self.chunks, streamed=True)
+
+        plan = ExecutionPlan([action for position, action in enumerate(actions) if position not in pushed],
+                             executor=self.executor, workers=self.workers, metrics=self.metrics)
+        gates = self._gates(plan.actions)
+        if self.chunks is None and (gates or self.sample is not None):
+            # checks can only stop, and rows be sampled, between chunks
+            rows = min(gate.chunk_rows for gate in gates.values()) if gates else max(len(self.df), 1)
+            self.chunks = self._slices(self.df, rows)
+        if self.sample is not None and self.chunks is not None:
+            self.chunks = self.sample.apply(self.chunks)
+        chunks = [self.df] if self.chunks is None else self.chunks
+        stratified = self.sample is not None and self.sample.method == "stratified"
+        stopped: Dict[Tuple[int, int], int] = {}
+        strata: Dict[Tuple[int, int], Dict[Hashable, Tuple[int, int]]] = {}
+        halted = False
+        with plan:
+            try:
+                for chunk in chunks:
+                    if isinstance(chunk, pa.Table):
+                        chunk = ArrowFrame(chunk)
+                    self.df = chunk
+                    before = self._invalid_counts(plan) if stratified else {}
+                    plan.consume(chunk)
+                    for key, count in (self._invalid_counts(plan).items() if stratified else ()):
+                        # invalid and checked rows of the stratum of the chunk, for the estimate
+                        strata.setdefault(key, {})[self.sample.stratum] = (count - before.get(key, 0), len(chunk))
+                    if gates and self._stop_checks(plan, gates, stopped):
+                        halted = bool(plan.columns)
+                        break
+            finally:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    # stops the reads of the loader when the pipeline stopped early
+                    close()
+
+        for position in pushed:
+            self.source.run(actions[position], metrics=self.metrics)
+
+        grouped = []
+        for position, action in enumerate(actions):
+            start = len(self.reports)
+            timer = CheckTimer() if self.metrics is not None else None
+            action.finalize()
+            grouped.append(self.reports[start:])
+            if position not in pushed:
+                for index, report in enumerate(grouped[-1]):
+                    key = (id(action), index)
+                    rows = stopped.get(key, action.offset)
+                    if gates:
+                        report.update(Rows_checked=rows, Stopped=key in stopped or halted)
+                    if self.sample is not None and report.get("Invalid_count") is not None:
+                        report.update(self.sample.estimate(report["Invalid_count"], rows, strata.get(key)))
+            if self.metrics is not None:
+                self.metrics.close_action(action, position, grouped[-1], timer.stop(), pushed=position in pushed)
+        return grouped
+
+    def run(self, actions_config):
+        """
+        Run a sequence of actions defined in the validation.yml in config folder,
+        and return all reports generated by the actions.
+        """
+        self.run_actions(actions_config)
+        return self.reports
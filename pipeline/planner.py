@@ -0,0 +1,372 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Hashable, List, Optional, Tuple
+import gc
+import os
+import pickle
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pipeline.distinct import DistinctValues, encode, evaluate, fill_missing
+from pipeline.strings import StringView, blank_mask
+from utils.metrics import CheckTimer
+
+
+class ColumnCache:
+    """
+    Cache of the data derived from the columns of a chunk (string view, null masks,
+    parsed datetimes), so checks on the same column compute them only once.
+
+    Text columns with few distinct values are factorized (or dictionary encoded with the arrow
+    engine, reusing the encoding of dictionary columns), their dates are parsed once per distinct
+    value and the checks can evaluate their predicate the same way.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._cache: Dict[Tuple, object] = {}
+
+    def _get(self, key: Tuple, build):
+        if key not in self._cache:
+            # setdefault keeps the cache consistent when threads build the same key
+            return self._cache.setdefault(key, build())
+        return self._cache[key]
+
+    def strings(self, col: str) -> pd.Series:
+        """String view of the column, as astype(str)"""
+        return self._get((col, "strings"), lambda: self.df[col].astype(str))
+
+    def distinct(self, col: str) -> Optional[DistinctValues]:
+        """Distinct values of a text column and their codes, None for other columns and high cardinality"""
+        return self._get((col, "distinct"), lambda: DistinctValues.build(self.df[col]))
+
+    def texts(self, col: str) -> Optional[StringView]:
+        """Distinct texts of the column (as astype(str)) and their codes, None for dates"""
+        return self._get((col, "texts"), lambda: StringView.build(self.df[col], self.distinct(col)))
+
+    def nulls(self, col: str) -> pd.Series:
+        """Mask of the null values of the column"""
+        return self._get((col, "nulls"), lambda: self.df[col].isnull())
+
+    def blanks(self, col: str) -> np.ndarray:
+        """Mask of the null or blank values of the column"""
+        def build():
+            values = self.df[col]
+            if values.dtype.kind in "biufcmM":
+                return self.nulls(col).to_numpy()
+            return blank_mask(values, self.texts(col))
+        return self._get((col, "blanks"), build)
+
+    def datetimes(self, col: str, format: Optional[str] = None, dayfirst: bool = False) -> pd.Series:
+        """Column parsed with pd.to_datetime, unparseable values become NaT"""
+        if format not in (None, "mixed"):
+            # dayfirst is ignored by pandas when an explicit format is given
+            dayfirst = False
+        def build():
+            values = self.df[col]
+            distinct = self.distinct(col)
+            if distinct is not None:
+                # the format pandas infers is the one of the first value, the first distinct value
+                parsed = pd.to_datetime(pd.Series(distinct.values), errors="coerce", format=format, dayfirst=dayfirst)
+                if parsed.dtype.kind == "M":
+                    return pd.Series(parsed.array.take(distinct.codes, allow_fill=True), index=values.index, name=values.name)
+            return pd.to_datetime(values, errors="coerce", format=format, dayfirst=dayfirst)
+        return self._get((col, "datetimes", format, dayfirst), build)
+
+    def arrow(self, col: str) -> pa.Array:
+        """Arrow column of an ArrowFrame as a single array"""
+        return self._get((col, "arrow"), lambda: self.df.column(col))
+
+    def arrow_dictionary(self, col: str) -> Optional[pa.DictionaryArray]:
+        """Dictionary encoding of a text Arrow column, None for other columns and high cardinality"""
+        return self._get((col, "arrow_dictionary"), lambda: encode(self.arrow(col)))
+
+    def arrow_texts(self, col: str) -> Optional[pa.DictionaryArray]:
+        """Dictionary encoded string view of a text Arrow column, None when it is not encoded"""
+        def build():
+            encoded = self.arrow_dictionary(col)
+            if encoded is None:
+                return None
+            # pandas renders missing text as None and missing categories as nan
+            return fill_missing(encoded, "nan" if pa.types.is_dictionary(self.arrow(col).type) else "None")
+        return self._get((col, "arrow_texts"), build)
+
+    def arrow_strings(self, col: str) -> pa.Array:
+        """String view of an Arrow column, as astype(str) of the column converted to pandas"""
+        def build():
+            values = self.arrow(col)
+            if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+                return pc.fill_null(values, "None")
+            return pa.array(self.strings(col).to_numpy(dtype=object), type=pa.string())
+        return self._get((col, "arrow_strings"), build)
+
+    def arrow_blanks(self, col: str) -> pa.Array:
+        """Mask of the null or blank values of an Arrow column"""
+        def build():
+            values = self.arrow(col)
+            nulls = pc.is_null(values, nan_is_null=True)
+            if pa.types.is_string(values.type) or pa.types.is_large_string(values.type):
+                return pc.or_(nulls, pc.equal(pc.utf8_trim_whitespace(self.arrow_strings(col)), ""))
+            if pa.types.is_primitive(values.type):
+                # the text of a number, a bool or a date is never blank
+                return nulls
+            return pa.array(self.blanks(col))
+        return self._get((col, "arrow_blanks"), build)
+
+    def arrow_datetimes(self, col: str, format: str) -> pa.Array:
+        """String Arrow column parsed with an explicit format, unparseable values become null"""
+        def build():
+            def parse(values: pa.Array) -> pa.Array:
+                return pc.strptime(values, format=format, unit="ns", error_is_null=True)
+            encoded = self.arrow_dictionary(col)
+            return parse(self.arrow(col)) if encoded is None else evaluate(encoded, parse)
+        return self._get((col, "arrow_datetimes", format), build)
+
+    def release(self, col: Hashable):
+        """Drop everything derived from a column"""
+        for key in [key for key in list(self._cache) if key[0] == col]:
+            self._cache.pop(key, None)
+
+
+# bytes the buffers of the columns are aligned to in shared memory
+_ALIGNMENT = 64
+
+
+def _shared_buffers(values: pd.Series) -> Tuple[str, List, Tuple]:
+    """
+    Function to return how a column is written to shared memory: its layout, its buffers and
+    what the worker needs to rebuild it. Numbers, booleans and dates are their numpy buffer and
+    categories their codes, the worker reads them as views of the shared memory. Text is the
+    buffers of an Arrow string array, the worker builds the Python strings of the pandas column
+    from them, the only copy. Other columns (objects of several types, extension dtypes) are pickled.
+    """
+    dtype = values.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufcmM":
+        array = np.ascontiguousarray(values.to_numpy())
+        return "numpy", [array.view(np.uint8)], (array.dtype.str, len(array))
+    if isinstance(dtype, pd.CategoricalDtype):
+        codes = np.ascontiguousarray(values.cat.codes.to_numpy())
+        return "category", [codes.view(np.uint8)], (dtype, codes.dtype.str, len(codes))
+    if dtype == object:
+        objects = values.to_numpy()
+        missing = objects[values.isna().to_numpy()]
+        # nulls are put back as they were, None or NaN (their text differs), only when they agree
+        fill = missing[0] if len(missing) else None
+        if all(value is fill or (isinstance(value, float) and isinstance(fill, float)) for value in missing):
+            try:
+                array = pa.array(objects, from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                array = None
+            if array is not None and (pa.types.is_string(array.type) or pa.types.is_large_string(array.type)):
+                return "text", array.buffers(), (array.type, len(array), array.null_count, fill)
+    return "pickle", [pickle.dumps(values, protocol=pickle.HIGHEST_PROTOCOL)], ()
+
+
+def _share_columns(df: pd.DataFrame, columns: List[Hashable]) -> Tuple[shared_memory.SharedMemory, List[Tuple]]:
+    """
+    Function to write the buffers of some columns of a chunk to one block of shared memory,
+    and return it with the layout of every column
+    """
+    shared, size = [], 0
+    for column in columns:
+        layout, buffers, meta = _shared_buffers(df[column])
+        spans = []
+        for buffer in buffers:
+            if buffer is None:
+                spans.append(None)
+                continue
+            length = memoryview(buffer).nbytes
+            spans.append((size, length))
+            size += -(-length // _ALIGNMENT) * _ALIGNMENT
+        shared.append((column, layout, buffers, spans, meta))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    layouts = []
+    for column, layout, buffers, spans, meta in shared:
+        for buffer, span in zip(buffers, spans):
+            if span is not None:
+                start, length = span
+                shm.buf[start:start + length] = memoryview(buffer).cast("B")
+        layouts.append((layout, spans, meta, column, df.index))
+    return shm, layouts
+
+
+def _shared_column(buffer: memoryview, layout: Tuple) -> pd.Series:
+    """
+    Function to rebuild a column in a worker from its buffers in shared memory
+    """
+    kind, spans, meta, name, index = layout
+    views = [None if span is None else buffer[span[0]:span[0] + span[1]] for span in spans]
+    if kind == "pickle":
+        return pickle.loads(views[0])
+    if kind == "numpy":
+        dtype, length = meta
+        values = np.frombuffer(views[0], dtype=dtype, count=length)
+    elif kind == "category":
+        dtype, codes, length = meta
+        values = pd.Categorical.from_codes(np.frombuffer(views[0], dtype=codes, count=length), dtype=dtype, validate=False)
+    else:
+        type, length, null_count, fill = meta
+        array = pa.Array.from_buffers(type, length, [None if view is None else pa.py_buffer(view) for view in views],
+                                      null_count=null_count)
+        values = array.to_numpy(zero_copy_only=False)
+        if null_count and fill is not None:
+            values[array.is_null().to_numpy(zero_copy_only=False)] = fill
+    return pd.Series(values, index=index, name=name, copy=False)
+
+
+def _check_column(df: pd.DataFrame, steps: List[Tuple], timed: bool) -> List[Tuple[int, np.ndarray, Optional[Dict]]]:
+    from pipeline.pipeline import Pipeline
+
+    cache = ColumnCache(df)
+    pipeline = Pipeline(df=df)
+    results = []
+    for action, position, check in steps:
+        timer = CheckTimer() if timed else None
+        action.pipeline = pipeline
+        action.begin(df, cache)
+        mask = np.asarray(action.invalid_mask(check), dtype=bool)
+        results.append((position, np.flatnonzero(mask), timer.stop() if timed else None))
+        # the chunk is a view of the shared memory, nothing may hold it once the worker returns
+        action.pipeline = action.df = action.cache = None
+    return results
+
+
+def _run_column(shm_name: str, layout: Tuple, steps: List[Tuple],
+                timed: bool = False) -> List[Tuple[int, np.ndarray, Optional[Dict]]]:
+    """
+    Worker of the process executor: rebuild one column from shared memory and return
+    the positions of the invalid rows of every check on it, and its measures when timed
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return _check_column(_shared_column(shm.buf, layout).to_frame(), steps, timed)
+    finally:
+        try:
+            shm.close()
+        except BufferError:
+            # a view of the buffer left in a reference cycle
+            gc.collect()
+            shm.close()
+
+
+class ExecutionPlan:
+    """
+    Per column plan of the checks of a list of actions.
+
+    The checks are grouped by the column they read, so every column is visited once per chunk
+    and the data derived from it is shared through a ColumnCache and released afterwards.
+    Checks only produce boolean masks, the reports are still built by the actions in the
+    order of the configuration.
+
+    Columns are independent units of work, they run one after the other (serial), on a pool
+    of threads (threads) or on a pool of processes (processes). The process executor writes
+    the buffers of each column of the chunk once to shared memory, the workers read numbers,
+    booleans, dates and categories as views of it and only build the Python strings of text
+    columns (see `_shared_buffers`). They send back the positions of the invalid rows, the
+    details are always built in the main process.
+
+    With a Metrics recorder the time, CPU time and memory growth of every check over every chunk
+    are accumulated, checks running in another process are measured by the worker.
+    """
+
+    EXECUTORS = ("serial", "threads", "processes")
+
+    def __init__(self, actions: List, executor: str = "serial", workers: Optional[int] = None,
+                 metrics=None):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"Unsupported executor: {executor}")
+        self.actions = actions
+        self.executor = executor
+        self.workers = workers or os.cpu_count()
+        self.metrics = metrics
+        self.columns: Dict[Hashable, List[Tuple]] = {}
+        for action in actions:
+            for position, check in enumerate(action.checks()):
+                column = check.get("column")
+                # checks on several columns (composite keys) are grouped by the tuple of their columns
+                key = tuple(column) if isinstance(column, list) else column
+                self.columns.setdefault(key, []).append((action, position, check))
+        self._pool = None
+
+    def __enter__(self):
+        if self.executor == "threads":
+            self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        elif self.executor == "processes":
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        return self
+
+    def __exit__(self, *exc):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def drop(self, action, position: int):
+        """
+        Function to stop running one check of an action over the next chunks
+        """
+        for column, steps in list(self.columns.items()):
+            steps = [step for step in steps if step[0] is not action or step[1] != position]
+            if steps:
+                self.columns[column] = steps
+            else:
+                del self.columns[column]
+
+    def _run_steps(self, column: Hashable, steps: List[Tuple], cache: ColumnCache):
+        for action, position, check in steps:
+            if self.metrics is None:
+                action.consume_check(position, check)
+                continue
+            timer = CheckTimer()
+            action.consume_check(position, check)
+            self.metrics.add_check(action, position, timer.stop(), len(cache.df))
+        cache.release(column)
+
+    def _consume_processes(self, df: pd.DataFrame, cache: ColumnCache):
+        """
+        Function to run the column groups that can leave the main process on the process pool
+        """
+        local, remote = [], []
+        for column, steps in self.columns.items():
+            movable = column in df.columns and all(action.parallel_safe() for action, _, _ in steps)
+            (remote if movable else local).append((column, steps))
+
+        shm, layouts = _share_columns(df, [column for column, _ in remote])
+        try:
+            futures = [self._pool.submit(_run_column, shm.name, layout, steps, self.metrics is not None)
+                       for (column, steps), layout in zip(remote, layouts)]
+
+            for column, steps in local:
+                self._run_steps(column, steps, cache)
+
+            for (column, steps), future in zip(remote, futures):
+                for (action, position, check), (_, rows, measures) in zip(steps, future.result()):
+                    action.partial(position, check).add(df, rows, action.offset)
+                    if measures is not None:
+                        self.metrics.add_check(action, position, measures, len(df))
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def consume(self, df: pd.DataFrame):
+        """
+        Function to run every check of the plan over one chunk of data
+        """
+        cache = ColumnCache(df)
+        for action in self.actions:
+            action.begin(df, cache)
+
+        if self.executor == "processes" and self._pool is not None:
+            self._consume_processes(df, cache)
+        elif self.executor == "threads" and self._pool is not None:
+            futures = [self._pool.submit(self._run_steps, column, steps, cache)
+                       for column, steps in self.columns.items()]
+            for future in futures:
+                future.result()
+        else:
+            for column, steps in self.columns.items():
+                self._run_steps(column, steps, cache)
+
+        for action in self.actions:
+            action.end()
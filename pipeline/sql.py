@@ -0,0 +1,166 @@
+from logging import Logger
+from typing import Iterator, List, Optional
+import pandas as pd
+from sqlalchemy import CHAR, NCHAR, Integer, Numeric, String, case, func, literal_column, select
+from sqlalchemy.sql import visitors
+from sqlalchemy.sql.elements import Over
+from sqlalchemy.types import NullType
+from utils.metrics import CheckTimer
+
+POSITION_COLUMN = "_dq_position"
+INVALID_COLUMN = "_dq_invalid"
+
+# collation comparing text byte by byte, as pandas does, for the dialects that have one. SQL Server
+# ignores trailing spaces whatever the collation, MySQL collations pad them, their text is checked by pandas
+BINARY_COLLATIONS = {"sqlite": "BINARY", "postgresql": "C"}
+
+
+def sql_family(column) -> Optional[str]:
+    """
+    Function to return the kind of values of a SQL column ("string", "number" or the name of
+    its type), None when the type is unknown, e.g. a column of a query
+    """
+    if isinstance(column.type, NullType):
+        return None
+    if isinstance(column.type, String):
+        return "string"
+    if isinstance(column.type, (Integer, Numeric)):
+        return "number"
+    return type(column.type).__name__.lower()
+
+
+class SqlColumns:
+    """
+    Columns of a table or query the predicates of the checks are built on, with the dialect of the
+    database. `columns[name]` is the column as is, `columns.text(name)` the column compared as pandas
+    compares text, whatever the collation of the column (case insensitive by default on SQL Server
+    and MySQL, "a" = "A" there).
+    """
+
+    def __init__(self, columns, dialect: str):
+        self._columns = columns
+        self.dialect = dialect
+
+    def __getitem__(self, name: str):
+        return self._columns[name]
+
+    def text(self, name: str):
+        """
+        Function to return a column whose comparisons and groups are exact on text (case, accents and
+        trailing spaces matter), None when the database can not compare it so and the check must run in pandas
+        """
+        column = self._columns[name]
+        family = sql_family(column)
+        if family not in (None, "string"):
+            # numbers, dates... are compared by value
+            return column
+        collation = BINARY_COLLATIONS.get(self.dialect)
+        if collation is None:
+            return None
+        if self.dialect != "sqlite" and (family is None or isinstance(column.type, (CHAR, NCHAR))):
+            # fixed length text ignores trailing spaces, and a column of unknown type can not be collated
+            return None
+        return column.collate(collation)
+
+
+class SqlSource:
+    """
+    Table or query of a database validated in place.
+
+    Actions whose checks all compile to SQL predicates (`sql_predicate`) run in the database:
+    an aggregate counts the invalid rows and only the invalid rows kept by the details are read.
+    The other actions are fed with the rows streamed in chunks. Rows are numbered in the order
+    of `order_by`, or of the primary key of the table, which gives the positions of the details.
+    Without either the rows are numbered in the order the database returns them, which can change
+    between runs, and a warning is logged.
+    """
+
+    def __init__(self, connector, source: str, chunksize: Optional[int] = None,
+                 order_by: Optional[List[str]] = None, columns: Optional[List[str]] = None,
+                 logs: Optional[Logger] = None):
+        self.connector = connector
+        self.name = source
+        self.relation = connector.get_relation(source)
+        self.dialect = connector.dialect
+        self.chunksize = chunksize
+        if order_by:
+            self.order_by = [self.relation.c[col] for col in order_by]
+        else:
+            self.order_by = list(self.relation.primary_key)
+            if not self.order_by and logs is not None:
+                logs.warning(f"{source} has no order_by nor primary key, the positions of the details "
+                             f"are the order the database returns the rows in and may change between runs")
+        # columns kept in the details, None for every column
+        self.columns = columns
+
+    def _columns(self, columns: Optional[List[str]]) -> List:
+        if columns is None:
+            return list(self.relation.c)
+        # missing columns are reported by the checks, the others keep the order of the table as in a file
+        wanted = set(columns)
+        return [col for col in self.relation.c if col.name in wanted]
+
+    def predicates(self, action, columns=None) -> Optional[List]:
+        """
+        Function to return the SQL predicate of every check of an action, None when one of
+        them can not run in the database
+
+        :params action: Action to compile
+        :params columns: Columns the predicates are built on, by default the columns of the source
+        """
+        columns = SqlColumns(self.relation.c if columns is None else columns, self.dialect)
+        predicates = []
+        for check in action.checks():
+            try:
+                predicate = action.sql_predicate(check, columns)
+            except KeyError:
+                return None
+            if predicate is None:
+                return None
+            predicates.append(predicate)
+        return predicates
+
+    def chunks(self, columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Function to stream the given columns of the source in chunks
+        """
+        query = select(*self._columns(columns)).order_by(*self.order_by)
+        return self.connector.read_chunks(query, self.chunksize)
+
+    def _count(self, predicate) -> int:
+        if any(isinstance(element, Over) for element in visitors.iterate(predicate)):
+            # window functions (e.g. counts per key) are not allowed in WHERE
+            flags = select(case((predicate, 1), else_=0).label(INVALID_COLUMN)).select_from(self.relation).subquery()
+            query = select(func.coalesce(func.sum(flags.c[INVALID_COLUMN]), 0))
+        else:
+            query = select(func.count()).select_from(self.relation).where(predicate)
+        return int(self.connector.read_scalar(query))
+
+    def run(self, action, metrics=None):
+        """
+        Function to run the checks of an action in the database and accumulate their partial results,
+        the queries of every check are measured when a Metrics recorder is given
+        """
+        order = self.order_by or [literal_column("(SELECT NULL)")]
+        # rows are numbered before any check, the windows of a check (counts per key) reorder them
+        numbered = select(*self.relation.c, (func.row_number().over(order_by=order) - 1).label(POSITION_COLUMN)) \
+            .subquery("numbered")
+        checks = zip(action.checks(), self.predicates(action), self.predicates(action, numbered.c))
+        for index, (check, predicate, numbered_predicate) in enumerate(checks):
+            timer = CheckTimer() if metrics is not None else None
+            partial = action.partial(index, check)
+            count = self._count(predicate)
+            if count:
+                kept = [numbered.c[col.name] for col in self._columns(self.columns)] if partial.keeps_rows else []
+                flagged = select(*kept, numbered.c[POSITION_COLUMN],
+                                 case((numbered_predicate, 1), else_=0).label(INVALID_COLUMN)).subquery("flagged")
+                query = select(*[flagged.c[col.name] for col in kept], flagged.c[POSITION_COLUMN]) \
+                    .where(flagged.c[INVALID_COLUMN] == 1).order_by(flagged.c[POSITION_COLUMN])
+                if partial.rows_needed is not None:
+                    query = query.limit(partial.rows_needed)
+                for frame in self.connector.read_chunks(query, self.chunksize):
+                    partial.add_frame(frame.drop(columns=POSITION_COLUMN), frame[POSITION_COLUMN].to_numpy())
+            partial.invalid_count = count
+            if metrics is not None:
+                # the rows are scanned by the database
+                metrics.add_check(action, index, timer.stop())
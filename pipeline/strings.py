@@ -0,0 +1,103 @@
+import re
+from functools import lru_cache
+from typing import Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from pipeline.arrow import to_mask
+from pipeline.distinct import DistinctValues
+
+REGEX_ENGINES = ("re", "re2")
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str) -> re.Pattern:
+    """
+    Function to compile a pattern once for every check and chunk using it
+    """
+    return re.compile(pattern)
+
+
+class StringView:
+    """
+    Text of a column as astype(str) renders it, held as the distinct texts and the code of every
+    row, so string kernels run once per distinct value instead of once per row.
+    """
+
+    def __init__(self, codes: np.ndarray, texts: np.ndarray):
+        self.codes = codes
+        self.texts = texts
+
+    @classmethod
+    def build(cls, values: pd.Series, distinct: Optional[DistinctValues] = None) -> Optional["StringView"]:
+        """
+        Function to build the view of a column, None for the dtypes whose text is not str() of
+        their values (dates, timedeltas), those are rendered with astype(str).
+        The distinct values of a text column are reused when given.
+        """
+        if values.dtype.kind in "mM":
+            return None
+        if distinct is not None:
+            codes, uniques = distinct.codes.copy(), distinct.values
+        elif values.dtype == object and pd.api.types.infer_dtype(values, skipna=True) not in ("string", "empty"):
+            # values of different text can be equal (1, 1.0 and True), they are told apart by their text
+            values = values.astype(str)
+        elif values.dtype.kind == "f" and (np.signbit(values.to_numpy()) & (values.to_numpy() == 0)).any():
+            # -0.0 is equal to 0.0
+            values = values.astype(str)
+        if distinct is None:
+            codes, uniques = pd.factorize(values)
+        texts = [str(value) for value in uniques]
+        missing = codes < 0
+        if missing.any():
+            # every kind of missing value has its own text ("nan", "None", "<NA>")
+            na_codes, na_texts = pd.factorize(values[missing].astype(str))
+            codes[missing] = len(texts) + na_codes
+            texts.extend(na_texts)
+        return cls(codes, np.array(texts, dtype=object))
+
+    def expand(self, per_text: np.ndarray) -> np.ndarray:
+        """
+        Function to expand a result computed per distinct text to every row
+        """
+        return per_text[self.codes]
+
+
+def match_mask(view: StringView, pattern: str, engine: str = "re") -> np.ndarray:
+    """
+    Function to return the mask of the rows whose text matches a pattern at its start, as str.match
+
+    :params view: Text of the column
+    :params pattern: Regular expression
+    :params engine: re (Python semantics) or re2 (the RE2 engine of pyarrow, linear time, no
+                    lookarounds or backreferences), patterns RE2 does not support run with re
+    """
+    if engine not in REGEX_ENGINES:
+        raise ValueError(f"Unsupported regex engine: {engine}")
+    if engine == "re2":
+        try:
+            texts = pa.array(view.texts, type=pa.string())
+            # str.match is anchored at the start of the value, RE2 searches anywhere
+            return view.expand(to_mask(pc.match_substring_regex(texts, pattern=f"^(?:{pattern})")))
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError):
+            pass
+    match = compile_pattern(pattern).match
+    matched = np.fromiter((match(text) is not None for text in view.texts), dtype=bool, count=len(view.texts))
+    return view.expand(matched)
+
+
+def blank_mask(values: pd.Series, view: Optional[StringView] = None) -> np.ndarray:
+    """
+    Function to return the mask of the null or blank (empty or only whitespace) values of a column,
+    the text of numbers, booleans and dates is never blank so it is not built
+
+    :params values: Column
+    :params view: Text of the column, built when not given
+    """
+    nulls = values.isna().to_numpy()
+    if values.dtype.kind in "biufcmM":
+        return nulls
+    view = view if view is not None else StringView.build(values)
+    blank = np.fromiter((not text.strip() for text in view.texts), dtype=bool, count=len(view.texts))
+    return nulls | view.expand(blank)
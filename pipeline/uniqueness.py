@@ -0,0 +1,229 @@
+import math
+import os
+import pickle
+import shutil
+import tempfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from pandas.util import hash_array
+
+# multiplier of the FNV hash, used to combine the hashes of the columns of a key
+_COMBINE = np.uint64(0x100000001B3)
+
+
+def _column_hashes(values: pd.Series) -> np.ndarray:
+    """
+    Function to hash the values of a column so that values pandas sees as equal get the
+    same hash whatever the dtype of the chunk: numbers are hashed by value (an int and an
+    integral float are the same number) and text by its text only ("01234" is not 1234)
+    """
+    kind = values.dtype.kind
+    if kind in "biu":
+        return hash_array(values.to_numpy().astype(np.int64))
+    if kind in "mM":
+        return hash_array(values.to_numpy())
+
+    if kind == "f":
+        numbers = values.to_numpy()
+        hashes = np.empty(len(values), dtype=np.uint64)
+    else:
+        objects = values.to_numpy(dtype=object)
+        hashes = hash_array(values.astype(str).to_numpy(dtype=object))
+        # the numbers held by a column of objects (JSON, Excel) are numbers, not their text
+        number = np.frompyfunc(lambda value: isinstance(value, (int, float, np.number)), 1, 1)(objects).astype(bool)
+        numbers = np.full(len(values), np.nan)
+        numbers[number] = objects[number].astype(float)
+
+    numeric = ~np.isnan(numbers)
+    integral = numeric & np.isfinite(numbers) & (numbers == np.floor(numbers)) & (np.abs(numbers) < 2.0 ** 63)
+    hashes[numeric & ~integral] = hash_array(numbers[numeric & ~integral])
+    hashes[integral] = hash_array(numbers[integral].astype(np.int64))
+    # missing values share a hash, they can only be equal to each other
+    hashes[pd.isna(values).to_numpy()] = hash_array(np.array([np.nan]))[0]
+    return hashes
+
+
+def key_hashes(keys: pd.DataFrame) -> np.ndarray:
+    """
+    Function to return a 64 bit hash of every row of the key columns
+    """
+    columns = [_column_hashes(keys[col]) for col in keys.columns]
+    if len(columns) == 1:
+        return columns[0]
+    combined = np.zeros(len(keys), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for hashes in columns:
+            combined = (combined * _COMBINE) ^ hashes
+    return hash_array(combined)
+
+
+class HashPartitions:
+    """
+    Rows of a check spilled to disk in partitions chosen by the hash of their key, so equal keys
+    always land in the same partition and every partition is checked on its own with bounded memory.
+    """
+
+    def __init__(self, columns: List[str], partitions: int = 64, path: Optional[str] = None):
+        self.columns = columns
+        self.partitions = int(partitions)
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self.folder = tempfile.mkdtemp(prefix="unique_", dir=path)
+        self._files: Dict[int, BinaryIO] = {}
+
+    def _file(self, partition: int) -> BinaryIO:
+        if partition not in self._files:
+            self._files[partition] = open(os.path.join(self.folder, f"{partition}.pkl"), "ab")
+        return self._files[partition]
+
+    def add(self, frame: pd.DataFrame, positions: np.ndarray):
+        """
+        Function to append the rows of a chunk to their partitions
+
+        :params frame: Rows of the chunk, with at least the key columns
+        :params positions: Position of each row in the whole dataset
+        """
+        frame = frame.reset_index(drop=True)
+        partition = key_hashes(frame[self.columns]) % np.uint64(self.partitions)
+        order = np.argsort(partition, kind="stable")
+        bounds = np.searchsorted(partition[order], np.arange(self.partitions + 1))
+        for i in range(self.partitions):
+            rows = order[bounds[i]:bounds[i + 1]]
+            if len(rows):
+                pickle.dump((frame.take(rows), positions[rows]), self._file(i), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def _load(self, partition: int) -> Tuple[pd.DataFrame, np.ndarray]:
+        frames: List[pd.DataFrame] = []
+        positions: List[np.ndarray] = []
+        with open(os.path.join(self.folder, f"{partition}.pkl"), "rb") as f:
+            while True:
+                try:
+                    frame, rows = pickle.load(f)
+                except EOFError:
+                    break
+                frames.append(frame)
+                positions.append(rows)
+        return pd.concat(frames, ignore_index=True), np.concatenate(positions)
+
+    def duplicates(self) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+        """
+        Function to yield, partition by partition, the rows whose key is found more than once
+        and their positions, the spilled files are removed afterwards
+        """
+        for handle in self._files.values():
+            handle.close()
+        try:
+            for partition in sorted(self._files):
+                frame, positions = self._load(partition)
+                mask = frame.duplicated(subset=self.columns, keep=False).to_numpy()
+                if mask.any():
+                    rows = np.flatnonzero(mask)
+                    yield frame.take(rows), positions[rows]
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Function to remove the spilled files
+        """
+        for handle in self._files.values():
+            handle.close()
+        self._files = {}
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+
+class RowStore:
+    """
+    Rows of a check spilled to a temporary file chunk by chunk and read back by their position,
+    so the rows of the keys seen once are kept on disk until one of them is repeated.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        if path:
+            os.makedirs(path, exist_ok=True)
+        self._file = tempfile.TemporaryFile(prefix="unique_", dir=path)
+
+    def add(self, frame: pd.DataFrame, positions: np.ndarray):
+        """
+        Function to append the rows of a chunk
+
+        :params frame: Rows of the chunk
+        :params positions: Position of each row in the whole dataset
+        """
+        pickle.dump((frame.reset_index(drop=True), np.asarray(positions)), self._file,
+                    protocol=pickle.HIGHEST_PROTOCOL)
+
+    def take(self, positions: np.ndarray) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+        """
+        Function to read back, chunk by chunk, the rows at the given positions and their positions,
+        the rows keep the dtypes of their chunk
+        """
+        wanted = np.asarray(positions)
+        self._file.seek(0)
+        while True:
+            try:
+                frame, rows = pickle.load(self._file)
+            except EOFError:
+                break
+            mask = np.isin(rows, wanted)
+            if mask.any():
+                yield frame[mask], rows[mask]
+
+    def close(self):
+        """
+        Function to remove the spilled file
+        """
+        self._file.close()
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch of the distinct keys of a check, with 2**precision registers
+    (16384 registers and about 0.8% of standard error by default).
+    """
+
+    def __init__(self, precision: int = 14):
+        if not 4 <= precision <= 18:
+            raise ValueError(f"Unsupported precision: {precision}")
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+        self.count: int = 0
+
+    @staticmethod
+    def _bit_length(values: np.ndarray) -> np.ndarray:
+        values = values.copy()
+        length = np.zeros(len(values), dtype=np.uint8)
+        for shift in (32, 16, 8, 4, 2, 1):
+            high = values >= (np.uint64(1) << np.uint64(shift))
+            length[high] += shift
+            values[high] >>= np.uint64(shift)
+        return length + (values > 0)
+
+    def add(self, hashes: np.ndarray):
+        """
+        Function to add the hashes of a chunk of keys
+        """
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << bits) - 1)
+        rank = (bits + 1 - self._bit_length(rest)).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+        self.count += len(hashes)
+
+    def distinct(self) -> float:
+        """
+        Function to estimate the number of distinct keys
+        """
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            # linear counting is more accurate for small cardinalities
+            estimate = m * math.log(m / zeros)
+        return min(float(estimate), float(self.count))
+
+    def relative_error(self) -> float:
+        """Standard error of the estimate, relative to the number of distinct keys"""
+        return 1.04 / math.sqrt(len(self.registers))
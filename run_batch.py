@@ -0,0 +1,16 @@
+from batch_runner import BatchRunner
+from logs.logs import LoggerFactory
+import argparse
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Run many configs, loading each dataset once")
+    parser.add_argument("-p", "--configs", type=str, nargs="+", required=True, help="Config files or folders of config files")
+    parser.add_argument("--memory-limit", type=int, default=2048, help="Memory of the loaded datasets kept for the configs, in MiB")
+    parser.add_argument("--no-cache", action="store_true", help="Validate every file again, ignoring the result cache")
+    args = parser.parse_args()
+
+    logs = LoggerFactory.get_logger()
+    runner = BatchRunner(configs=args.configs, logs=logs, memory_limit=args.memory_limit * 1024 ** 2,
+                         use_cache=not args.no_cache)
+    runner.run()
@@ -0,0 +1,61 @@
+from benchmarks.generator import DatasetGenerator, FORMATS, write_dataset
+from benchmarks.harness import BenchmarkRunner, compare
+from logs.logs import LoggerFactory
+from pathlib import Path
+import tempfile
+import argparse
+import json
+import sys
+import yaml
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Benchmark the loaders and actions of a validation config on synthetic data")
+    parser.add_argument("-p", "--path", type=str, required=True, help="Path to config file")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows of the generated dataset")
+    parser.add_argument("--width", type=int, default=None, help="Columns of the dataset, filler columns are added")
+    parser.add_argument("--null-ratio", type=float, default=0.05, help="Ratio of null values in every column")
+    parser.add_argument("--invalid-ratio", type=float, default=0.01, help="Ratio of values the checks reject")
+    parser.add_argument("--cardinality", type=int, default=1000, help="Distinct values of the text columns")
+    parser.add_argument("--formats", nargs="+", default=["csv", "parquet"], choices=FORMATS, help="Formats of the files")
+    parser.add_argument("--engines", nargs="+", default=["pandas", "arrow"], choices=["pandas", "arrow"], help="Engines of the actions")
+    parser.add_argument("--chunksize", type=int, default=None, help="Rows per chunk of the streamed loaders")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs of every stage, the best time is kept")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generator")
+    parser.add_argument("--output", type=str, default="results/benchmark.json", help="File of the results")
+    parser.add_argument("--baseline", type=str, default=None, help="Results to compare with, exits with 1 on a regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression")
+    args = parser.parse_args()
+
+    logs = LoggerFactory.get_logger("benchmark")
+    with open(args.path, "r") as f:
+        actions = yaml.safe_load(f).get("actions")
+
+    settings = {key: value for key, value in vars(args).items() if key not in ("output", "baseline")}
+    generator = DatasetGenerator(actions, rows=args.rows, width=args.width, null_ratio=args.null_ratio,
+                                 invalid_ratio=args.invalid_ratio, cardinality=args.cardinality, seed=args.seed)
+    runner = BenchmarkRunner(actions, repeat=args.repeat, chunksize=args.chunksize,
+                             engines=tuple(args.engines), logs=logs)
+
+    with tempfile.TemporaryDirectory(prefix="dq_benchmark_") as folder:
+        logs.info(f"Generating {args.rows} rows in {', '.join(args.formats)}")
+        paths = write_dataset(generator.generate(), folder, args.formats)
+        runner.run_loaders(paths, args.rows)
+        for fmt, path in paths.items():
+            runner.run_actions(path, fmt)
+
+    document = runner.document(settings)
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(document, f, ensure_ascii=True, indent=2)
+    logs.info(f"Results saved in : {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions = compare(document, json.load(f), args.tolerance)
+        for regression in regressions:
+            logs.warning(f"Regression of {regression['metric']} in {regression['stage']} {regression['name']} "
+                         f"({regression['format']}, {regression['engine']}): {regression['baseline']} -> {regression['current']}")
+        if regressions:
+            sys.exit(1)
+        logs.info(f"No regression against {args.baseline}")
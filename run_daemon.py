@@ -0,0 +1,16 @@
+from validation_daemon import ValidationDaemon
+from logs.logs import LoggerFactory
+import argparse
+
+if __name__ == '__main__':
+
+    parser = argparse.ArgumentParser(description="Daemon validating the configs of a folder as their files arrive")
+    parser.add_argument("-d", "--configs", type=str, required=True, help="Folder of the config files")
+    parser.add_argument("--workers", type=int, default=4, help="Validations running at the same time")
+    parser.add_argument("--once", action="store_true", help="Poll every config once, validate and exit")
+    parser.add_argument("--no-cache", action="store_true", help="Validate every file again, ignoring the result cache")
+    args = parser.parse_args()
+
+    logs = LoggerFactory.get_logger()
+    daemon = ValidationDaemon(folder=args.configs, logs=logs, workers=args.workers, use_cache=not args.no_cache)
+    daemon.serve(once=args.once)
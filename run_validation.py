@@ -8,9 +8,10 @@ if __name__ == '__main__':
 
     parser = argparse.ArgumentParser(description="Parser to add schema path")
     parser.add_argument("-p", "--path", type=str, required=True, help="Path to config file")
+    parser.add_argument("--no-cache", action="store_true", help="Validate every file again, ignoring the result cache")
     args = parser.parse_args()
 
     logger = LoggerFactory()
     logs = logger.get_logger()
-    Val_checks = ValidationProcessor(schema_path=args.path, logs=logs)
+    Val_checks = ValidationProcessor(schema_path=args.path, logs=logs, use_cache=not args.no_cache)
     results = Val_checks.run()
\ No newline at end of file
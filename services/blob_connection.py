@@ -2,9 +2,12 @@ from datetime import datetime
 from azure.storage.blob import BlobServiceClient,generate_blob_sas, BlobSasPermissions
 from dateutil.relativedelta import relativedelta
 from dotenv import load_dotenv
+import io
 import os
-from typing import List
+from typing import List, Union
 from environments.environments import Environments
+from logs.logs import LoggerFactory
+from utils.streams import DEFAULT_PART_SIZE, RangedReader, download_parts
 
 load_dotenv()
 
@@ -13,6 +16,7 @@ class BlobConnection:
     __connection__ = "Blob_Connection"
 
     def __init__(self):
+        self.logs = LoggerFactory.get_logger()
         self.container:str = Environments.get_blob_container()
         self.client:object = self._build_client()
 
@@ -23,6 +27,10 @@ class BlobConnection:
         self.user:str = Environments.get_blob_user()
         self.sercret:str = Environments.get_blob_secret()
 
+        connection_string:str = Environments.get_blob_connection_string()
+        if connection_string:
+            return BlobServiceClient.from_connection_string(connection_string)
+
         url = f"https://{self.user}.blob.core.windows.net"
         return BlobServiceClient(account_url = url, credential= self.sercret)
     
@@ -37,7 +45,7 @@ class BlobConnection:
         :params file_path: Local path of the file to upload to blob
         """
         container:str = container if container else self.container
-        blob:object = self.client.get_blob_clent(container= container, blob=blob_name)
+        blob:object = self.client.get_blob_client(container= container, blob=blob_name)
 
         with open(file_path, "rb") as f:
             blob.upload_blob(f, overwrite= True, max_concurrency=4)
@@ -57,25 +65,67 @@ class BlobConnection:
             blob_data = blob.download_blob()
             f.write(blob_data.readall())
 
-    def read_file(self, filepath:str):
+    def _fetch(self, blob:object):
+        """
+        Function to build the function reading a byte range [start, end) of a blob
+        """
+        def fetch(start:int, end:int)->bytes:
+            return blob.download_blob(offset=start, length=end - start).readall()
+        return fetch
+
+    def get_size(self, filepath:str)->int:
+        """
+        Function to return the size of a blob in bytes
+        :params filepath: Path inside container of the file
+        """
+        return self.client.get_blob_client(container=self.container, blob=filepath).get_blob_properties().size
+
+    def get_identity(self, filepath:str)->str:
+        """
+        Function to return the identity of the current version of a blob, from its ETag and size
+        :params filepath: Path inside container of the file
+        """
+        properties = self.client.get_blob_client(container=self.container, blob=filepath).get_blob_properties()
+        return f"blob://{self.container}/{filepath}:{properties.etag}:{properties.size}"
+
+    def read_file(self, filepath:str, part_size:int=None, concurrency:int=None)->Union[bytes, bytearray]:
 
         """
-        Function to download file to memory from blob to local machine
-        :params filepath: Local path to download the file 
+        Function to download file to memory from blob to local machine.
+        Blobs larger than one part are downloaded with concurrent range requests
+        into a single preallocated buffer
+        :params filepath: Path inside container of the file
+        :params part_size: Size in bytes of every range request
+        :params concurrency: Number of range requests in flight
         """
 
         try:
-            data: object = self.client.get_blob_client(
-                    container=self.container,
-                    blob=filepath
-                ).download_blob().readall()
-            
+            blob:object = self.client.get_blob_client(container=self.container, blob=filepath)
+            size:int = blob.get_blob_properties().size
+            if size <= (part_size or DEFAULT_PART_SIZE):
+                data = blob.download_blob().readall()
+            else:
+                data = download_parts(size, self._fetch(blob), part_size, concurrency)
+
             self.logs.info(f"File {filepath} downloaded successfully.")
         except Exception as e:
             self.logs.exception(f"Error loading file: {filepath}")
             raise e
         
         return data
+
+    def open_stream(self, filepath:str, part_size:int=None, concurrency:int=None)->io.BufferedReader:
+        """
+        Function to open a seekable file-like stream over a blob, the next parts are
+        downloaded in parallel while the current one is consumed
+        :params filepath: Path inside container of the file
+        :params part_size: Size in bytes of every range request
+        :params concurrency: Number of range requests in flight
+        """
+        blob:object = self.client.get_blob_client(container=self.container, blob=filepath)
+        size:int = blob.get_blob_properties().size
+        reader = RangedReader(size, self._fetch(blob), part_size, concurrency)
+        return io.BufferedReader(reader, buffer_size=1024 * 1024)
     
     def get_public_link(self, blob_name:str, container:str=None)->str:
 
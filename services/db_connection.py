@@ -1,10 +1,12 @@
-from sqlalchemy import create_engine
+from sqlalchemy import MetaData, Table, column, create_engine, select
 from sqlalchemy.orm import sessionmaker, Session
 from sqlalchemy.pool import StaticPool
 from urllib.parse import quote_plus
 from contextlib import contextmanager
 from sqlalchemy.sql import text
-from typing import Dict
+from sqlalchemy.sql.expression import Executable, FromClause
+from typing import Dict, Iterator, Optional
+import re
 import pandas as pd
 from environments.environments import Environments
 
@@ -15,8 +17,8 @@ class Config:
     Configuration class responsible for building the database connection string.
     """
 
-    def __init__(self, engine:str="postgres", active_directory:bool=False):
-        self.engine = engine
+    def __init__(self, engine:Optional[str]=None, active_directory:bool=False):
+        self.engine = engine or Environments.get_db_engine()
         self.active_directory = active_directory
 
     def get_connection_string(self)->str:
@@ -27,7 +29,7 @@ class Config:
         username = db_configs.get("username")
         password = db_configs.get("password")
         db_host = db_configs.get("host")
-        db_name = db_configs.get("database")
+        db_name = db_configs.get("db_name")
         port = db_configs.get("port")
 
         if self.engine=="postgres":
@@ -56,7 +58,12 @@ class DbConnection(Config):
     Database class that handles database engine creation, sessions, and basic query utilities.
     """
 
-    def __init__(self, engine = "postgres", active_directory = False):
+    __connection__ = "Db_Connection"
+
+    DEFAULT_CHUNKSIZE: int = 100_000
+    _QUERY = re.compile(r"^\s*(select|with)\s", re.IGNORECASE)
+
+    def __init__(self, engine = None, active_directory = False):
         super().__init__(engine, active_directory)
         self._connnection_string = self.get_connection_string()
         self._db = create_engine(self._connnection_string, pool_pre_ping=True, poolclass=StaticPool)
@@ -82,9 +89,7 @@ class DbConnection(Config):
         Retrieves all records from a given SQLAlchemy model and returns them as a Pandas DataFrame.
         """
         with self.session_scope() as session:
-            results = session.query(model).all()
-            data = [{c.name: getattr(row, c.name) for c in model.__table__.columns} for row in results]
-            return pd.DataFrame(data)
+            return pd.read_sql(select(model.__table__), session.connection())
         
     def filter_model_by_field(self, model: object, field_name: str, value) -> pd.DataFrame:
         """
@@ -95,6 +100,44 @@ class DbConnection(Config):
             if field is None:
                 raise AttributeError(f"Model {model.__name__} has no field {field_name}")
 
-            results = session.query(model).filter(field == value).all()
-            data = [{c.name: getattr(row, c.name) for c in model.__table__.columns} for row in results]
-            return pd.DataFrame(data)
\ No newline at end of file
+            return pd.read_sql(select(model.__table__).where(field == value), session.connection())
+
+    @property
+    def dialect(self) -> str:
+        """
+        Name of the SQL dialect of the database (postgresql, mssql, sqlite)
+        """
+        return self._db.dialect.name
+
+    def get_relation(self, source:str) -> FromClause:
+        """
+        Function to return a table, or a query, as a relation the checks can be compiled against
+        :params source: Name of a table ("schema.table" or "table") or a SELECT query
+        """
+        if self._QUERY.match(source):
+            query = source.strip().rstrip(";")
+            with self._db.connect() as connection:
+                # the columns of the query, without running it
+                names = connection.execute(text(f"SELECT * FROM ({query}) AS source_query WHERE 1 = 0")).keys()
+            return text(query).columns(*[column(name) for name in names]).subquery("source_query")
+        schema, _, name = source.rpartition(".")
+        return Table(name, MetaData(), schema=schema or None, autoload_with=self._db)
+
+    def read_scalar(self, query:Executable):
+        """
+        Function to run a query returning a single value, e.g. an aggregate computed by the database
+        :params query: SQLAlchemy query
+        """
+        with self._db.connect() as connection:
+            return connection.execute(query).scalar()
+
+    def read_chunks(self, query:Executable, chunksize:Optional[int]=None) -> Iterator[pd.DataFrame]:
+        """
+        Function to stream the rows of a query as DataFrames of `chunksize` rows, with a
+        server-side cursor where the driver has one, so the result is never held in memory
+        :params query: SQLAlchemy query
+        :params chunksize: Number of rows of every DataFrame
+        """
+        with self._db.connect() as connection:
+            connection = connection.execution_options(stream_results=True)
+            yield from pd.read_sql(query, connection, chunksize=chunksize or self.DEFAULT_CHUNKSIZE)
@@ -1,2 +1,30 @@
+import os
+from typing import List
+
+
 class LocalConnection:
-    pass
\ No newline at end of file
+
+    __connection__ = "Local_Connection"
+
+    def get_list_files(self, folder:str="")->List[str]:
+        """
+        Function to return all the files whose path starts with folder, like an object storage prefix
+        :params folder: Folder (ending with "/") or prefix of the paths to list
+        """
+        root = folder if folder.endswith("/") else os.path.dirname(folder)
+        files = [
+            os.path.join(dirpath, name)
+            for dirpath, _, names in os.walk(root or ".")
+            for name in names
+        ]
+        if not root:
+            files = [os.path.relpath(f) for f in files]
+        return [f for f in files if f.startswith(folder)]
+
+    def get_identity(self, filepath:str)->str:
+        """
+        Function to return the identity of the current version of a file, from its modification time and size
+        :params filepath: Path of the file
+        """
+        stat = os.stat(filepath)
+        return f"file://{os.path.abspath(filepath)}:{stat.st_mtime_ns}:{stat.st_size}"
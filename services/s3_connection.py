@@ -2,9 +2,11 @@ import boto3
 from botocore.exceptions import ClientError
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+import io
 import os
-from typing import List
+from typing import List, Union
 from environments.environments import Environments
+from utils.streams import DEFAULT_PART_SIZE, RangedReader, download_parts
 
 load_dotenv()
 
@@ -21,12 +23,14 @@ class S3Connection:
         self.access_key = Environments.get_s3_access_key()
         self.secret_key = Environments.get_s3_secret_key()
         self.region = Environments.get_s3_region()
+        self.endpoint_url = Environments.get_s3_endpoint_url()
 
         return boto3.client(
             's3',
             aws_access_key_id=self.access_key,
             aws_secret_access_key=self.secret_key,
-            region_name=self.region
+            region_name=self.region,
+            endpoint_url=self.endpoint_url
         )
 
     def upload_file(self, s3_key: str, file_path: str, bucket: str = None) -> None:
@@ -57,22 +61,67 @@ class S3Connection:
             print(f"Download failed: {e}")
             raise e
 
-    def read_file(self, s3_key: str, bucket: str = None) -> bytes:
+    def _fetch(self, s3_key: str, bucket: str):
         """
-        Read file from S3 directly into memory.
+        Build the function reading a byte range [start, end) of an object.
+        """
+        def fetch(start: int, end: int) -> bytes:
+            response = self.client.get_object(Bucket=bucket, Key=s3_key, Range=f"bytes={start}-{end - 1}")
+            return response['Body'].read()
+        return fetch
+
+    def get_size(self, s3_key: str, bucket: str = None) -> int:
+        """
+        Size of an object in bytes.
+        :params s3_key: Path (key) inside S3 bucket.
+        """
+        bucket = bucket if bucket else self.bucket
+        return self.client.head_object(Bucket=bucket, Key=s3_key)['ContentLength']
+
+    def get_identity(self, s3_key: str, bucket: str = None) -> str:
+        """
+        Identity of the current version of an object, from its ETag and size.
+        :params s3_key: Path (key) inside S3 bucket.
+        """
+        bucket = bucket if bucket else self.bucket
+        head = self.client.head_object(Bucket=bucket, Key=s3_key)
+        return f"s3://{bucket}/{s3_key}:{head['ETag']}:{head['ContentLength']}"
+
+    def read_file(self, s3_key: str, bucket: str = None, part_size: int = None, concurrency: int = None) -> Union[bytes, bytearray]:
+        """
+        Read file from S3 directly into memory. Objects larger than one part are downloaded
+        with concurrent range requests into a single preallocated buffer.
         :params s3_key: Path (key) inside S3 bucket.
+        :params part_size: Size in bytes of every range request.
+        :params concurrency: Number of range requests in flight.
         :return: File content as bytes.
         """
         bucket = bucket if bucket else self.bucket
         try:
-            response = self.client.get_object(Bucket=bucket, Key=s3_key)
-            data = response['Body'].read()
+            size = self.get_size(s3_key, bucket)
+            if size <= (part_size or DEFAULT_PART_SIZE):
+                data = self.client.get_object(Bucket=bucket, Key=s3_key)['Body'].read()
+            else:
+                data = download_parts(size, self._fetch(s3_key, bucket), part_size, concurrency)
             print(f"File {s3_key} downloaded successfully.")
             return data
         except ClientError as e:
             print(f"Error loading file: {s3_key}")
             raise e
 
+    def open_stream(self, s3_key: str, bucket: str = None, part_size: int = None, concurrency: int = None) -> io.BufferedReader:
+        """
+        Open a seekable file-like stream over an object, the next parts are downloaded
+        in parallel while the current one is consumed.
+        :params s3_key: Path (key) inside S3 bucket.
+        :params part_size: Size in bytes of every range request.
+        :params concurrency: Number of range requests in flight.
+        """
+        bucket = bucket if bucket else self.bucket
+        size = self.get_size(s3_key, bucket)
+        reader = RangedReader(size, self._fetch(s3_key, bucket), part_size, concurrency)
+        return io.BufferedReader(reader, buffer_size=1024 * 1024)
+
     def get_public_link(self, s3_key: str, bucket: str = None, expiry_hours: int = 72) -> str:
         """
         Generate a pre-signed URL for a file.
@@ -94,18 +143,19 @@ class S3Connection:
 
     def get_list_files(self, bucket: str = None, prefix: str = "") -> List[str]:
         """
-        List files in an S3 bucket or inside a folder (prefix).
+        List files in an S3 bucket or inside a folder (prefix), following every page of results.
         :params bucket: S3 bucket name.
         :params prefix: Folder path to filter files.
         :return: List of file keys.
         """
         bucket = bucket if bucket else self.bucket
         try:
-            response = self.client.list_objects_v2(Bucket=bucket, Prefix=prefix)
-            if 'Contents' in response:
-                return [item['Key'] for item in response['Contents']]
-            else:
-                return []
+            paginator = self.client.get_paginator("list_objects_v2")
+            return [
+                item['Key']
+                for page in paginator.paginate(Bucket=bucket, Prefix=prefix)
+                for item in page.get('Contents', [])
+            ]
         except ClientError as e:
             print(f"Failed to list files: {e}")
             raise e
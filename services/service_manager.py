@@ -1,15 +1,31 @@
-from typing import Optional
+from typing import Dict, Optional
 import importlib
+import threading
 
 class Service_Manager:
 
+    ALIASES = {"aws": "s3"}
+    # connections shared by the processors of a long running process (daemon)
+    _connections: Dict = {}
+    _lock = threading.Lock()
+
     def __init__(self):
         pass
 
     @classmethod
-    def get_connection(cls, configuration_type:str)->Optional[str]:
-        
-        type_connection = configuration_type
+    def get_connection(cls, configuration_type:str, reuse:bool=False)->Optional[str]:
+        """
+        Function to build the connection of a storage type
+        :params configuration_type: local, aws (s3), blob or db
+        :params reuse: Return the connection already built for this type, its clients stay warm
+        """
+        type_connection = cls.ALIASES.get(configuration_type.lower(), configuration_type)
+        if reuse:
+            with cls._lock:
+                if type_connection.lower() not in cls._connections:
+                    cls._connections[type_connection.lower()] = cls.get_connection(type_connection)
+                return cls._connections[type_connection.lower()]
+
         module = importlib.import_module(f"services.{type_connection.lower()}_connection")
         connection_class = getattr(module, f"{type_connection.capitalize()}Connection")
 
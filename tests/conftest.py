@@ -0,0 +1,12 @@
+import logging
+import sys
+from pathlib import Path
+import pytest
+
+# the modules of the repository are imported from its root, as the run_*.py scripts do
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+@pytest.fixture
+def logs() -> logging.Logger:
+    return logging.getLogger("tests")
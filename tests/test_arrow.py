@@ -0,0 +1,65 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from validation_processor import ValidationProcessor
+
+ACTIONS = [
+    {"CheckType": {"checks": [{"column": "age", "type": "int"}, {"column": "born", "type": "datetime", "format": "%Y-%m-%d"},
+                              {"column": "score", "type": "float"}, {"column": "name", "type": "str"}]}},
+    {"CheckEnum": {"column": "sex", "allowed_values": ["M", "F"]}},
+    {"CheckNull": {"column": ["name", "score", "code"]}},
+    {"CheckPattern": {"checks": [{"column": "name", "pattern": r"^n\d+$"}]}},
+    {"CheckRange": {"checks": [{"column": "score", "min": 0.1, "max": 0.9}]}},
+    {"CheckDateInterval": {"column": "born", "start": "2000-01-01", "end": "2010-12-31"}},
+    {"CheckUnique": {"checks": [{"column": "id"}, {"column": ["sex", "age"]}]}},
+]
+
+
+@pytest.fixture(scope="module")
+def files(tmp_path_factory):
+    rows = 3000
+    rng = np.random.default_rng(7)
+    frame = pd.DataFrame({
+        "id": np.arange(rows) % (rows - 10),
+        "age": np.where(rng.random(rows) < 0.02, np.nan, rng.integers(0, 100, rows)),
+        "born": (pd.to_datetime("1995-01-01") + pd.to_timedelta(rng.integers(0, 8000, rows), unit="D")).strftime("%Y-%m-%d"),
+        "sex": rng.choice(["M", "F", "X", None], rows),
+        "name": [None if i % 11 == 0 else f"n{i}" if i % 13 else f"x{i}" for i in range(rows)],
+        "score": np.where(rng.random(rows) < 0.05, np.nan, rng.random(rows)),
+        "code": [" " if i % 17 == 0 else f"c{i}" for i in range(rows)],
+    })
+    frame.loc[5, "born"] = "05/07/2001"
+    folder = tmp_path_factory.mktemp("arrow")
+    frame.to_csv(folder / "people.csv", index=False)
+    frame.to_parquet(folder / "people.parquet", index=False)
+    return folder
+
+
+def _details(report: dict) -> pd.DataFrame:
+    # the CSV readers differ on missing text (None or NaN) and on the last digit of some floats
+    frame = pd.DataFrame(report["Details"]).astype(object)
+    return frame.where(frame.notna(), np.nan).infer_objects()
+
+
+def _run(path: str, engine: str, details: dict, logs) -> list:
+    schema = {"storage": {"type": "local", "local": path}, "actions": ACTIONS, "report": {"details": details},
+              "execution": {"engine": engine}, "cache": {"enabled": False}}
+    return ValidationProcessor(schema, logs, use_cache=False).validate_file(path)
+
+
+@pytest.mark.parametrize("name", ["people.csv", "people.parquet"])
+def test_arrow_engine_reports_like_pandas(files, name, logs):
+    pandas = _run(str(files / name), "pandas", {"mode": "indices"}, logs)
+    arrow = _run(str(files / name), "arrow", {"mode": "indices"}, logs)
+    assert sum(1 for report in pandas if report["Invalid_count"]) == 12
+    assert json.dumps(arrow) == json.dumps(pandas)
+
+
+@pytest.mark.parametrize("name", ["people.csv", "people.parquet"])
+def test_arrow_engine_keeps_the_same_rows_in_the_details(files, name, logs):
+    pandas = _run(str(files / name), "pandas", {"mode": "head", "limit": 5}, logs)
+    arrow = _run(str(files / name), "arrow", {"mode": "head", "limit": 5}, logs)
+    assert [{**r, "Details": None} for r in arrow] == [{**r, "Details": None} for r in pandas]
+    for arrow_report, pandas_report in zip(arrow, pandas):
+        pd.testing.assert_frame_equal(_details(arrow_report), _details(pandas_report))
@@ -0,0 +1,85 @@
+from collections import Counter
+import pandas as pd
+import pyarrow as pa
+import pytest
+import yaml
+from batch_runner import BatchRunner
+from validation_processor import ValidationProcessor
+
+ACTIONS = {
+    "a": [{"CheckNull": {"column": ["name"]}}, {"CheckEnum": {"column": "sex", "allowed_values": ["M", "F"]}}],
+    "b": [{"CheckRange": {"checks": [{"column": "age", "min": 0, "max": 99}]}}],
+    "c": [{"CheckNull": {"column": ["sex", "name"]}}],
+}
+
+
+@pytest.fixture
+def batch(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    folder = tmp_path / "landing"
+    folder.mkdir()
+    for part in range(2):
+        pd.DataFrame({"id": range(6), "name": ["a", None, "b", " ", "c", "d"], "sex": ["M", "F", "X", "M", None, "F"],
+                      "age": [10, 120, -1, 50, 30 + part, 7], "pad": 1.5}).to_csv(folder / f"part-{part}.csv", index=False)
+    for name, actions in ACTIONS.items():
+        schema = {"storage": {"type": "local", "local": str(folder) + "/"}, "actions": actions,
+                  "report": {"details": {"mode": "head", "limit": 10}}, "cache": {"enabled": False}}
+        (tmp_path / f"{name}.yml").write_text(yaml.safe_dump(schema))
+    return tmp_path
+
+
+@pytest.fixture
+def loads(monkeypatch) -> Counter:
+    counts = Counter()
+    load_file = ValidationProcessor.load_file
+
+    def counted(self, filepath, **options):
+        counts[filepath] += 1
+        return load_file(self, filepath, **options)
+
+    monkeypatch.setattr(ValidationProcessor, "load_file", counted)
+    return counts
+
+
+def test_group_loads_each_file_once(batch, loads, logs):
+    runner = BatchRunner([batch / f"{name}.yml" for name in ACTIONS], logs, use_cache=False)
+    groups, alone = runner.groups()
+    assert list(groups.values()) == [["a", "b", "c"]] and alone == []
+    results = runner.run_group(["a", "b", "c"])
+    assert sorted(loads.values()) == [1, 1] and runner.datasets.loads == 2
+    for name in ACTIONS:
+        # the reports and the rows of the details are the ones of a run of the config on its own
+        own = ValidationProcessor(yaml.safe_load((batch / f"{name}.yml").read_text()), logs, use_cache=False)
+        for filepath, reports in results[name]["files"].items():
+            assert reports == own.validate_file(filepath, details=own.file_details(
+                {"mode": "head", "limit": 10}, filepath))
+
+
+def test_projection_is_the_union_of_the_configs(batch, logs):
+    runner = BatchRunner([batch / f"{name}.yml" for name in ACTIONS], logs, use_cache=False)
+    # sex is a category for a alone, c reads it as text
+    assert runner.projection(["a"]) == {"name": None, "sex": "category"}
+    assert runner.projection(["a", "b"]) == {"name": None, "sex": "category", "age": None}
+    assert runner.projection(["a", "b", "c"]) == {"name": None, "sex": None, "age": None}
+    runner.processors["b"].schema["report"]["details"]["full_rows"] = True
+    assert runner.projection(["a", "b"]) is None
+
+
+def test_select_keeps_the_columns_of_a_config():
+    frame = pd.DataFrame({"name": ["a"], "sex": ["M"], "age": [1]})
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    assert list(BatchRunner._select(frame, {"age": None, "name": None}).columns) == ["name", "age"]
+    assert BatchRunner._select(table, {"sex": None}).column_names == ["sex"]
+    # every column of the dataset or no projection: the dataset itself
+    assert BatchRunner._select(frame, {"name": None, "sex": None, "age": None}) is frame
+    assert BatchRunner._select(table, None) is table
+
+
+def test_streamed_configs_run_on_their_own(batch, logs):
+    schema = yaml.safe_load((batch / "b.yml").read_text())
+    schema["execution"] = {"mode": "stream"}
+    (batch / "d.yml").write_text(yaml.safe_dump(schema))
+    schema["execution"] = {"engine": "arrow"}
+    (batch / "e.yml").write_text(yaml.safe_dump(schema))
+    groups, alone = BatchRunner([batch], logs, use_cache=False).groups()
+    assert sorted(groups.values()) == [["a", "b", "c"], ["e"]] and alone == ["d"]
@@ -0,0 +1,42 @@
+from pathlib import Path
+import pytest
+import yaml
+from benchmarks.generator import FORMATS, DatasetGenerator, write_dataset
+from benchmarks.harness import BenchmarkRunner, compare
+
+CONFIG = Path(__file__).resolve().parent.parent / "configs" / "validation.yml"
+
+
+@pytest.fixture
+def actions():
+    with open(CONFIG) as f:
+        return yaml.safe_load(f)["actions"]
+
+
+def test_harness_records_every_stage_of_a_tiny_file(actions, tmp_path, logs):
+    pytest.importorskip("openpyxl")
+    paths = write_dataset(DatasetGenerator(actions, rows=200, seed=1).generate(), str(tmp_path), FORMATS)
+    runner = BenchmarkRunner(actions, chunksize=64, logs=logs)
+    runner.run_loaders(paths, 200)
+    for fmt, path in paths.items():
+        runner.run_actions(path, fmt)
+
+    results = runner.document({"rows": 200})["results"]
+    assert [entry for entry in results if "error" in entry] == []
+    stages = {(entry["stage"], entry["name"], entry["format"], entry["engine"]) for entry in results}
+    for fmt in FORMATS:
+        assert {("load", "load_file", fmt, "pandas"), ("load", "load_file", fmt, "arrow"),
+                ("load", "iter_file", fmt, "pandas"), ("actions", "all", fmt, "arrow"),
+                ("serialize", "reports", fmt, "pandas")} <= stages
+        assert sum(1 for stage in stages if stage[0] == "action" and stage[2:] == (fmt, "pandas")) == len(actions)
+    assert all(entry["rows"] == 200 for entry in results)
+
+
+def test_compare_reports_slower_and_heavier_stages():
+    def document(rows_per_second, memory):
+        return {"results": [{"stage": "load", "name": "load_file", "format": "csv", "engine": "pandas",
+                             "rows_per_second": rows_per_second, "memory_increase_mib": memory}]}
+
+    assert compare(document(95, 100), document(100, 100), tolerance=0.2) == []
+    regressions = compare(document(50, 200), document(100, 100), tolerance=0.2)
+    assert [regression["metric"] for regression in regressions] == ["rows_per_second", "memory_increase_mib"]
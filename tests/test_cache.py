@@ -0,0 +1,67 @@
+import os
+import pandas as pd
+import pytest
+from validation_processor import ValidationProcessor
+
+
+def _schema(path: str, cache_path, actions=None, identity: str = "metadata") -> dict:
+    return {
+        "storage": {"type": "local", "local": path},
+        "actions": actions or [{"CheckNull": {"column": ["name"]}}],
+        "cache": {"enabled": True, "path": str(cache_path), "identity": identity},
+    }
+
+
+@pytest.fixture
+def people(tmp_path) -> str:
+    path = tmp_path / "people.csv"
+    pd.DataFrame({"id": range(10), "name": [None if i % 3 == 0 else f"n{i}" for i in range(10)],
+                  "age": range(10)}).to_csv(path, index=False)
+    return str(path)
+
+
+def _cached(processor, filepath):
+    """Reports of a file and the positions of the actions read from the cache"""
+    hits = []
+    get_reports = processor.cache.get_reports
+
+    def spy(key):
+        reports = get_reports(key)
+        hits.append(reports is not None)
+        return reports
+
+    processor.cache.get_reports = spy
+    reports = processor.validate_file(filepath)
+    return reports, [position for position, hit in enumerate(hits) if hit]
+
+
+def test_cache_is_opt_in(people, logs):
+    schema = _schema(people, "unused")
+    del schema["cache"]
+    assert ValidationProcessor(schema, logs).cache is None
+
+
+def test_unrelated_action_keeps_cached_reports(people, logs, tmp_path):
+    null = {"CheckNull": {"column": ["name"]}}
+    _cached(ValidationProcessor(_schema(people, tmp_path / "cache", [null]), logs), people)
+    schema = _schema(people, tmp_path / "cache", [null, {"CheckRange": {"column": "age", "min": 0, "max": 5}}])
+    reports, hits = _cached(ValidationProcessor(schema, logs), people)
+    assert hits == [0]
+    assert reports[0]["Invalid_count"] == 4
+
+
+@pytest.mark.parametrize("identity", ["metadata", "content"])
+def test_changed_file_misses_the_cache(people, logs, tmp_path, identity):
+    schema = _schema(people, tmp_path / "cache", identity=identity)
+    _, hits = _cached(ValidationProcessor(schema, logs), people)
+    assert hits == []
+    _, hits = _cached(ValidationProcessor(schema, logs), people)
+    assert hits == [0]
+
+    # same size, other content and a later modification time
+    pd.DataFrame({"id": range(10), "name": ["nn"] * 10, "age": range(10)}).to_csv(people, index=False)
+    stat = os.stat(people)
+    os.utime(people, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    reports, hits = _cached(ValidationProcessor(schema, logs), people)
+    assert hits == []
+    assert reports[0]["Invalid_count"] == 0
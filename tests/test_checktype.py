@@ -0,0 +1,52 @@
+import datetime
+import numpy as np
+import pandas as pd
+import pytest
+from pipeline.actions.checktype import CheckType
+from pipeline.pipeline import Pipeline
+
+MIXED = [1, 2.0, 2.5, True, "x", "12/03/2024", "2024-03-12", "31/02/2024", None, np.nan,
+         datetime.date(2024, 3, 12), datetime.datetime(2024, 3, 12, 8), np.int64(3), pd.Timestamp("2024-01-01")]
+
+COLUMNS = {
+    "mixed": pd.Series(MIXED, dtype=object),
+    "ints": pd.Series([1, 2, 3]),
+    "floats": pd.Series([1.0, 2.5, np.nan]),
+    "bools": pd.Series([True, False, True]),
+    "dates": pd.Series(["01/02/2024", "15/02/2024", "x", None] * 50, dtype=object),
+    "datetimes": pd.Series(pd.to_datetime(["2024-01-01", None])),
+}
+
+
+def _invalid(series: pd.Series, type: str, **options) -> list:
+    frame = pd.DataFrame({"value": series})
+    action = {"CheckType": {"checks": [{"column": "value", "type": type, **options}]}}
+    return Pipeline(df=frame, details={"mode": "indices"}).run([action])[0]["Details"]
+
+
+@pytest.mark.parametrize("type", list(CheckType.TYPE_MAP))
+@pytest.mark.parametrize("name", list(COLUMNS))
+def test_vectorized_check_matches_the_value_rule(name, type):
+    series = COLUMNS[name]
+    rule = CheckType({"checks": []}, Pipeline())
+    # the rule applied to every value, as the check did with Series.apply
+    expected = [index for index, value in enumerate(series.astype(object)) if not rule._is_valid_value(value, type)]
+    assert _invalid(series, type) == expected
+
+
+@pytest.mark.parametrize("type", list(CheckType.TYPE_MAP))
+def test_categories_are_checked_once_and_missing_values_are_invalid(type):
+    values = ["a", "01/02/2024", None, "a", 1.5]
+    rule = CheckType({"checks": []}, Pipeline())
+    # Series.apply runs the rule on the categories only, a missing value is not of any type
+    expected = [index for index, value in enumerate(values) if value is None or not rule._is_valid_value(value, type)]
+    assert _invalid(pd.Series(values, dtype="category"), type) == expected
+
+
+def test_strict_changes_how_numbers_compare():
+    values = pd.Series([1, True, 2.0, 2.5, "1"], dtype=object)
+    assert _invalid(values, "int") == [2, 3, 4]
+    assert _invalid(values, "int", strict=True) == [1, 2, 3, 4]
+    assert _invalid(values, "int", strict=False) == [3, 4]
+    assert _invalid(values, "float") == [0, 1, 4]
+    assert _invalid(values, "float", strict=False) == [1, 4]
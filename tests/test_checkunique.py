@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pipeline.pipeline import Pipeline
+
+
+def _approx(values) -> dict:
+    frame = pd.DataFrame({"key": values})
+    action = {"CheckUnique": {"checks": [{"column": "key", "mode": "approx"}]}}
+    return Pipeline(df=frame).run_actions([action])[0][0]
+
+
+@pytest.mark.parametrize("values, valid", [
+    (np.arange(1000), True),
+    (np.concatenate([np.arange(1000), np.arange(20)]), None),
+    (np.arange(1000) % 100, False),
+])
+def test_approx_reports_the_estimate_and_its_bound(values, valid):
+    report = _approx(values)
+    repeated = len(values) - len(np.unique(values))
+    assert report["Approximate"] and not report["Details"]
+    assert report["Invalid_count"] is None
+    assert abs(report["Estimated_duplicates"] - repeated) <= report["Error_bound"]
+    assert report["Valid_Column"] is valid
+    if valid is None:
+        assert 0 < report["Estimated_duplicates"] <= report["Error_bound"]
+
+
+def test_exact_modes_count_every_row_of_a_duplicate_group(tmp_path):
+    frame = pd.DataFrame({"key": [1, 1, 1, 2, 3, 3]})
+    checks = [{"column": "key"}, {"column": "key", "mode": "spill", "path": str(tmp_path)},
+              {"column": "key", "mode": "approx"}]
+    memory, spill, approx = Pipeline(df=frame).run_actions([{"CheckUnique": {"checks": checks}}])[0]
+    assert memory["Invalid_count"] == spill["Invalid_count"] == 5
+    # the estimate counts the extra copies of the keys
+    assert approx["Invalid_count"] is None and approx["Estimated_duplicates"] == 3
+
+
+def test_unknown_file_leaves_the_dataset_unknown(tmp_path, logs):
+    from validation_processor import ValidationProcessor
+
+    schema = {"storage": {"type": "local", "local": str(tmp_path)}, "actions": [], "cache": {"enabled": False}}
+    processor = ValidationProcessor(schema, logs)
+
+    def report(valid):
+        return [{"Action": "Check Unique", "Column": "key", "Invalid_count": 0 if valid else 3, "Valid_Column": valid}]
+
+    [unknown] = processor._aggregate({"a": report(True), "b": report(None)})
+    assert unknown["Valid_Column"] is None and unknown["Invalid_files"] == []
+    [invalid] = processor._aggregate({"a": report(None), "b": report(False), "c": report(None)})
+    assert invalid["Valid_Column"] is False and invalid["Invalid_files"] == ["b"]
+
+
+def test_modes_agree_on_text_that_reads_as_the_same_number(tmp_path):
+    # distinct zip codes, equal once read as numbers
+    frame = pd.DataFrame({"zip": ["01234", "1234", "001234", "1234.0", "09999", "9999", "9999.00"]})
+    checks = [{"column": "zip"}, {"column": "zip", "mode": "spill", "path": str(tmp_path)},
+              {"column": "zip", "mode": "approx"}]
+    memory, spill, approx = Pipeline(df=frame).run_actions([{"CheckUnique": {"checks": checks}}])[0]
+    assert memory["Invalid_count"] == spill["Invalid_count"] == approx["Estimated_duplicates"] == 0
+    assert memory["Valid_Column"] and spill["Valid_Column"] and approx["Valid_Column"]
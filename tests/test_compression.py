@@ -0,0 +1,96 @@
+import bz2
+import gzip
+import lzma
+import pandas as pd
+import pyarrow as pa
+import pytest
+from utils.fileloader import FileLoader
+
+
+def _zstd(data: bytes) -> bytes:
+    sink = pa.BufferOutputStream()
+    with pa.CompressedOutputStream(sink, "zstd") as out:
+        out.write(data)
+    return sink.getvalue().to_pybytes()
+
+
+CODECS = {"gz": gzip.compress, "bz2": bz2.compress, "xz": lzma.compress, "zst": _zstd}
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "id": range(300),
+        "name": [None if i % 7 == 0 else f"name {i}" for i in range(300)],
+        "score": [i / 4 for i in range(300)],
+    })
+
+
+def _write_csv(frame, path):
+    frame.to_csv(path, index=False)
+
+
+def _write_json(frame, path):
+    frame.to_json(path, orient="records")
+
+
+def _write_ndjson(frame, path):
+    frame.to_json(path, orient="records", lines=True)
+
+
+def _write_xml(frame, path):
+    frame.to_xml(path, index=False, parser="etree")
+
+
+def _write_parquet(frame, path):
+    frame.to_parquet(path, index=False)
+
+
+def _write_xlsx(frame, path):
+    pytest.importorskip("openpyxl")
+    frame.to_excel(path, index=False)
+
+
+# JSON Lines files are .json files, the loader tells them apart by their content
+FORMATS = {
+    "csv": (".csv", _write_csv),
+    "json": (".json", _write_json),
+    "ndjson": (".json", _write_ndjson),
+    "xml": (".xml", _write_xml),
+    "parquet": (".parquet", _write_parquet),
+    "xlsx": (".xlsx", _write_xlsx),
+}
+
+
+@pytest.fixture
+def loader(logs) -> FileLoader:
+    return FileLoader(None, logs, local_mode=True)
+
+
+@pytest.fixture(params=list(FORMATS))
+def files(request, tmp_path):
+    extension, write = FORMATS[request.param]
+    plain = tmp_path / f"data{extension}"
+    write(_frame(), plain)
+    for suffix, compress in CODECS.items():
+        (tmp_path / f"data{extension}.{suffix}").write_bytes(compress(plain.read_bytes()))
+    return str(plain)
+
+
+@pytest.mark.parametrize("suffix", list(CODECS))
+def test_load_file(loader, files, suffix):
+    expected = loader.load_file(files)
+    assert len(expected) == 300
+    pd.testing.assert_frame_equal(loader.load_file(f"{files}.{suffix}"), expected)
+
+
+@pytest.mark.parametrize("suffix", list(CODECS))
+def test_load_file_as_table(loader, files, suffix):
+    assert loader.load_file(f"{files}.{suffix}", as_table=True).equals(loader.load_file(files, as_table=True))
+
+
+@pytest.mark.parametrize("suffix", list(CODECS))
+def test_iter_file(loader, files, suffix):
+    expected = pd.concat(loader.iter_file(files, chunksize=70), ignore_index=True)
+    chunks = list(loader.iter_file(f"{files}.{suffix}", chunksize=70))
+    pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), expected)
+    pd.testing.assert_frame_equal(expected, loader.load_file(files), check_dtype=False)
@@ -0,0 +1,43 @@
+import threading
+import time
+import pandas as pd
+import yaml
+from validation_daemon import ValidationDaemon
+
+
+def test_runs_of_a_config_never_overlap(tmp_path, logs):
+    data = tmp_path / "data"
+    data.mkdir()
+    for name in ("a", "b"):
+        config = {"storage": {"type": "local", "local": f"{data}/{name}_*.csv"},
+                  "actions": [{"CheckNull": {"column": ["value"]}}],
+                  "output": {"path": str(tmp_path / "results" / name / "{run_id}" / "results")},
+                  "daemon": {"process_existing": True}}
+        (tmp_path / f"{name}.yml").write_text(yaml.safe_dump(config))
+        for i in range(3):
+            pd.DataFrame({"value": [1, None]}).to_csv(data / f"{name}_{i}.csv", index=False)
+
+    daemon = ValidationDaemon(str(tmp_path), logs, workers=4)
+    daemon.load()
+    lock = threading.Lock()
+    running = {"a": 0, "b": 0}
+    peaks = {"a": 0, "b": 0, "all": 0}
+    for watch in daemon.watches:
+        def run(filepath=None, watch=watch, validate=watch.processor.run):
+            with lock:
+                running[watch.name] += 1
+                peaks[watch.name] = max(peaks[watch.name], running[watch.name])
+                peaks["all"] = max(peaks["all"], sum(running.values()))
+            time.sleep(0.05)
+            try:
+                return validate(filepath)
+            finally:
+                with lock:
+                    running[watch.name] -= 1
+        watch.processor.run = run
+
+    daemon.serve(once=True)
+    assert peaks["a"] == peaks["b"] == 1
+    # the configs still run side by side
+    assert peaks["all"] == 2
+    assert len(list((tmp_path / "results" / "a").iterdir())) == 3
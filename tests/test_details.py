@@ -0,0 +1,78 @@
+from pathlib import Path
+import pandas as pd
+from batch_runner import BatchRunner
+from validation_processor import ValidationProcessor
+
+
+def _schema(path: str) -> dict:
+    return {
+        "storage": {"type": "local", "local": path},
+        "actions": [{"CheckNull": {"column": ["value"]}}],
+        "report": {"details": {"mode": "spill"}},
+        "cache": {"enabled": False},
+    }
+
+
+def _write(folder: Path) -> str:
+    path = folder / "values.csv"
+    pd.DataFrame({"id": range(10), "value": [None, 1, 2, None, 4, 5, 6, 7, 8, None]}).to_csv(path, index=False)
+    return str(path)
+
+
+def test_spilled_details_are_kept_per_run(tmp_path, monkeypatch, logs):
+    monkeypatch.chdir(tmp_path)
+    path = _write(tmp_path)
+    processor = ValidationProcessor(_schema(path), logs)
+    first = processor.run()[0]["Details"]
+    second = processor.run()[0]["Details"]
+    assert first != second
+    runs = {folder.name for folder in (tmp_path / "results" / "details").iterdir()}
+    assert {Path(first).parent.name, Path(second).parent.name} == runs
+    assert len(pd.read_parquet(first)) == len(pd.read_parquet(second)) == 3
+
+
+def test_spilled_details_of_batch_configs(tmp_path, monkeypatch, logs):
+    import yaml
+
+    monkeypatch.chdir(tmp_path)
+    path = _write(tmp_path)
+    for name in ("a", "b"):
+        (tmp_path / f"{name}.yml").write_text(yaml.safe_dump(_schema(path)))
+    results = BatchRunner([tmp_path / "a.yml", tmp_path / "b.yml"], logs, use_cache=False).run()
+    spilled = {Path(results[name][0]["Details"]).parent for name in ("a", "b")}
+    assert len(spilled) == 2
+    for name in ("a", "b"):
+        [run_id] = [folder.name for folder in (tmp_path / "results" / name).iterdir()]
+        assert Path(results[name][0]["Details"]).parent.name == run_id
+
+
+def test_spilled_chunks_of_different_types(tmp_path, monkeypatch, logs):
+    monkeypatch.chdir(tmp_path)
+    path = tmp_path / "ages.csv"
+    # each chunk of 3 rows infers its own type for age: int, float, text, int
+    pd.DataFrame({
+        "name": [None, "a", None, None, "b", "c", None, "d", "e", None, "f", "g"],
+        "age": [1, 2, 3, 1.5, None, 2.0, "x", 4, 5, 6, 7, 8],
+    }).to_csv(path, index=False)
+    schema = _schema(str(path))
+    schema["actions"] = [{"CheckNull": {"column": ["name"]}}]
+    schema["report"]["details"]["full_rows"] = True
+    schema["execution"] = {"mode": "stream", "chunksize": 3}
+    [report] = ValidationProcessor(schema, logs).run()
+    spilled = pd.read_parquet(report["Details"])
+    assert report["Invalid_count"] == 5
+    assert spilled["_position"].tolist() == [0, 2, 3, 6, 9]
+    assert spilled["age"].tolist() == ["1", "3", "1.5", "x", "6"]
+    assert list(Path(report["Details"]).parent.iterdir()) == [Path(report["Details"])]
+
+
+def test_actions_of_a_type_on_a_column_spill_to_their_own_files(tmp_path, logs):
+    from pipeline.pipeline import Pipeline
+
+    frame = pd.DataFrame({"code": ["a1", "b2", "cc", "d4"]})
+    actions = [{"CheckPattern": {"checks": [{"column": "code", "pattern": r"^[a-z]\d$"}]}},
+               {"CheckPattern": {"checks": [{"column": "code", "pattern": r"^[a-c]"}]}}]
+    [first], [second] = Pipeline(df=frame, details={"mode": "spill", "path": str(tmp_path)}).run_actions(actions)
+    assert first["Details"] != second["Details"]
+    assert pd.read_parquet(first["Details"])["code"].tolist() == ["cc"]
+    assert pd.read_parquet(second["Details"])["code"].tolist() == ["d4"]
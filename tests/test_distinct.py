@@ -0,0 +1,71 @@
+import json
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pytest
+import pipeline.planner
+from pipeline.distinct import DistinctValues, encode
+from pipeline.pipeline import Pipeline
+
+ACTIONS = [
+    {"CheckEnum": {"column": "country", "allowed_values": ["PT", "ES"]}},
+    {"CheckPattern": {"checks": [{"column": "country", "pattern": r"^[A-Z]{2}$"},
+                                 {"column": "code", "pattern": r"^\d+$"}]}},
+    {"CheckType": {"checks": [{"column": "day", "type": "datetime"}, {"column": "day", "type": "date"},
+                              {"column": "country", "type": "str"}, {"column": "code", "type": "int"}]}},
+    {"CheckDateInterval": {"column": "day", "start": "2024-01-01", "end": "2024-06-30"}},
+    {"CheckNull": {"column": ["country", "day"]}},
+]
+
+
+def _frame(rows: int = 5000) -> pd.DataFrame:
+    rng = np.random.default_rng(5)
+    days = ["03/01/2024", "15/02/2024", "30/07/2024", "31/02/2024", "x", "", " "]
+    return pd.DataFrame({
+        "country": rng.choice(np.array(["PT", "ES", "FR", "pt", " ", None, np.nan], dtype=object), rows),
+        "day": rng.choice(np.array(days + [None], dtype=object), rows),
+        "code": rng.choice(np.array(["1", "22", "x3", None], dtype=object), rows),
+    })
+
+
+def _reports(data) -> str:
+    # NaN in the details are not equal to each other, the reports are compared as written
+    return json.dumps(Pipeline(df=data, details={"mode": "head", "limit": 20}).run(ACTIONS), default=str)
+
+
+@pytest.fixture
+def row_wise(monkeypatch):
+    """
+    Turns the distinct value evaluation off, every row is evaluated
+    """
+    def off():
+        monkeypatch.setattr(DistinctValues, "build", classmethod(lambda cls, values, ratio=None: None))
+        monkeypatch.setattr(pipeline.planner, "encode", lambda values, ratio=None: None)
+    return off
+
+
+def test_low_cardinality_columns_are_encoded():
+    frame = _frame()
+    assert all(DistinctValues.build(frame[name]) is not None for name in frame.columns)
+    # one distinct value per row, or values of mixed types, are evaluated row by row
+    assert DistinctValues.build(pd.Series([f"v{i}" for i in range(5000)])) is None
+    assert DistinctValues.build(pd.Series(["1", 1, 1.0] * 100, dtype=object)) is None
+    assert encode(pa.array(frame["country"])) is not None
+    dictionary = pa.array(frame["country"]).dictionary_encode()
+    assert encode(dictionary) is dictionary
+
+
+def test_distinct_values_give_the_row_wise_reports(row_wise):
+    frame = _frame()
+    encoded = _reports(frame)
+    row_wise()
+    assert encoded == _reports(frame)
+
+
+def test_arrow_dictionaries_give_the_row_wise_reports(row_wise):
+    table = pa.Table.from_pandas(_frame(), preserve_index=False)
+    # dictionary columns, as read from Parquet, are evaluated on their dictionary
+    dictionaries = table.set_column(0, "country", table.column("country").dictionary_encode())
+    encoded = [_reports(table), _reports(dictionaries)]
+    row_wise()
+    assert encoded == [_reports(table), _reports(dictionaries)]
@@ -0,0 +1,48 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from pipeline.pipeline import Pipeline
+
+ACTIONS = [
+    {"CheckType": {"checks": [{"column": "age", "type": "int"}, {"column": "born", "type": "datetime"}]}},
+    {"CheckEnum": {"column": "sex", "allowed_values": ["M", "F"]}},
+    {"CheckNull": {"column": ["name", "score", "mixed"]}},
+    {"CheckPattern": {"checks": [{"column": "name", "pattern": r"^n\d+$"}]}},
+    {"CheckRange": {"checks": [{"column": "score", "min": 0.1, "max": 0.9}]}},
+    {"CheckDateInterval": {"column": "born", "start": "2000-01-01", "end": "2010-12-31"}},
+    {"CheckUnique": {"checks": [{"column": "id"}, {"column": ["sex", "age"]}]}},
+]
+
+
+def _frame(rows: int = 3000) -> pd.DataFrame:
+    rng = np.random.default_rng(7)
+    return pd.DataFrame({
+        "id": np.arange(rows) % (rows - 10),
+        "age": rng.integers(0, 100, rows),
+        "born": pd.to_datetime("1995-01-01") + pd.to_timedelta(rng.integers(0, 8000, rows), unit="D"),
+        "sex": pd.Categorical(rng.choice(["M", "F", "X", None], rows)),
+        # NaN nulls, rendered "nan" by the pattern check
+        "name": [np.nan if i % 11 == 0 else f"n{i}" if i % 13 else f"x{i}" for i in range(rows)],
+        "score": np.where(rng.random(rows) < 0.05, np.nan, rng.random(rows)),
+        "mixed": [None if i % 17 == 0 else i if i % 2 else str(i) for i in range(rows)],
+    })
+
+
+def _reports(executor: str, chunks: bool):
+    frame = _frame()
+    if chunks:
+        pipeline = Pipeline(chunks=(frame.iloc[start:start + 700] for start in range(0, len(frame), 700)),
+                            executor=executor, workers=2)
+    else:
+        pipeline = Pipeline(df=frame, executor=executor, workers=2)
+    return pipeline.run_actions(ACTIONS)
+
+
+@pytest.mark.parametrize("chunks", [False, True])
+@pytest.mark.parametrize("executor", ["threads", "processes"])
+def test_executors_report_like_serial(executor, chunks):
+    serial = _reports("serial", chunks)
+    assert sum(1 for reports in serial for report in reports if report["Invalid_count"]) == 9
+    # compared as written to the results, the NaN of the details are not equal to each other
+    assert json.dumps(_reports(executor, chunks), default=str) == json.dumps(serial, default=str)
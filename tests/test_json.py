@@ -0,0 +1,103 @@
+import gzip
+import io
+import json
+from pathlib import Path
+import pandas as pd
+import pytest
+from utils.fileloader import FileLoader
+from utils.streams import RangedReader
+from validation_processor import ValidationProcessor
+
+
+def _records(rows: int = 250) -> list:
+    records = []
+    for i in range(rows):
+        record = {"id": i, "user": {"id": i * 10, "address": {"city": f"c{i % 3}"}}, "tags": ["a", "b"][:i % 3],
+                  "score": i / 4}
+        if i % 5 == 0:
+            del record["score"]
+        if i % 7 == 0:
+            record["user"] = None
+        records.append(record)
+    return records
+
+
+class _Remote:
+    """
+    Storage connector serving the files of a folder through ranged reads, like S3 and Blob Storage
+    """
+
+    def __init__(self, folder: Path):
+        self.folder = folder
+        self.opened = []
+
+    def read_file(self, filepath: str, **options) -> bytearray:
+        return bytearray((self.folder / filepath).read_bytes())
+
+    def open_stream(self, filepath: str, **options) -> io.BufferedReader:
+        data = (self.folder / filepath).read_bytes()
+        stream = io.BufferedReader(RangedReader(len(data), lambda start, end: data[start:end], part_size=997), 256)
+        self.opened.append(stream)
+        return stream
+
+
+@pytest.fixture
+def ndjson(tmp_path) -> Path:
+    text = "".join(json.dumps(record) + "\n" for record in _records())
+    (tmp_path / "events.json").write_text(text)
+    (tmp_path / "events.json.gz").write_bytes(gzip.compress(text.encode()))
+    return tmp_path
+
+
+def _loader(logs, folder=None, **read_options) -> FileLoader:
+    connector = _Remote(folder) if folder is not None else None
+    return FileLoader(connector, logs, local_mode=folder is None, read_options=read_options)
+
+
+@pytest.mark.parametrize("options, columns", [
+    ({}, ["id", "user.id", "user.address.city", "tags", "score"]),
+    ({"json_max_level": 1}, ["id", "user.id", "user.address", "tags", "score"]),
+    ({"json_separator": "_"}, ["id", "user_id", "user_address_city", "tags", "score"]),
+    ({"json_flatten": False}, ["id", "user", "tags", "score"]),
+])
+def test_records_are_flattened_into_columns(ndjson, logs, options, columns):
+    loader = _loader(logs, **options)
+    frame = loader.load_file(str(ndjson / "events.json"))
+    assert list(frame.columns) == columns and len(frame) == 250
+    # a missing key and a null object are nulls, lists are kept as values
+    assert frame["score"].isna().sum() == 50 and frame.iloc[:7, 1].isna().tolist() == [True] + [False] * 6
+    assert frame["tags"].tolist()[:3] == [[], ["a"], ["a", "b"]]
+    chunks = list(loader.iter_file(str(ndjson / "events.json"), chunksize=60))
+    assert [len(chunk) for chunk in chunks] == [60, 60, 60, 60, 10]
+    pd.testing.assert_frame_equal(pd.concat(chunks), frame)
+
+
+def test_pyarrow_engine_reads_the_same_columns(ndjson, logs):
+    python = pd.concat(_loader(logs).iter_file(str(ndjson / "events.json"), chunksize=60), ignore_index=True)
+    arrow = pd.concat(_loader(logs, json_engine="pyarrow").iter_file(str(ndjson / "events.json"), chunksize=60),
+                      ignore_index=True)
+    assert list(arrow.columns) == list(python.columns)
+    for name in python.columns:
+        assert arrow[name].isna().tolist() == python[name].isna().tolist()
+    assert arrow["user.id"].equals(python["user.id"]) and arrow["score"].equals(python["score"])
+
+
+@pytest.mark.parametrize("name", ["events.json", "events.json.gz"])
+def test_remote_streams_read_like_local_files(ndjson, logs, name):
+    expected = _loader(logs).load_file(str(ndjson / "events.json"))
+    remote = _loader(logs, ndjson)
+    pd.testing.assert_frame_equal(remote.load_file(name), expected)
+    chunks = list(remote.iter_file(name, chunksize=60))
+    pd.testing.assert_frame_equal(pd.concat(chunks), expected)
+    # the stream was read through the ranged reader and closed with the last chunk
+    assert len(remote.connector.opened) == 1 and remote.connector.opened[0].closed
+
+
+def test_nested_fields_are_validated(ndjson, logs):
+    schema = {"storage": {"type": "local", "local": str(ndjson / "events.json.gz")},
+              "actions": [{"CheckNull": {"column": ["user.id", "score"]}},
+                          {"CheckRange": {"checks": [{"column": "user.id", "min": 0, "max": 1000}]}}],
+              "execution": {"mode": "stream", "chunksize": 60}, "cache": {"enabled": False}}
+    reports = ValidationProcessor(schema, logs, use_cache=False).validate_file(str(ndjson / "events.json.gz"))
+    assert [(report["Column"], report["Invalid_count"]) for report in reports] == \
+           [("user.id", 36), ("score", 50), ("user.id", 128)]
@@ -0,0 +1,33 @@
+from utils import memory
+from utils.memory import PeakMemory
+
+
+def _status(values):
+    """Fake /proc/self/status returning the next resident memory and peak of each read, in MiB"""
+    def read(field):
+        return values[field].pop(0) * 2**20
+    return read
+
+
+def test_peak_of_blocks_open_at_the_same_time(monkeypatch):
+    # outer enters at a peak of 100, inner at 100 and the peak rises to 300 inside inner
+    monkeypatch.setattr(memory, "_read_status", _status({"VmHWM": [100, 100, 300, 300, 300, 300],
+                                                         "VmRSS": [80, 90, 200]}))
+    with PeakMemory() as outer:
+        with PeakMemory() as inner:
+            pass
+        with PeakMemory() as after:
+            pass
+    assert inner.peak == outer.peak == 300 * 2**20
+    assert not inner.since_start and not outer.since_start
+    assert inner.increase == 210 * 2**20 and outer.increase == 220 * 2**20
+    # the peak did not rise in the last block, it is the peak reached before
+    assert after.since_start and after.increase == 100 * 2**20
+
+
+def test_peak_without_proc_nor_resource(monkeypatch):
+    monkeypatch.setattr(memory, "resource", None)
+    monkeypatch.setattr(memory, "_read_status", lambda field: None)
+    with PeakMemory() as peak:
+        pass
+    assert peak.since_start and peak.peak == 0 and peak.increase == 0
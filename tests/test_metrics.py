@@ -0,0 +1,87 @@
+import json
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+import pytest
+from pipeline.pipeline import Pipeline
+from utils.metrics import Metrics
+
+ACTIONS = [
+    {"CheckNull": {"column": ["name", "score"]}},
+    {"CheckRange": {"checks": [{"column": "score", "min": 0.1, "max": 0.9}]}},
+    {"CheckUnique": {"checks": [{"column": "id"}]}},
+]
+ROWS, CHUNK = 1000, 300
+
+
+def _chunks():
+    rng = np.random.default_rng(1)
+    frame = pd.DataFrame({"id": np.arange(ROWS) % 990, "name": rng.choice(["a", " ", None], ROWS),
+                          "score": rng.random(ROWS)})
+    return (frame.iloc[start:start + CHUNK] for start in range(0, ROWS, CHUNK))
+
+
+@pytest.fixture
+def measured(monkeypatch):
+    """
+    Metrics recorder keeping the measures of every check over every chunk
+    """
+    metrics = Metrics()
+    steps = defaultdict(list)
+    add_check = metrics.add_check
+
+    def add(action, position, measures, rows=None):
+        steps[(action.index, position)].append((measures, rows))
+        add_check(action, position, measures, rows)
+
+    monkeypatch.setattr(metrics, "add_check", add)
+    return metrics, steps
+
+
+@pytest.mark.parametrize("executor", ["serial", "threads", "processes"])
+def test_check_metrics_are_the_sum_of_the_chunks(measured, executor):
+    metrics, steps = measured
+    grouped = Pipeline(chunks=_chunks(), executor=executor, workers=2, metrics=metrics).run_actions(ACTIONS)
+    checks = [record for record in metrics.records if record["kind"] == "check"]
+    assert len(checks) == 4
+    for record in checks:
+        reports = grouped[record["position"]]
+        index = [report["Column"] for report in reports].index(record["column"])
+        report, chunks = reports[index], steps[(record["position"], index)]
+        assert len(chunks) == -(-ROWS // CHUNK)
+        for field in ("seconds", "cpu_seconds", "memory_delta_bytes"):
+            assert record[field] == pytest.approx(sum(measures[field] for measures, _ in chunks))
+        assert record["rows"] == sum(rows for _, rows in chunks) == ROWS
+        assert report["Metrics"] == {
+            "seconds": round(record["seconds"], 6), "cpu_seconds": round(record["cpu_seconds"], 6),
+            "rows": ROWS, "memory_delta_mib": round(record["memory_delta_bytes"] / 2**20, 1)
+        }
+
+
+def test_action_metrics_add_up_their_checks(measured):
+    metrics, _ = measured
+    Pipeline(chunks=_chunks(), metrics=metrics).run_actions(ACTIONS)
+    checks = [record for record in metrics.records if record["kind"] == "check"]
+    actions = [record for record in metrics.records if record["kind"] == "action"]
+    assert [record["position"] for record in actions] == [0, 1, 2]
+    for action in actions:
+        mine = [record for record in checks if record["position"] == action["position"]]
+        assert action["checks"] == len(mine)
+        assert action["seconds"] == pytest.approx(sum(record["seconds"] for record in mine) + action["finalize_seconds"])
+        # every check scans the rows, the action scanned them once
+        assert action["rows"] == ROWS
+        assert action["invalid_count"] == sum(record["invalid_count"] for record in mine)
+
+
+def test_exports_hold_the_records(measured, tmp_path):
+    metrics, _ = measured
+    Pipeline(chunks=_chunks(), metrics=metrics).run_actions(ACTIONS)
+    metrics.write_prometheus(str(tmp_path / "dq.prom"))
+    metrics.write_spans(str(tmp_path / "spans.jsonl"))
+    prometheus = (tmp_path / "dq.prom").read_text()
+    # the checks are spans only, one series per check would grow with every column
+    assert 'dq_rows{kind="action",name="CheckNull",action="CheckNull",position="0"} 1000' in prometheus
+    assert 'kind="check"' not in prometheus
+    spans = [json.loads(line) for line in (tmp_path / "spans.jsonl").read_text().splitlines()]
+    assert sorted(span["name"] for span in spans) == sorted(f"{record['kind']} {record['name']}" for record in metrics.records)
+    assert all(span["start_time_unix_nano"] <= span["end_time_unix_nano"] for span in spans)
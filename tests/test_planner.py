@@ -0,0 +1,49 @@
+import json
+from collections import Counter
+import pandas as pd
+import pytest
+from pipeline.pipeline import Pipeline
+from pipeline.planner import ColumnCache
+
+ACTIONS = [
+    {"CheckNull": {"column": ["name", "when"]}},
+    {"CheckPattern": {"checks": [{"column": "name", "pattern": "^[a-z]+$"}]}},
+    {"CheckType": {"checks": [{"column": "when", "type": "datetime", "format": "%Y-%m-%d"}]}},
+    {"CheckDateInterval": {"column": "when", "start": "2024-01-01", "end": "2024-12-31"}},
+]
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({"name": ["ana", " ", None, "bo", "Eva"] * 20,
+                         "when": ["2024-02-01", "x", None, "2025-03-04", "2024-12-31"] * 20})
+
+
+@pytest.fixture
+def builds(monkeypatch) -> Counter:
+    counts = Counter()
+    get = ColumnCache._get
+
+    def counted(self, key, build):
+        def run():
+            counts[key] += 1
+            return build()
+        return get(self, key, run)
+
+    monkeypatch.setattr(ColumnCache, "_get", counted)
+    return counts
+
+
+def test_fused_actions_report_as_separate_runs():
+    fused = Pipeline(df=_frame()).run(ACTIONS)
+    separate = [report for action in ACTIONS for report in Pipeline(df=_frame()).run([action])]
+    assert json.dumps(fused, default=str) == json.dumps(separate, default=str)
+
+
+@pytest.mark.parametrize("chunks", [1, 4])
+def test_derived_data_is_built_once_per_column_and_chunk(builds, chunks):
+    frame = _frame()
+    rows = len(frame) // chunks
+    Pipeline(chunks=(frame.iloc[start:start + rows] for start in range(0, len(frame), rows))).run(ACTIONS)
+    # CheckNull and CheckPattern share the texts of name, CheckType and CheckDateInterval the dates of when
+    assert ("when", "datetimes", "%Y-%m-%d", False) in builds and ("name", "texts") in builds
+    assert set(builds.values()) == {chunks}
@@ -0,0 +1,73 @@
+import logging
+import numpy as np
+import pandas as pd
+import pytest
+from pipeline.pipeline import Pipeline
+from validation_processor import ValidationProcessor
+
+ACTIONS = [
+    {"CheckEnum": {"column": "sex", "allowed_values": ["M", "F"]}},
+    {"CheckRange": {"checks": [{"column": "age", "min": 0, "max": 99}]}},
+    {"CheckNull": {"column": ["name"]}},
+    {"CheckEnum": {"column": "name", "allowed_values": ["a", "b"]}},
+]
+WRITERS = {
+    "csv": lambda frame, path: frame.to_csv(path, index=False),
+    "parquet": lambda frame, path: frame.to_parquet(path, index=False),
+    "json": lambda frame, path: frame.to_json(path, orient="records", lines=True),
+    "xlsx": lambda frame, path: frame.to_excel(path, index=False),
+    "xml": lambda frame, path: frame.to_xml(path, index=False, parser="etree"),
+}
+
+
+def _frame(rows: int = 400) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    frame = pd.DataFrame({f"pad{i}": rng.random(rows) for i in range(10)})
+    frame.insert(2, "sex", rng.choice(["M", "F", "X"], rows))
+    frame.insert(5, "age", rng.integers(-5, 120, rows))
+    frame["name"] = rng.choice(["a", "b", "c", None], rows)
+    return frame
+
+
+def _processor(path: str, logs, **report) -> ValidationProcessor:
+    schema = {"storage": {"type": "local", "local": path}, "actions": ACTIONS, "report": {"details": report},
+              "cache": {"enabled": False}}
+    return ValidationProcessor(schema, logs, use_cache=False)
+
+
+def test_projection_covers_the_referenced_columns():
+    # a column checked by other actions than CheckEnum keeps the dtype the loader infers
+    assert Pipeline().projection(ACTIONS) == {"sex": "category", "age": None, "name": None}
+    numbers = [{"CheckEnum": {"column": "code", "allowed_values": ["1", "2"]}}]
+    assert Pipeline().projection(numbers) == {"code": None}
+
+
+@pytest.mark.parametrize("extension", list(WRITERS))
+def test_loaders_read_only_the_projected_columns(tmp_path, extension, logs, caplog):
+    path = str(tmp_path / f"people.{extension}")
+    WRITERS[extension](_frame(), path)
+    processor = _processor(path, logs)
+    projection = Pipeline().projection(ACTIONS)
+    with caplog.at_level(logging.INFO):
+        loaded = processor.load_file(filepath=path, projection=projection)
+        chunks = list(processor.iter_file(filepath=path, chunksize=150, projection=projection))
+    for frame in [loaded] + chunks:
+        # in the order of the file, the enum only column as a category
+        assert list(frame.columns) == ["sex", "age", "name"]
+        assert isinstance(frame["sex"].dtype, pd.CategoricalDtype) and frame["age"].dtype.kind in "if"
+    if extension in ("csv", "parquet"):
+        assert "Reading 3 of 13 columns, skipped 10 columns" in caplog.text
+
+
+def test_details_hold_whole_rows_on_request(tmp_path, logs):
+    path = str(tmp_path / "people.csv")
+    _frame().to_csv(path, index=False)
+    projected = _processor(path, logs, mode="head", limit=3).validate_file(path)
+    full = _processor(path, logs, mode="head", limit=3, full_rows=True).validate_file(path)
+    assert [report["Invalid_count"] for report in projected] == [report["Invalid_count"] for report in full]
+    assert all(report["Invalid_count"] for report in full)
+    for short, whole in zip(projected, full):
+        assert [list(row) for row in short["Details"]] == [["sex", "age", "name"]] * 3
+        assert [list(row) for row in whole["Details"]] == [list(_frame().columns)] * 3
+        assert [{column: row[column] for column in ("sex", "age")} for row in short["Details"]] == \
+               [{column: row[column] for column in ("sex", "age")} for row in whole["Details"]]
@@ -0,0 +1,72 @@
+import os
+import uuid
+import pytest
+from environments.environments import Environments
+from services.s3_connection import S3Connection
+from validation_processor import ValidationProcessor
+
+moto = pytest.importorskip("moto")
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """
+    S3 connection to a fresh bucket, on the stand-in of S3_ENDPOINT_URL (e.g. a moto or MinIO
+    server) when it is set, on moto in process otherwise
+    """
+    monkeypatch.setenv("S3_BUCKET", f"dq-tests-{uuid.uuid4().hex[:8]}")
+    monkeypatch.setenv("S3_REGION", os.getenv("S3_REGION") or "us-east-1")
+    if Environments.get_s3_endpoint_url():
+        monkeypatch.setenv("S3_ACCESS_KEY", os.getenv("S3_ACCESS_KEY") or "testing")
+        monkeypatch.setenv("S3_SECRET_KEY", os.getenv("S3_SECRET_KEY") or "testing")
+        mock = None
+    else:
+        monkeypatch.setenv("S3_ACCESS_KEY", "testing")
+        monkeypatch.setenv("S3_SECRET_KEY", "testing")
+        mock = moto.mock_aws()
+        mock.start()
+    connection = S3Connection()
+    connection.client.create_bucket(Bucket=connection.bucket)
+    yield connection
+    if mock is not None:
+        mock.stop()
+    else:
+        for key in connection.get_list_files():
+            connection.client.delete_object(Bucket=connection.bucket, Key=key)
+        connection.client.delete_bucket(Bucket=connection.bucket)
+
+
+def _put(s3: S3Connection, keys):
+    for key in keys:
+        s3.client.put_object(Bucket=s3.bucket, Key=key, Body=b"id\n1\n")
+
+
+def test_listing_follows_every_page(s3):
+    # list_objects_v2 returns at most 1000 keys per page
+    keys = [f"landing/part-{i:04d}.csv" for i in range(1005)]
+    _put(s3, keys + ["other/part-0000.csv"])
+    assert sorted(s3.get_list_files(prefix="landing/")) == keys
+
+
+def test_prefix_and_glob(s3, logs):
+    _put(s3, ["landing/2025-01-01/part-0.csv", "landing/2025-01-01/part-1.csv.gz",
+              "landing/2025-01-01/part-2.avro", "landing/2025-01-01/_SUCCESS",
+              "landing/2025-01-02/part-0.csv", "landing/2025-01-02/part-1.parquet"])
+    schema = {"storage": {"type": "aws", "aws": "landing/"}, "actions": [], "cache": {"enabled": False}}
+    processor = ValidationProcessor(schema, logs)
+    assert processor._list_files("landing/2025-01-01/") == ["landing/2025-01-01/part-0.csv",
+                                                             "landing/2025-01-01/part-1.csv.gz"]
+    assert processor._list_files("landing/*/part-0.*") == ["landing/2025-01-01/part-0.csv",
+                                                           "landing/2025-01-02/part-0.csv"]
+    assert processor._list_files("landing/2025-01-0[2]/*.parquet") == ["landing/2025-01-02/part-1.parquet"]
+
+
+def test_ranged_reads_return_the_object(s3):
+    data = bytes(range(256)) * 40
+    s3.client.put_object(Bucket=s3.bucket, Key="data.bin", Body=data)
+    assert s3.read_file("data.bin", part_size=1000, concurrency=3) == data
+    with s3.open_stream("data.bin", part_size=1000, concurrency=3) as stream:
+        stream.seek(999)
+        assert stream.read(1002) == data[999:2001]
+        stream.seek(0)
+        assert stream.read() == data
@@ -0,0 +1,54 @@
+import pandas as pd
+import pytest
+from batch_runner import BatchRunner
+from validation_processor import ValidationProcessor
+
+
+def _schema(path: str, execution: dict) -> dict:
+    return {
+        "storage": {"type": "local", "local": path},
+        "actions": [{"CheckNull": {"column": ["value"]}}],
+        "execution": execution,
+        "cache": {"enabled": False},
+    }
+
+
+@pytest.fixture
+def people(tmp_path) -> str:
+    path = tmp_path / "people.csv"
+    pd.DataFrame({
+        "id": range(1000),
+        "grp": ["a", "b", "c", "d"] * 250,
+        "value": [None if i % 10 == 0 else i for i in range(1000)],
+    }).to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.mark.parametrize("engine", ["pandas", "arrow"])
+@pytest.mark.parametrize("at_load", [True, False])
+def test_stratified_sample_on_column_not_read_by_actions(people, logs, engine, at_load):
+    sample = {"method": "stratified", "rows": 20, "column": "grp", "seed": 1, "at_load": at_load}
+    processor = ValidationProcessor(_schema(people, {"engine": engine, "sample": sample}), logs)
+    [report] = processor.validate_file(people)
+    assert report["Population_rows"] == 1000
+    assert report["Sampled_rows"] == 80
+    assert report["Confidence_interval"][0] <= 0.1 <= report["Confidence_interval"][1]
+
+
+def test_projection_holds_stratified_column(people, logs):
+    sample = {"method": "stratified", "rows": 20, "column": "grp"}
+    processor = ValidationProcessor(_schema(people, {"sample": sample}), logs)
+    actions = processor.schema["actions"]
+    assert set(processor._projection(None, actions, sample)) == {"value", "grp"}
+    assert set(processor._projection(None, actions, {"fraction": 0.5})) == {"value"}
+    assert processor._projection({"full_rows": True}, actions, sample) is None
+
+
+def test_batch_projection_holds_stratified_column(tmp_path, people, logs):
+    import yaml
+
+    config = tmp_path / "sampled.yml"
+    config.write_text(yaml.safe_dump(_schema(people, {"sample": {"method": "stratified", "rows": 20,
+                                                                  "column": "grp"}})))
+    runner = BatchRunner([config], logs, use_cache=False)
+    assert set(runner.projection(["sampled"])) == {"value", "grp"}
@@ -0,0 +1,109 @@
+import sqlite3
+import numpy as np
+import pandas as pd
+import pytest
+from environments.environments import Environments
+from validation_processor import ValidationProcessor
+
+ACTIONS = [
+    {"CheckNull": {"column": ["email", "sexo"]}},
+    {"CheckEnum": {"column": "sexo", "allowed_values": ["M", "F"]}},
+    {"CheckRange": {"checks": [{"column": "idade", "min": 0, "max": 120}]}},
+    {"CheckUnique": {"checks": [{"column": "code"}, {"column": ["sexo", "code"]}]}},
+]
+
+
+@pytest.fixture
+def people(tmp_path, monkeypatch):
+    rng = np.random.default_rng(0)
+    n = 2000
+    frame = pd.DataFrame({
+        "id": np.arange(n),
+        "email": rng.choice(["a@b.com", " ", None, "c@d.pt"], n),
+        "code": rng.integers(0, n, n),
+        "idade": rng.integers(-5, 130, n).astype(float),
+        "sexo": rng.choice(["M", "F", "X", None], n),
+    })
+    frame.loc[::13, "idade"] = np.nan
+    with sqlite3.connect(tmp_path / "people.db") as connection:
+        frame.to_sql("people", connection, index=False)
+    frame.to_csv(tmp_path / "people.csv", index=False)
+    monkeypatch.setenv("db_engine", "sqlite")
+    monkeypatch.setitem(Environments.db_configurations, "db_name", str(tmp_path / "people"))
+    return tmp_path
+
+
+def _run(storage: dict, details: dict, logs) -> list:
+    schema = {"storage": storage, "actions": ACTIONS, "report": {"details": details},
+              "execution": {"mode": "stream", "chunksize": 500}, "cache": {"enabled": False}}
+    return ValidationProcessor(schema, logs, use_cache=False).validate_file(storage[storage["type"]])
+
+
+def _values(rows: list) -> list:
+    # the database returns None for missing text, the CSV reader NaN
+    frame = pd.DataFrame(rows).astype(object)
+    return frame.where(frame.notna(), None).values.tolist()
+
+
+@pytest.mark.parametrize("details", [{"mode": "indices"}, {"mode": "head", "limit": 5}])
+def test_pushdown_matches_file(people, logs, details):
+    database = _run({"type": "db", "db": "people", "order_by": ["id"]}, details, logs)
+    csv = _run({"type": "local", "local": str(people / "people.csv")}, details, logs)
+    assert [(r["Action"], r["Column"], r["Invalid_count"]) for r in database] == \
+           [(r["Action"], r["Column"], r["Invalid_count"]) for r in csv]
+    assert all(r["Invalid_count"] for r in csv)
+    for db_report, csv_report in zip(database, csv):
+        if details["mode"] == "indices":
+            assert db_report["Details"] == csv_report["Details"]
+        else:
+            # the rows of the details have the columns of the file, in its order
+            assert [list(row) for row in db_report["Details"]] == [list(row) for row in csv_report["Details"]]
+            assert _values(db_report["Details"]) == _values(csv_report["Details"])
+
+
+def test_positions_follow_the_primary_key(people, logs, caplog):
+    with sqlite3.connect(people / "people.db") as connection:
+        connection.execute("CREATE TABLE keyed (code TEXT PRIMARY KEY, email TEXT)")
+        connection.executemany("INSERT INTO keyed VALUES (?, ?)", [("c", None), ("a", "x"), ("b", None)])
+        connection.execute("CREATE TABLE unkeyed (code TEXT, email TEXT)")
+    schema = {"actions": [{"CheckNull": {"column": ["email"]}}], "report": {"details": {"mode": "indices"}},
+              "cache": {"enabled": False}}
+    [report] = ValidationProcessor({**schema, "storage": {"type": "db", "db": "keyed"}}, logs).validate_file("keyed")
+    # rows numbered a, b, c whatever the order the table stores them in
+    assert report["Details"] == [1, 2]
+    assert "no order_by nor primary key" not in caplog.text
+    ValidationProcessor({**schema, "storage": {"type": "db", "db": "unkeyed"}}, logs).validate_file("unkeyed")
+    assert "unkeyed has no order_by nor primary key" in caplog.text
+
+
+def test_text_is_compared_whatever_the_collation(people, logs):
+    with sqlite3.connect(people / "people.db") as connection:
+        connection.execute("CREATE TABLE codes (id INTEGER PRIMARY KEY, code TEXT COLLATE NOCASE)")
+        connection.executemany("INSERT INTO codes VALUES (?, ?)", enumerate(["A", "a", "B", "b", "b"]))
+    pd.DataFrame({"id": range(5), "code": ["A", "a", "B", "b", "b"]}).to_csv(people / "codes.csv", index=False)
+    actions = [{"CheckEnum": {"column": "code", "allowed_values": ["A", "B"]}},
+               {"CheckUnique": {"checks": [{"column": "code"}]}}]
+    schema = {"actions": actions, "report": {"details": {"mode": "indices"}}, "cache": {"enabled": False}}
+    database = ValidationProcessor({**schema, "storage": {"type": "db", "db": "codes"}}, logs).validate_file("codes")
+    csv = ValidationProcessor({**schema, "storage": {"type": "local", "local": str(people)}}, logs) \
+        .validate_file(str(people / "codes.csv"))
+    assert [(r["Invalid_count"], r["Details"]) for r in database] == \
+           [(r["Invalid_count"], r["Details"]) for r in csv] == [(3, [1, 3, 4]), (2, [3, 4])]
+
+
+def test_text_is_checked_in_pandas_without_a_binary_collation():
+    from sqlalchemy import Integer, String, column, table
+    from pipeline.actions.checkenum import CheckEnum
+    from pipeline.actions.checkunique import CheckUnique
+    from pipeline.pipeline import Pipeline
+    from pipeline.sql import SqlColumns
+
+    relation = table("people", column("sexo", String), column("code", Integer))
+    enum = CheckEnum({"column": "sexo", "allowed_values": ["M", "F"]}, Pipeline())
+    unique = CheckUnique({"checks": [{"column": "code"}, {"column": ["sexo", "code"]}]}, Pipeline())
+    for dialect in ("mssql", "mysql"):
+        columns = SqlColumns(relation.c, dialect)
+        assert enum.sql_predicate(enum.checks()[0], columns) is None
+        assert unique.sql_predicate(unique.checks()[0], columns) is not None
+        assert unique.sql_predicate(unique.checks()[1], columns) is None
+    assert "COLLATE" in str(enum.sql_predicate(enum.checks()[0], SqlColumns(relation.c, "postgresql")))
@@ -0,0 +1,140 @@
+import io
+import pandas as pd
+import pytest
+from utils.fileloader import FileLoader
+
+
+@pytest.fixture
+def loader(logs) -> FileLoader:
+    return FileLoader(None, logs, local_mode=True)
+
+
+def _frame() -> pd.DataFrame:
+    # "abc" falls in the second chunk of 2 rows, the ages are numbers in the first and last chunks
+    return pd.DataFrame({"id": range(5), "idade": ["1", "2", "3", "abc", "5"]})
+
+
+def test_xml_chunks_take_the_types_of_the_whole_file(loader, tmp_path):
+    path = tmp_path / "people.xml"
+    _frame().to_xml(path, index=False, parser="etree")
+    whole = loader.load_file(str(path))
+    chunks = list(loader.iter_file(str(path), chunksize=2))
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert all(chunk["idade"].dtype == object for chunk in chunks)
+    assert all(chunk["id"].dtype == whole["id"].dtype for chunk in chunks)
+    pd.testing.assert_frame_equal(pd.concat(chunks), whole)
+
+
+def test_xml_stream_source_is_typed_on_the_whole_file(loader, tmp_path):
+    path = tmp_path / "people.xml"
+    _frame().to_xml(path, index=False, parser="etree")
+    with open(path, "rb") as stream:
+        chunks = list(loader._iter_xml(stream, 2))
+    pd.testing.assert_frame_equal(pd.concat(chunks), loader.load_file(str(path)))
+
+
+def _schema(path: str, execution: dict) -> dict:
+    return {
+        "storage": {"type": "local", "local": path},
+        "actions": [{"CheckType": {"checks": [{"column": "idade", "type": "int"}]}},
+                    {"CheckNull": {"column": ["idade", "name"]}}],
+        "execution": execution,
+        "cache": {"enabled": False},
+    }
+
+
+def _write_csv(frame, path):
+    frame.to_csv(path, index=False)
+
+
+def _write_ndjson(frame, path):
+    import json
+
+    # ages are numbers where they can be and null names are missing keys, as JSON writers give them
+    with open(path, "w") as f:
+        for record in frame.to_dict("records"):
+            record["idade"] = int(record["idade"]) if record["idade"].isdigit() else record["idade"]
+            f.write(json.dumps({key: value for key, value in record.items() if value is not None}) + "\n")
+
+
+def _write_xml(frame, path):
+    frame.to_xml(path, index=False, parser="etree")
+
+
+@pytest.mark.parametrize("extension, write", [(".csv", _write_csv), (".json", _write_ndjson), (".xml", _write_xml)])
+def test_streamed_counts_match_in_memory(logs, tmp_path, extension, write):
+    from validation_processor import ValidationProcessor
+
+    path = str(tmp_path / f"people{extension}")
+    frame = _frame()
+    # "name" is null in the whole first chunk
+    frame["name"] = [None, None, "c", None, "e"]
+    write(frame, path)
+
+    def counts(execution: dict):
+        reports = ValidationProcessor(_schema(path, execution), logs).validate_file(path)
+        return [(report["Action"], report["Column"], report["Invalid_count"]) for report in reports]
+
+    assert counts({"mode": "stream", "chunksize": 2}) == counts({})
+
+
+class _Tracked(io.BytesIO):
+    """Stream recording how far it was read."""
+
+    furthest = 0
+
+    def read(self, *args):
+        data = super().read(*args)
+        self.furthest = max(self.furthest, self.tell())
+        return data
+
+    def readinto(self, buffer):
+        size = super().readinto(buffer)
+        self.furthest = max(self.furthest, self.tell())
+        return size
+
+
+# 200,000 rows, the age of one row near the end is text
+ROWS = {
+    ".csv": lambda ages: "id,idade\n" + "".join(f"{i},{age}\n" for i, age in enumerate(ages)),
+    ".json": lambda ages: "".join(f'{{"id": {i}, "idade": {age}}}\n' for i, age in enumerate(ages)),
+    ".xml": lambda ages: "<data>" + "".join(f"<row><id>{i}</id><idade>{age}</idade></row>" for i, age in enumerate(ages))
+                         + "</data>",
+}
+
+
+@pytest.mark.parametrize("extension", list(ROWS))
+def test_first_chunk_reads_only_the_head_of_the_file(loader, extension):
+    ages = [str(i % 90) for i in range(200_000)]
+    ages[190_000] = '"abc"' if extension == ".json" else "abc"
+    stream = _Tracked(ROWS[extension](ages).encode())
+    read = {".csv": loader._iter_csv, ".json": loader._iter_json, ".xml": loader._iter_xml}[extension]
+    chunks = read(stream, 1000)
+    assert len(next(chunks)) == 1000
+    assert stream.furthest < len(stream.getvalue()) / 2
+    chunks.close()
+
+
+def test_types_widen_past_the_typed_rows(logs, tmp_path, caplog):
+    path = tmp_path / "people.csv"
+    _frame().to_csv(path, index=False)
+    loader = FileLoader(None, logs, local_mode=True, read_options={"stream_type_rows": 2})
+    chunks = list(loader.iter_file(str(path), chunksize=2))
+    assert [chunk["idade"].dtype.kind for chunk in chunks] == ["i", "O", "O"]
+    assert chunks[2]["idade"].tolist() == ["5"]
+    assert "Column idade read as int64 in the first 2 rows is read as object from row 2" in caplog.text
+
+
+def test_excel_streamed_counts_match_in_memory(logs, tmp_path):
+    from validation_processor import ValidationProcessor
+
+    pytest.importorskip("openpyxl")
+    path = str(tmp_path / "people.xlsx")
+    # the null makes the column floats, in the last chunk only when it is read 2 rows at a time
+    pd.DataFrame({"idade": [1, 2, 3, 4, None, 6]}).to_excel(path, index=False)
+
+    def counts(execution: dict):
+        schema = {**_schema(path, execution), "actions": [{"CheckType": {"checks": [{"column": "idade", "type": "int"}]}}]}
+        return [report["Invalid_count"] for report in ValidationProcessor(schema, logs).validate_file(path)]
+
+    assert counts({"mode": "stream", "chunksize": 2}) == counts({}) == [6]
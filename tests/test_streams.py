@@ -0,0 +1,57 @@
+import io
+import threading
+import pytest
+from utils.streams import RangedReader, download_parts
+
+DATA = bytes(range(256)) * 4 + b"tail"
+
+
+class _Ranges:
+    """
+    Fetch of the ranges of DATA, recording the ranges asked for
+    """
+
+    def __init__(self):
+        self.ranges = []
+        self._lock = threading.Lock()
+
+    def __call__(self, start: int, end: int) -> bytes:
+        with self._lock:
+            self.ranges.append((start, end))
+        return DATA[start:end]
+
+
+@pytest.mark.parametrize("part_size", [1, 7, 256, len(DATA) - 1, len(DATA), len(DATA) + 1])
+def test_parts_are_joined_at_their_edges(part_size):
+    fetch = _Ranges()
+    assert download_parts(len(DATA), fetch, part_size, concurrency=3) == DATA
+    # every byte is asked for once, by ranges that end where the next one starts
+    assert sorted(fetch.ranges) == [(start, min(start + part_size, len(DATA)))
+                                    for start in range(0, len(DATA), part_size)]
+
+
+@pytest.mark.parametrize("part_size", [1, 7, 256, len(DATA) + 1])
+@pytest.mark.parametrize("read_size", [1, 5, 256, 4096])
+def test_ranged_reader_reads_across_parts(part_size, read_size):
+    reader = RangedReader(len(DATA), _Ranges(), part_size, concurrency=2)
+    read = bytearray()
+    while True:
+        block = reader.read(read_size)
+        if not block:
+            break
+        read += block
+    reader.close()
+    assert read == DATA
+
+
+def test_ranged_reader_seeks_into_any_part():
+    fetch = _Ranges()
+    with io.BufferedReader(RangedReader(len(DATA), fetch, part_size=7, concurrency=2), buffer_size=16) as stream:
+        for position in (0, 6, 7, 8, 500, 13, len(DATA) - 3):
+            stream.seek(position)
+            assert stream.read(10) == DATA[position:position + 10]
+        stream.seek(-4, io.SEEK_END)
+        assert stream.read() == b"tail"
+        assert stream.read() == b""
+    # only the parts around the reads were downloaded, never the whole object
+    assert len(set(fetch.ranges)) < len(DATA) // 7
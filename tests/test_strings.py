@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pipeline.pipeline import Pipeline
+from pipeline.strings import StringView, blank_mask, compile_pattern, match_mask
+
+COLUMNS = {
+    "text": pd.Series(["ab1", " ", "", None, np.nan, "AB2", "ab1", "\t", "x y"] * 3, dtype=object),
+    "mixed": pd.Series([1, 1.0, True, "1", None, np.nan, pd.NA, -0.0, 0.0, "nan"], dtype=object),
+    "floats": pd.Series([1.5, np.nan, -0.0, 0.0, 12.0]),
+    "ints": pd.Series([1, 22, 333]),
+    "bools": pd.Series([True, False]),
+    "category": pd.Series(["ab1", None, " ", "ab1"], dtype="category"),
+    "string": pd.Series(["ab1", None, " ", "AB2"], dtype="string"),
+    "pyarrow": pd.Series(["ab1", None, " ", "AB2"], dtype="string[pyarrow]"),
+    "dates": pd.Series(pd.to_datetime(["2024-01-01", None])),
+}
+PATTERNS = [r"^[a-z]+\d$", r"\d", r"(?i)ab", r"nan|None", r"1(\.0)?$", r"\s*$"]
+
+
+@pytest.mark.parametrize("engine", ["re", "re2"])
+@pytest.mark.parametrize("pattern", PATTERNS)
+@pytest.mark.parametrize("name", [name for name in COLUMNS if name != "dates"])
+def test_match_is_str_match_of_the_text(name, pattern, engine):
+    values = COLUMNS[name]
+    expected = values.astype(str).str.match(pattern).to_numpy(dtype=bool)
+    assert match_mask(StringView.build(values), pattern, engine).tolist() == expected.tolist()
+
+
+def test_dates_have_no_view():
+    # their text is not str() of their values, the pattern runs on astype(str)
+    assert StringView.build(COLUMNS["dates"]) is None
+
+
+@pytest.mark.parametrize("name", list(COLUMNS))
+def test_blanks_are_nulls_and_whitespace(name):
+    values = COLUMNS[name]
+    # the mask CheckNull built with astype(str), the nulls of every dtype are reported as nulls
+    expected = values.isnull().to_numpy() | (values.astype(str).str.strip() == "").to_numpy(dtype=bool)
+    assert blank_mask(values, StringView.build(values)).tolist() == expected.tolist()
+
+
+def test_patterns_are_compiled_once():
+    compile_pattern.cache_clear()
+    frame = pd.DataFrame({"code": ["a1", "b", None] * 10})
+    checks = [{"column": "code", "pattern": r"^[a-z]\d$"}] * 3
+    chunks = (frame.iloc[start:start + 10] for start in range(0, len(frame), 10))
+    [reports] = Pipeline(chunks=chunks).run_actions([{"CheckPattern": {"checks": checks}}])
+    assert [report["Invalid_count"] for report in reports] == [20] * 3
+    assert compile_pattern.cache_info().misses == 1
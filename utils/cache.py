@@ -0,0 +1,108 @@
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+DEFAULT_CACHE_PATH: str = ".cache/dq"
+DEFAULT_CACHE_SIZE: int = 1024 ** 3
+# bumped when the reports of an action can change for the same data and configuration
+CACHE_VERSION: int = 1
+
+
+class ResultCache:
+    """
+    Persistent local cache of the reports of each action and of the downloaded files.
+
+    Entries are addressed by the hash of what produced them: the identity of the file
+    (ETag or mtime and size, or the hash of its content) and the configuration of the action,
+    so a changed file or an edited action simply misses the cache. The least recently used
+    entries are evicted once the cache is larger than `max_size` bytes.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_CACHE_PATH, max_size: int = DEFAULT_CACHE_SIZE):
+        self.path = Path(path)
+        self.max_size = int(max_size)
+        self._lock = threading.Lock()
+        (self.path / "reports").mkdir(parents=True, exist_ok=True)
+        (self.path / "files").mkdir(parents=True, exist_ok=True)
+        # the limit may have been lowered since the last run
+        self._evict()
+
+    @staticmethod
+    def key(*parts) -> str:
+        """
+        Function to build the address of an entry from the values that produced it
+        """
+        payload = json.dumps([CACHE_VERSION, *parts], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _touch(self, path: Path) -> bool:
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _write(self, path: Path, data) -> Optional[Path]:
+        if len(data) > self.max_size:
+            return None
+        tmp = path.with_name(f".{path.name}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+        self._evict(keep=path)
+        return path
+
+    def get_reports(self, key: str) -> Optional[List[Dict]]:
+        """
+        Function to return the cached reports of an action, None when they are not cached
+        """
+        path = self.path / "reports" / f"{key}.json"
+        if not self._touch(path):
+            return None
+        with open(path, "r") as f:
+            return json.load(f)
+
+    def put_reports(self, key: str, reports: List[Dict]):
+        """
+        Function to store the reports of an action, unless they are larger than the whole cache
+        """
+        data = json.dumps(reports, ensure_ascii=True, default=str).encode("utf-8")
+        self._write(self.path / "reports" / f"{key}.json", data)
+
+    def get_file(self, key: str, suffix: str) -> Optional[str]:
+        """
+        Function to return the local path of a cached file, None when it is not cached
+        """
+        path = self.path / "files" / f"{key}{suffix}"
+        return str(path) if self._touch(path) else None
+
+    def put_file(self, key: str, suffix: str, data) -> Optional[str]:
+        """
+        Function to store the content of a downloaded file and return its local path,
+        None when it is larger than the whole cache
+        """
+        path = self._write(self.path / "files" / f"{key}{suffix}", data)
+        return str(path) if path is not None else None
+
+    def _evict(self, keep: Optional[Path] = None):
+        """
+        Function to delete the least recently used entries until the cache fits in max_size
+        """
+        with self._lock:
+            entries = []
+            for folder in ("reports", "files"):
+                for entry in os.scandir(self.path / folder):
+                    if entry.is_file() and not entry.name.startswith("."):
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, stat.st_size, Path(entry.path)))
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries, key=lambda entry: entry[0]):
+                if total <= self.max_size:
+                    break
+                if path == keep:
+                    continue
+                path.unlink(missing_ok=True)
+                total -= size
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta
+from typing import List, Set, Tuple
+
+# name, lowest and highest value of the fields of a cron expression, 0 and 7 are both Sunday
+_FIELDS: Tuple[Tuple[str, int, int], ...] = (
+    ("minute", 0, 59),
+    ("hour", 0, 23),
+    ("day", 1, 31),
+    ("month", 1, 12),
+    ("weekday", 0, 7)
+)
+_ALIASES = {
+    "@hourly": "0 * * * *",
+    "@daily": "0 0 * * *",
+    "@weekly": "0 0 * * 0",
+    "@monthly": "0 0 1 * *"
+}
+
+
+def _parse_field(text: str, name: str, low: int, high: int) -> Set[int]:
+    """
+    Function to return the values of one field: *, a value, a range (a-b) or a list of them,
+    each with an optional step (*/15, 1-10/2)
+    """
+    values: Set[int] = set()
+    for part in text.split(","):
+        expression, _, step = part.partition("/")
+        if expression == "*":
+            start, end = low, high
+        elif "-" in expression:
+            start, end = (int(value) for value in expression.split("-", 1))
+        else:
+            start = end = int(expression)
+        if not (low <= start <= end <= high) or int(step or 1) < 1:
+            raise ValueError(f"Invalid {name} in cron expression: {part}")
+        values.update(range(start, end + 1, int(step or 1)))
+    return {value % 7 for value in values} if name == "weekday" else values
+
+
+class CronSchedule:
+    """
+    Schedule given by a cron expression of five fields (minute hour day month weekday), or one of
+    @hourly, @daily, @weekly and @monthly. Like cron, when both the day and the weekday are
+    restricted a time matches when either of them matches.
+    """
+
+    def __init__(self, expression: str):
+        self.expression = expression
+        fields = _ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"A cron expression has 5 fields: {expression}")
+        parsed: List[Set[int]] = [_parse_field(text, *spec) for text, spec in zip(fields, _FIELDS)]
+        self.minutes, self.hours, self.days, self.months, self.weekdays = parsed
+        self._any_day = fields[2] == "*"
+        self._any_weekday = fields[4] == "*"
+
+    def matches(self, moment: datetime) -> bool:
+        """
+        Function to tell if the minute of a moment is in the schedule
+        """
+        if moment.minute not in self.minutes or moment.hour not in self.hours or moment.month not in self.months:
+            return False
+        day = moment.day in self.days
+        # isoweekday is 1 (Monday) to 7 (Sunday), cron counts from 0 (Sunday)
+        weekday = moment.isoweekday() % 7 in self.weekdays
+        if self._any_day or self._any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment: datetime) -> datetime:
+        """
+        Function to return the first minute of the schedule after a moment
+        """
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # every schedule matches at least once in 4 years (29th of February)
+        for _ in range(4 * 366 * 24 * 60):
+            if self.matches(candidate):
+                return candidate
+            candidate += timedelta(minutes=1)
+        raise ValueError(f"Cron expression never matches: {self.expression}")
@@ -0,0 +1,90 @@
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+import pandas as pd
+
+DEFAULT_MEMORY_LIMIT: int = 2 * 1024 ** 3
+
+
+def dataset_size(data: Any) -> Optional[int]:
+    """
+    Function to return the memory used by a loaded dataset in bytes, None when it is not a
+    DataFrame or an Arrow Table (it is then never cached)
+    """
+    if isinstance(data, pd.DataFrame):
+        return int(data.memory_usage(index=True, deep=True).sum())
+    if hasattr(data, "nbytes") and hasattr(data, "schema"):
+        return int(data.nbytes)
+    return None
+
+
+class DatasetCache:
+    """
+    In memory cache of the datasets loaded by a process, shared by the configs validating them.
+
+    A dataset is loaded once even when many threads ask for it at the same time: the first one
+    loads it, the others wait for it. The least recently used datasets are evicted once the cache
+    holds more than `max_bytes`, a dataset larger than the whole cache is returned without being kept.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MEMORY_LIMIT):
+        self.max_bytes = int(max_bytes)
+        self.hits = 0
+        self.loads = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: Dict[Hashable, int] = {}
+        self._loading: Dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def size(self) -> int:
+        return sum(self._sizes.values())
+
+    def _get(self, key: Hashable):
+        with self._lock:
+            if key not in self._entries:
+                return None, False
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key], True
+
+    def _put(self, key: Hashable, data: Any):
+        size = dataset_size(data)
+        if size is None or size > self.max_bytes:
+            return
+        with self._lock:
+            self._entries[key] = data
+            self._sizes[key] = size
+            while self.size > self.max_bytes:
+                evicted, _ = self._entries.popitem(last=False)
+                self._sizes.pop(evicted)
+
+    def get_or_load(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        """
+        Function to return the dataset of a key, loaded with `load` when it is not in the cache
+
+        :params key: Address of the dataset (e.g. storage, path and identity of the file)
+        :params load: Function loading the dataset
+        """
+        data, found = self._get(key)
+        if found:
+            return data
+        with self._lock:
+            loading = self._loading.setdefault(key, threading.Lock())
+        with loading:
+            # loaded by another thread while this one was waiting
+            data, found = self._get(key)
+            if found:
+                return data
+            data = load()
+            with self._lock:
+                self.loads += 1
+            self._put(key, data)
+        with self._lock:
+            self._loading.pop(key, None)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
@@ -1,33 +1,470 @@
-from typing import Any, Dict, List
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Union
 from pathlib import Path
 from logging import Logger
-from io import BytesIO
+from io import BytesIO, IOBase, SEEK_END, StringIO
+from itertools import chain, islice
+import csv
+from datetime import date, datetime
+import hashlib
 import json
+import math
+import mmap
+import os
+import re
+import shutil
+import tempfile
+import time
+from contextlib import nullcontext
+import numpy as np
 import pandas as pd
 import xml.etree.ElementTree as ET
 from typing import Optional
+from services.local_connection import LocalConnection
+from utils.cache import ResultCache
+from utils.memory import PeakMemory
+from utils.metrics import CheckTimer, Metrics
+from utils.sampling import Sampler
+from utils.streams import DecompressingReader, as_stream, borrow, decompress
+
+# local path, raw binary data (bytes, bytearray, mmap) or stream of a file
+Source = Union[str, bytes, bytearray, memoryview, mmap.mmap, IOBase]
+# columns to read, with the dtype to read them with (None to infer it)
+Projection = Optional[Dict[str, Optional[str]]]
 
 class UnsupportedFileTypeError(Exception):
     """Custom exception raised when an unsupported file type is provided."""
     pass
 
 
+def _json_loads():
+    """
+    Function to return the fastest JSON parser installed, orjson or the json module
+    """
+    try:
+        import orjson
+    except ImportError:
+        return json.loads
+    return orjson.loads
+
+
+def _flatten_record(record: Dict, separator: str, max_level: Optional[int], prefix: str = "",
+                    level: int = 0) -> Dict:
+    """
+    Function to flatten the nested objects of a record into keys joined by `separator`
+    ({"a": {"b": 1}} -> {"a.b": 1}), lists are kept as values
+    """
+    flat: Dict = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value and (max_level is None or level < max_level):
+            flat.update(_flatten_record(value, separator, max_level, f"{name}{separator}", level + 1))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _flatten_table(table, separator: str, max_level: Optional[int], projection: Projection):
+    """
+    Function to flatten the struct columns of an Arrow Table into dotted columns and keep the
+    columns of the projection, the projected columns missing from the table are null
+    """
+    import pyarrow as pa
+
+    level = 0
+    while any(pa.types.is_struct(field.type) for field in table.schema) and (max_level is None or level < max_level):
+        table = table.flatten()
+        level += 1
+    if separator != ".":
+        table = table.rename_columns([name.replace(".", separator) for name in table.column_names])
+    if projection is None:
+        return table
+    columns = {name: table.column(name) if name in table.column_names else pa.nulls(table.num_rows)
+               for name in projection}
+    return pa.table(columns)
+
+
+def _frame_to_table(frame: pd.DataFrame):
+    """
+    Function to convert a DataFrame to an Arrow Table, the columns mixing types (an invalid value
+    in a column of numbers) are converted as text
+    """
+    import pyarrow as pa
+
+    try:
+        return pa.Table.from_pandas(frame, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        columns = {}
+        for name in frame.columns:
+            try:
+                columns[name] = pa.array(frame[name], from_pandas=True)
+            except (pa.ArrowInvalid, pa.ArrowTypeError):
+                columns[name] = pa.array(frame[name].map(lambda value: value if value is None else str(value)),
+                                         type=pa.string(), from_pandas=True)
+        return pa.table(columns)
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _xml_value(element: ET.Element) -> Dict:
+    """
+    Function to return the columns of a record element: its attributes and the text of its
+    children, the attributes and children of a child as dotted columns and repeated children
+    as a list. A record without attributes nor children is its own text.
+    """
+    if not len(element) and not element.attrib:
+        return {element.tag: element.text}
+    values: Dict = dict(element.attrib)
+    if any("}" in name for name in values):
+        values = {_local_name(name): value for name, value in values.items()}
+    for child in element:
+        if not len(child) and not child.attrib:
+            nested = ((child.tag, child.text),)
+        else:
+            nested = [(f"{child.tag}.{name}", value) for name, value in _xml_value(child).items() if name != child.tag]
+            if not len(child):
+                nested.insert(0, (child.tag, child.text))
+        for name, value in nested:
+            if name not in values:
+                values[name] = value
+            elif isinstance(values[name], list):
+                values[name].append(value)
+            else:
+                values[name] = [values[name], value]
+    return values
+
+
+def _xml_field(element: ET.Element, path: str) -> Optional[str]:
+    """
+    Function to return the value of a field of a record: "child/grandchild" (text),
+    "@attribute" or "child/@attribute"
+    """
+    path, _, attribute = path.partition("@")
+    path = path.rstrip("/")
+    target = element.find(path) if path else element
+    if target is None:
+        return None
+    if attribute:
+        return next((value for name, value in target.attrib.items() if _local_name(name) == attribute), None)
+    return target.text
+
+
+def _iter_xml_records(stream, record_path: Optional[List[str]], fields: Optional[Dict[str, str]]) -> Iterator[Dict]:
+    """
+    Function to yield the records of an XML document as dicts, parsed incrementally. Namespaces
+    are dropped from the tags, an element is removed from the tree once it is read.
+
+    :params stream: Binary stream of the document
+    :params record_path: Tags ending the path of a record element, None for the children of the root
+    :params fields: Column and path of each field, None for every attribute and child
+    """
+    # open elements outside of the records and their tags
+    stack: List[ET.Element] = []
+    tags: List[str] = []
+    # depth in the record being parsed, 0 outside of the records, its elements are kept until it ends
+    inside = 0
+    namespaced = False
+    size = len(record_path) if record_path else 0
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+        if inside:
+            inside += 1 if event == "start" else -1
+            if inside:
+                continue
+            if namespaced:
+                for child in element.iter():
+                    child.tag = _local_name(child.tag)
+            yield _xml_value(element) if fields is None else \
+                {column: _xml_field(element, path) for column, path in fields.items()}
+        elif event == "start":
+            if "}" in element.tag:
+                namespaced = True
+            tags.append(_local_name(element.tag))
+            if tags[-size:] == record_path if record_path else len(tags) == 2:
+                inside = 1
+                tags.pop()
+            else:
+                stack.append(element)
+            continue
+        else:
+            stack.pop()
+            tags.pop()
+        if stack:
+            # read, or outside of any record, it is never needed again
+            stack[-1].remove(element)
+
+
+def _parse_numbers(frame: pd.DataFrame, text: Tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    Function to convert the text columns whose every value is a number, as a CSV reader would,
+    the columns in `text` are kept as text
+    """
+    for name in frame.columns:
+        column = frame[name]
+        if column.dtype != object or name in text:
+            continue
+        try:
+            frame[name] = pd.to_numeric(column)
+        except (ValueError, TypeError):
+            continue
+    return frame
+
+
+def _common_type(found: set):
+    """
+    Function to return the type of a column whose values have the types in `found`: a single type
+    is kept, numbers of several types are numbers of the widest type and any other mix (e.g.
+    numbers and text) is text
+    """
+    if len(found) == 1:
+        return next(iter(found))
+    if all(dtype.kind in "iuf" for dtype in found):
+        return np.result_type(*found)
+    return np.dtype(object)
+
+
+def _stream_types(chunks: List[pd.DataFrame]) -> Dict:
+    """
+    Function to return the type a reader of the chunks at once gives each column, from the types
+    it has in each chunk, a column missing from a chunk counts as a column of nulls (floats)
+    """
+    types: Dict[str, set] = {}
+    for i, frame in enumerate(chunks):
+        for name in types.keys() - set(frame.columns):
+            # a column missing from a chunk is null in its rows, like a column of floats
+            types[name].add(np.dtype("float64"))
+        for name, dtype in frame.dtypes.items():
+            types.setdefault(name, {np.dtype("float64")} if i else set()).add(dtype)
+    return {name: _common_type(found) for name, found in types.items()}
+
+
+def _conform(frame: pd.DataFrame, dtypes: Dict) -> pd.DataFrame:
+    """
+    Function to give the columns of a chunk the types of the stream, the columns missing from the
+    chunk are added as nulls. A chunk whose column does not fit the type of the stream widens it in
+    `dtypes` for the next chunks: integers become floats when it holds floats or nulls and numbers
+    become text when it holds text. The columns typed None are kept as they are read.
+    """
+    for name in frame.columns:
+        if name not in dtypes:
+            # the column was null in the rows before the chunk
+            dtypes[name] = _common_type({frame[name].dtype, np.dtype("float64")})
+    if list(frame.columns) != list(dtypes):
+        frame = frame.reindex(columns=list(dtypes))
+    for name, dtype in dtypes.items():
+        column = frame[name]
+        if dtype is None or column.dtype == dtype:
+            continue
+        if column.notna().any():
+            dtype = _common_type({column.dtype, dtype})
+        elif dtype.kind in "iub":
+            # nulls only fit floats (or text for booleans)
+            dtype = np.dtype("float64") if dtype.kind != "b" else np.dtype(object)
+        dtypes[name] = dtype
+        if column.dtype != dtype:
+            frame[name] = column.astype(dtype)
+    return frame
+
+
+def _declared_types(frame: pd.DataFrame, projection: Projection) -> pd.DataFrame:
+    """
+    Function to give the columns of a frame built from records the dtypes of the projection,
+    readers that take a dtype (CSV, Parquet) are given it instead
+    """
+    dtypes: Dict = {col: dtype for col, dtype in (projection or {}).items() if dtype and col in frame.columns}
+    return frame.astype(dtypes) if dtypes else frame
+
+
+def _cell_range(text: Optional[str]) -> Tuple[Optional[int], Optional[int], Optional[int], Optional[int]]:
+    """
+    Function to return the first column, first row, last column and last row (from 1, None when
+    open) of a range of cells: "B3:H5000", "B:H", "3:5000" or "B3:H"
+    """
+    if not text:
+        return None, None, None, None
+    bounds = []
+    for cell in text.upper().split(":", 1) if ":" in text else [text.upper(), text.upper()]:
+        match = re.fullmatch(r"\$?([A-Z]*)\$?(\d*)", cell.strip())
+        if match is None:
+            raise ValueError(f"Invalid range of cells: {text}")
+        letters, digits = match.groups()
+        column = 0
+        for letter in letters:
+            column = column * 26 + ord(letter) - ord("A") + 1
+        bounds.append((column or None, int(digits) if digits else None))
+    (min_col, min_row), (max_col, max_row) = bounds
+    return min_col, min_row, max_col, max_row
+
+
+NAN = float("nan")
+# text read as a missing value, the default of pandas readers
+NA_VALUES = frozenset({
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN",
+    "<NA>", "N/A", "NA", "NULL", "NaN", "None", "n/a", "nan", "null"
+})
+
+
+def _excel_cell(cell):
+    # missing cells are NaN, as in the frames of pd.read_excel
+    return NAN if cell is None or (type(cell) is str and cell in NA_VALUES) else cell
+
+
+def _calamine_cell(cell):
+    """
+    Function to return a cell read by calamine as openpyxl reads it: empty cells are None
+    instead of "", whole numbers int and dates datetime
+    """
+    if cell == "":
+        return None
+    if type(cell) is float:
+        return int(cell) if cell.is_integer() else cell
+    if type(cell) is date:
+        return datetime(cell.year, cell.month, cell.day)
+    return cell
+
+
+def _sheet_names(names: List[str], sheets: Optional[List[Union[str, int]]]) -> List[str]:
+    """
+    Function to return the names of the selected sheets of a workbook, given by name or position
+    """
+    if sheets is None:
+        return list(names)
+    selected = []
+    for sheet in sheets:
+        if isinstance(sheet, int):
+            if not -len(names) <= sheet < len(names):
+                raise ValueError(f"Worksheet index {sheet} is invalid, {len(names)} worksheets found")
+            selected.append(names[sheet])
+        elif sheet in names:
+            selected.append(sheet)
+        else:
+            raise ValueError(f"Worksheet named '{sheet}' not found")
+    return selected
+
+
+def _header(row: List) -> List[str]:
+    """
+    Function to return the names of the columns of a header row, as pandas names them: empty
+    cells are "Unnamed: <position>" and repeated names get a suffix (".1", ".2", ...)
+    """
+    names: List[str] = []
+    seen: Dict[str, int] = {}
+    for position, cell in enumerate(row):
+        name = f"Unnamed: {position}" if cell is None or str(cell).strip() == "" else str(cell)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _rechunk(tables: Iterator, chunksize: int) -> Iterator:
+    """
+    Function to regroup a sequence of Arrow Tables into Tables of `chunksize` rows
+    """
+    import pyarrow as pa
+
+    batches, rows = [], 0
+    for table in tables:
+        batches += table.to_batches()
+        rows += table.num_rows
+        while rows >= chunksize:
+            merged = pa.Table.from_batches(batches)
+            yield merged.slice(0, chunksize)
+            batches = merged.slice(chunksize).to_batches()
+            rows -= chunksize
+    if rows:
+        yield pa.Table.from_batches(batches)
+
+
 class FileLoader:
     """Class to handle loading of various file formats from a multiple storage."""
 
     SUPPORTED_FILES: Dict = {
         ".json", ".csv", ".xml", ".txt", ".xlsx", ".parquet", ".yaml"
     }
+    DEFAULT_CHUNKSIZE: int = 500_000
+    # readers that can skip the columns no check reads
+    PROJECTED_FILES: Dict = {".csv", ".parquet", ".xlsx", ".json", ".xml"}
+    # compressions read from a second extension (events.csv.gz), decompressed as the file is read
+    COMPRESSED_FILES: Dict = {".gz": "gzip", ".bz2": "bz2", ".xz": "xz", ".zst": "zstd"}
+    # readers that seek to the end of the file, compressed files are decompressed to a temporary file
+    RANDOM_ACCESS_FILES: Dict = {".parquet", ".xlsx"}
+    # bytes of a CSV file sampled to find its header and estimate the size of its columns
+    CSV_SAMPLE_SIZE: int = 64 * 1024
+    # bytes of the blocks of lines a sampled CSV file is read by
+    CSV_BLOCK_SIZE: int = 1024 * 1024
 
-    def __init__(self, storage_connector:Optional, logs:Logger, local_mode: bool = False):
+    IDENTITIES = ("metadata", "content")
+    JSON_ENGINES = ("python", "pyarrow")
+    EXCEL_ENGINES = ("auto", "calamine", "openpyxl")
+    # bytes of the raw JSON parsed by pyarrow at once
+    JSON_BLOCK_SIZE: int = 16 * 1024 * 1024
+    # JSON and XML records held as Python objects at once by a full load
+    RECORD_BATCH_SIZE: int = 50_000
+    # first rows of a streamed file the types of its columns are inferred on
+    STREAM_TYPE_ROWS: int = 10_000
+
+    def __init__(self, storage_connector:Optional, logs:Logger, local_mode: bool = False,
+                 download_options: Optional[Dict] = None, read_options: Optional[Dict] = None,
+                 cache: Optional[ResultCache] = None, identity: str = "metadata",
+                 metrics: Optional[Metrics] = None):
 
         self.logs = logs
         self.connector = storage_connector
         self.local_mode = local_mode
+        self.download_options: Dict = download_options or {}
+        self.read_options: Dict = read_options or {}
+        self.cache = cache
+        if identity not in self.IDENTITIES:
+            raise ValueError(f"Unsupported identity: {identity}")
+        self.identity = identity
+        self.metrics = metrics
+
+    def _measure(self, kind: str, filepath: str):
+        """
+        Records the time of a download when metrics are enabled.
+
+        Args:
+            kind (str): Kind of the record.
+            filepath (str): Path of the file in the storage.
+
+        Returns:
+            Context manager yielding the dict of the extra fields of the record.
+        """
+        if self.metrics is None:
+            return nullcontext({})
+        return self.metrics.measure(kind, filepath, file=filepath)
+
+    @staticmethod
+    def _count_rows(content: Any) -> Optional[int]:
+        if hasattr(content, "num_rows"):
+            return content.num_rows
+        return len(content) if isinstance(content, (pd.DataFrame, list)) else None
+
+    def _split_extention(self, filepath: str) -> Tuple[str, Optional[str]]:
+        """
+        Splits the extension of the format from the extension of the compression (events.csv.gz).
+
+        Returns:
+            Tuple[str, Optional[str]]: Extension of the format and compression, None when not compressed.
+        """
+        path = Path(filepath)
+        compression = self.COMPRESSED_FILES.get(path.suffix.lower())
+        if compression is not None:
+            path = path.with_suffix("")
+        return path.suffix.lower(), compression
+
+    def _file_suffix(self, filepath: str) -> str:
+        extention, compression = self._split_extention(filepath)
+        return extention + Path(filepath).suffix.lower() if compression is not None else extention
 
     def _detect_extention(self, filepath:str) -> str:
         """
-        Detects and validates the file extension.
+        Detects and validates the file extension, the extension of a compressed file is the one
+        before its compression extension.
 
         Returns:
             str: The validated file extension.
@@ -35,99 +472,984 @@ class FileLoader:
         Raises:
             UnsupportedFileTypeError: If the file extension is not supported.
         """
-        extention = Path(filepath).suffix.lower()
-        self.logs.debug(f"Detected extension: {extention}")
+        extention, compression = self._split_extention(filepath)
+        self.logs.debug(f"Detected extension: {extention}" + (f", {compression} compressed" if compression else ""))
         if extention not in self.SUPPORTED_FILES:
             self.logs.error(f"Unsupported extension: {extention}")
             raise UnsupportedFileTypeError(f"Unsupported extension: {extention}")
         return extention
 
-    def _load_json(self, data: object) -> Any:
+    def _as_source(self, data: Source) -> Union[str, IOBase]:
+        """
+        Keeps local paths and streams as they are and wraps binary data in a stream without copying it.
+        """
+        if isinstance(data, (bytes, bytearray, memoryview, mmap.mmap)):
+            return as_stream(data)
+        return data
+
+    def _peek(self, source: Source, size: int) -> bytes:
+        """
+        Reads the first bytes of a source, streams are moved back to where they were.
+        """
+        if isinstance(source, str):
+            with open(source, "rb") as f:
+                return f.read(size)
+        if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            return bytes(memoryview(source)[:size])
+        position = source.tell()
+        head = source.read(size)
+        source.seek(position)
+        return head
+
+    def _source_size(self, source: Source) -> int:
+        if isinstance(getattr(source, "raw", None), DecompressingReader):
+            # the decompressed size is only known once read, the compressed size is reported
+            return source.raw.compressed_size or 0
+        if isinstance(source, str):
+            return os.path.getsize(source)
+        if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+            return len(source)
+        position = source.tell()
+        size = source.seek(0, SEEK_END)
+        source.seek(position)
+        return size
+
+    def _log_projection(self, total: int, kept: int, skipped_bytes: int, estimated: bool = False):
+        approx = "~" if estimated else ""
+        self.logs.info(
+            f"Reading {kept} of {total} columns, skipped {total - kept} columns "
+            f"and {approx}{skipped_bytes / 2**20:.1f} MiB"
+        )
+
+    def _csv_projection(self, source: Source, projection: Projection) -> Tuple[Optional[List[str]], Dict]:
         """
-        Loads JSON data.
+        Finds the columns of the projection in the header of a CSV file. The skipped bytes are
+        estimated from the size of each column in the first rows.
 
         Args:
-            data (object): Raw binary data of the JSON file.
+            source (Source): Local path, raw binary data or stream of the CSV file.
+            projection (Projection): Columns to read and their dtypes.
 
         Returns:
-            Any: Parsed JSON object.
+            Tuple[Optional[List[str]], Dict]: Columns to read (None for all) and their dtypes.
+        """
+        if projection is None:
+            return None, {}
+        head = self._peek(source, self.CSV_SAMPLE_SIZE).decode("utf-8-sig", errors="ignore")
+        rows = list(csv.reader(StringIO(head)))
+        if not rows:
+            return None, {}
+        header = rows[0]
+        # the last sampled line may be cut
+        sample = rows[1:-1] or rows[:1]
+        usecols = [col for col in header if col in projection]
+
+        widths = [0] * len(header)
+        for row in sample:
+            for i, field in enumerate(row[:len(header)]):
+                widths[i] += len(field) + 1
+        share = sum(w for col, w in zip(header, widths) if col not in projection) / max(sum(widths), 1)
+        self._log_projection(len(header), len(usecols), int(share * self._source_size(source)), estimated=True)
+        return usecols, {col: projection[col] for col in usecols if projection[col]}
+
+    def _parquet_projection(self, source: Source, projection: Projection) -> Optional[List[str]]:
+        """
+        Finds the columns of the projection in the schema of a Parquet file, the skipped bytes
+        are the compressed size of the other columns.
+
+        Args:
+            source (Source): Local path, raw binary data or seekable stream of the Parquet file.
+            projection (Projection): Columns to read.
+
+        Returns:
+            Optional[List[str]]: Columns to read, None for all.
+        """
+        import pyarrow.parquet as pq
+
+        if projection is None:
+            return None
+        position = source.tell() if isinstance(source, IOBase) else None
+        metadata = pq.ParquetFile(self._as_source(source)).metadata
+        if position is not None:
+            source.seek(position)
+
+        names = metadata.schema.to_arrow_schema().names
+        columns = [col for col in names if col in projection]
+        skipped = 0
+        for i in range(metadata.num_row_groups):
+            row_group = metadata.row_group(i)
+            for j in range(row_group.num_columns):
+                chunk = row_group.column(j)
+                if chunk.path_in_schema.split(".")[0] not in projection:
+                    skipped += chunk.total_compressed_size
+        self._log_projection(len(names), len(columns), skipped)
+        return columns
+
+    def _parquet_options(self, source: Source, projection: Projection) -> Dict:
+        """
+        Options of the Parquet readers: local files are memory mapped and the text columns
+        of the projection loaded as categories are read dictionary encoded.
+        """
+        options: Dict = {"memory_map": True} if isinstance(source, str) else {}
+        dictionary = [col for col, dtype in (projection or {}).items() if dtype == "category"]
+        if dictionary:
+            # the columns that are not text are read as they are
+            options["read_dictionary"] = dictionary
+        return options
+
+    def _arrow_types(self, dtypes: Dict) -> Dict:
+        import pyarrow as pa
+
+        return {
+            col: pa.dictionary(pa.int32(), pa.string()) if dtype == "category" else pa.from_numpy_dtype(dtype)
+            for col, dtype in dtypes.items()
+        }
+
+    def _json_options(self) -> Tuple[str, bool, str, Optional[int]]:
+        """
+        Reads the JSON options of the storage section: the parser (`json_engine`), if nested objects
+        are flattened into dotted columns (`json_flatten`), the separator of their names
+        (`json_separator`) and the depth flattened (`json_max_level`, None for every level).
+        """
+        engine: str = self.read_options.get("json_engine", "python")
+        if engine not in self.JSON_ENGINES:
+            raise ValueError(f"Unsupported JSON engine: {engine}")
+        max_level = self.read_options.get("json_max_level")
+        return (engine, bool(self.read_options.get("json_flatten", True)),
+                self.read_options.get("json_separator", "."), None if max_level is None else int(max_level))
+
+    def _open_stream(self, source: Source) -> IOBase:
+        """
+        Opens a buffered binary stream over JSON or XML data, to parse it incrementally.
+        """
+        if isinstance(source, str):
+            return open(source, "rb")
+        if isinstance(source, IOBase):
+            # buffered, a raw stream (ranged reads of a remote object) reads lines byte by byte, and
+            # left open so the first rows of the file can be read again
+            return borrow(source)
+        return self._as_source(source)
+
+    def _typed_chunks(self, source: Source, read: Callable[[Source, Dict], Iterator[pd.DataFrame]],
+                      declared: Iterator[str] = (), reparse: bool = False) -> Iterator[pd.DataFrame]:
+        """
+        Reads a file in chunks that agree on the type of each column. The types are those a reader
+        of the first `read_options.stream_type_rows` rows at once gives the columns, so a column of
+        numbers with text in these rows is text in every chunk, like a full load reads it. Past
+        these rows a chunk can only widen the type of a column for the next chunks (a warning is
+        logged), the chunks already read keep theirs. The file is read once: only the first rows
+        are read again, when a reader parses numbers from text (`reparse`) and a column of these
+        rows mixes numbers and text.
+
+        Args:
+            source (Source): Local path, raw binary data or seekable stream of the file.
+            read (Callable): Reads the chunks of a source, given the types of the columns of the
+                stream, filled once the first rows are read and widened as the chunks are read.
+            declared (Iterator[str]): Columns read with the dtype of the projection, kept as read.
+            reparse (bool): The reader parses numbers from text, the first rows are read again
+                when a column mixes numbers and text.
+
+        Yields:
+            pd.DataFrame: Chunk of the file.
+        """
+        rows = int(self.read_options.get("stream_type_rows", self.STREAM_TYPE_ROWS))
+        position = source.tell() if isinstance(source, IOBase) else None
+        dtypes: Dict = {}
+        chunks = read(source, dtypes)
+        head: List[pd.DataFrame] = []
+        try:
+            while sum(len(frame) for frame in head) < rows:
+                frame = next(chunks, None)
+                if frame is None:
+                    break
+                head.append(frame)
+            dtypes.update(_stream_types(head))
+            dtypes.update((name, None) for name in declared if name in dtypes)
+            if reparse and any(dtypes[name] == object and dtype != object
+                               for frame in head for name, dtype in frame.dtypes.items()):
+                self.logs.debug(f"Reading the first {rows} rows again, a column mixes numbers and text.")
+                chunks.close()
+                head = []
+                if position is not None:
+                    source.seek(position)
+                chunks = read(source, dtypes)
+            for frame in chain(head, chunks):
+                found = dict(dtypes)
+                frame = _conform(frame, dtypes)
+                for name in (name for name, dtype in found.items() if dtypes[name] != dtype):
+                    self.logs.warning(f"Column {name} read as {found[name]} in the first {rows} rows is read as "
+                                      f"{dtypes[name]} from row {frame.index[0]}, raise read_options.stream_type_rows "
+                                      f"to type it on more rows.")
+                yield frame
+        finally:
+            chunks.close()
+
+    def _is_json_document(self, source: Source) -> bool:
+        """
+        Tells a JSON document holding a list of records from JSON Lines (one record per line).
+        """
+        return self._peek(source, 4096).lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"[")
+
+    def _json_frame(self, records: List[Dict], projection: Projection, start: int) -> pd.DataFrame:
+        """
+        Builds the DataFrame of a batch of records, nested objects flattened into dotted columns.
+
+        Args:
+            records (List[Dict]): Parsed records of the batch.
+            projection (Projection): Columns to keep, None for every column.
+            start (int): Position of the first record in the file.
+
+        Returns:
+            pd.DataFrame: Batch of the file.
+        """
+        _, flatten, separator, max_level = self._json_options()
+        if flatten:
+            records = [_flatten_record(record, separator, max_level)
+                       if any(isinstance(value, dict) for value in record.values()) else record
+                       for record in records]
+        # keys missing from every record of a batch are null, like keys missing from a record
+        frame = _declared_types(pd.DataFrame(records, columns=list(projection) if projection is not None else None),
+                                projection)
+        if flatten and projection is None:
+            # a null object ({"user": null}) is null in the fields of the object, as pyarrow flattens it
+            parents = {name.rsplit(separator, 1)[0] for name in frame.columns if separator in str(name)}
+            empty = [name for name in frame.columns if name in parents and frame[name].isna().all()]
+            if empty:
+                # the fields take the place of the object, like the fields of a struct
+                order: Dict = {}
+                for name in frame.columns:
+                    fields = [field for field in frame.columns if str(field).startswith(f"{name}{separator}")]
+                    for column in (fields if name in empty else [name]):
+                        if column not in empty:
+                            order.setdefault(column)
+                frame = frame[list(order)]
+        frame.index = pd.RangeIndex(start, start + len(frame))
+        return frame
+
+    def _iter_json(self, source: Source, chunksize: int, projection: Projection = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads JSON Lines data in chunks of records, parsed line by line (with orjson when it is
+        installed) so only the records of one chunk are held as Python objects. A JSON document
+        holding a list of records can not be read in parts, it is parsed whole and then split.
+        The columns are typed on the first rows of the file (see `_typed_chunks`), so the chunks
+        agree on the type of a column. With `json_engine: pyarrow` JSON Lines are parsed by
+        pyarrow.json.
+
+        Args:
+            source (Source): Local path, raw binary data or stream of the JSON file.
+            chunksize (int): Number of records per chunk.
+            projection (Projection): Columns to keep, None for every column.
+
+        Yields:
+            pd.DataFrame: Chunk of the file.
+        """
+        if self._json_options()[0] == "pyarrow" and not self._is_json_document(source):
+            for table in self._iter_json_tables(source, chunksize, projection):
+                yield table.to_pandas()
+            return
+        declared = [col for col, dtype in (projection or {}).items() if dtype]
+        yield from self._typed_chunks(source, lambda source, _: self._json_frames(source, chunksize, projection),
+                                      declared=declared)
+
+    def _json_frames(self, source: Source, chunksize: int, projection: Projection = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads JSON data in chunks of records with the Python parser, each chunk typed on its own records.
+        """
+        self.logs.debug(f"Reading JSON file in chunks of {chunksize} records.")
+        loads = _json_loads()
+        document = self._is_json_document(source)
+        with self._open_stream(source) as stream:
+            if document:
+                records = loads(stream.read())
+                lines = iter(records if isinstance(records, list) else [records])
+            else:
+                lines = (loads(line) for line in stream if line.strip())
+            start = 0
+            while True:
+                records = list(islice(lines, chunksize))
+                if not records:
+                    return
+                yield self._json_frame(records, projection, start)
+                start += len(records)
+
+    def _iter_json_tables(self, source: Source, chunksize: int, projection: Projection = None):
+        """
+        Reads JSON data as Arrow Tables. With `json_engine: pyarrow` JSON Lines are parsed block by
+        block by pyarrow.json: faster, but the type of a column is inferred on the first block and a
+        value of another type later fails the read. The chunks of the Python parser are converted,
+        a column mixing types is then read as text.
+
+        Args:
+            source (Source): Local path, raw binary data or stream of the JSON file.
+            chunksize (int): Number of records per chunk.
+            projection (Projection): Columns to keep, None for every column.
+
+        Yields:
+            pa.Table: Chunk of the file.
+        """
+        import pyarrow as pa
+        import pyarrow.json as pajson
+
+        engine, flatten, separator, max_level = self._json_options()
+        if engine != "pyarrow" or self._is_json_document(source):
+            for frame in self._iter_json(source, chunksize, projection):
+                yield _frame_to_table(frame)
+            return
+
+        self.logs.debug(f"Reading JSON file with pyarrow.json in chunks of {chunksize} records.")
+        read_options = pajson.ReadOptions(block_size=self.JSON_BLOCK_SIZE)
+        with self._open_stream(source) as stream:
+            tables = (_flatten_table(pa.Table.from_batches([batch]), separator, max_level if flatten else 0, projection)
+                      for batch in pajson.open_json(stream, read_options=read_options))
+            yield from _rechunk(tables, chunksize)
+
+    def _load_json(self, data: Source, projection: Projection = None) -> pd.DataFrame:
+        """
+        Loads JSON Lines (or a JSON document holding a list of records) into a pandas DataFrame,
+        chunk by chunk, nested objects flattened into dotted columns (`read_options.json_flatten`).
+
+        Args:
+            data (Source): Local path or raw binary data of the JSON file.
+            projection (Projection): Columns to keep, None for every column.
+
+        Returns:
+            pd.DataFrame: Loaded data.
         """
         self.logs.debug("Loading JSON file.")
-        lines: list = data.decode("utf-8").strip().split("\n")
+        # the chunks are concatenated, which gives each column the type of the whole file
+        chunks = list(self._json_frames(data, self.RECORD_BATCH_SIZE, projection))
+        if not chunks:
+            return pd.DataFrame(columns=list(projection) if projection is not None else None)
+        if len(chunks) == 1:
+            return chunks[0]
+        # categories differ between chunks
+        return _declared_types(pd.concat(chunks, ignore_index=True, copy=False), projection)
+
+    def _load_json_table(self, data: Source, projection: Projection = None):
+        """
+        Loads JSON data into an Arrow Table, parsed by pyarrow.json with `json_engine: pyarrow`.
 
-        return [json.loads(line) for line in lines]
+        Args:
+            data (Source): Local path or raw binary data of the JSON file.
+            projection (Projection): Columns to keep, None for every column.
 
-    def _load_csv(self, data: object) -> pd.DataFrame:
+        Returns:
+            pa.Table: Loaded data.
+        """
+        import pyarrow as pa
+
+        if self._json_options()[0] != "pyarrow":
+            # chunks may not agree on the type of a column, the whole frame is converted at once
+            return _frame_to_table(self._load_json(data, projection))
+        tables = list(self._iter_json_tables(data, self.RECORD_BATCH_SIZE, projection))
+        return pa.concat_tables(tables) if tables else pa.table({})
+
+    def _load_csv(self, data: Source, projection: Projection = None) -> pd.DataFrame:
         """
         Loads CSV data into a pandas DataFrame.
+        With `read_options.csv_engine: pyarrow` the file is parsed by the multithreaded Arrow reader.
 
         Args:
-            data (object): Raw binary data of the CSV file.
+            data (Source): Local path or raw binary data of the CSV file.
+            projection (Projection): Columns to read and their dtypes, None for every column.
 
         Returns:
             pd.DataFrame: Loaded data.
         """
         self.logs.debug("Loading CSV file.")
-        return pd.read_csv(BytesIO(data))
+        usecols, dtypes = self._csv_projection(data, projection)
+        return pd.read_csv(self._as_source(data), engine=self.read_options.get("csv_engine", "c"),
+                           usecols=usecols, dtype=dtypes or None)
+
+    def _excel_options(self) -> Tuple[str, Optional[List[Union[str, int]]], Tuple, Optional[int], Optional[str]]:
+        """
+        Reads the Excel options of the storage section: the reader (`excel_engine`, calamine when
+        installed by default), the sheets (`excel_sheets`, names or positions, "*" for every sheet,
+        the first sheet by default), the cells read (`excel_range`, e.g. "B3:H5000" or "B:H"), the
+        number of the header row (`excel_header`, by default the first row of the range) and the
+        column holding the name of the sheet of each row (`excel_sheet_column`).
+        """
+        engine: str = self.read_options.get("excel_engine", "auto")
+        if engine not in self.EXCEL_ENGINES:
+            raise ValueError(f"Unsupported Excel engine: {engine}")
+        if engine == "auto":
+            try:
+                import python_calamine  # noqa: F401
+                engine = "calamine"
+            except ImportError:
+                engine = "openpyxl"
+        sheets = self.read_options.get("excel_sheets", 0)
+        sheets = None if sheets == "*" else sheets if isinstance(sheets, list) else [sheets]
+        cells = _cell_range(self.read_options.get("excel_range"))
+        header = self.read_options.get("excel_header")
+        return engine, sheets, cells, None if header is None else int(header), self.read_options.get("excel_sheet_column")
+
+    def _excel_sheets(self, source: Source, engine: str, sheets: Optional[List[Union[str, int]]]) -> Iterator[Tuple[str, Iterator[Tuple[int, List]]]]:
+        """
+        Opens a workbook once and yields the name of each selected sheet and its rows, numbered
+        from 1, each row a list of the cells from column A. openpyxl reads the rows in read only
+        mode as the sheet is parsed, calamine (Rust) reads a sheet at once, several times faster.
+        """
+        if engine == "calamine":
+            from python_calamine import CalamineWorkbook
+
+            workbook = CalamineWorkbook.from_path(source) if isinstance(source, str) \
+                else CalamineWorkbook.from_filelike(self._as_source(source))
+            names = workbook.sheet_names
+            try:
+                for name in _sheet_names(names, sheets):
+                    sheet = workbook.get_sheet_by_name(name)
+                    # the rows of calamine start at the first used cell
+                    top, left = sheet.start or (0, 0)
+                    rows = ((top + number, [None] * left + [_calamine_cell(cell) for cell in row])
+                            for number, row in enumerate(sheet.iter_rows(), 1))
+                    yield name, rows
+            finally:
+                workbook.close()
+            return
+
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(self._as_source(source), read_only=True, data_only=True, keep_links=False)
+        try:
+            for name in _sheet_names(workbook.sheetnames, sheets):
+                rows = workbook[name].iter_rows(values_only=True)
+                yield name, ((number, list(row)) for number, row in enumerate(rows, 1))
+        finally:
+            workbook.close()
+
+    def _iter_excel(self, source: Source, chunksize: int, projection: Projection = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads the rows of the selected sheets of an Excel workbook in chunks, the sheets one after
+        the other in a single pass over the file, as one table (they should share their header).
+        Empty rows at the end of a sheet are skipped and the text pandas reads as missing
+        ("", "NA", "n/a", ...) is None, as with pd.read_excel. The columns are typed on the first
+        rows of the file (see `_typed_chunks`), so the chunks agree on the type of a column.
+
+        Args:
+            source (Source): Local path, raw binary data or seekable stream of the Excel file.
+            chunksize (int): Number of rows per chunk.
+            projection (Projection): Columns to read and their dtypes, None for every column.
+
+        Yields:
+            pd.DataFrame: Chunk of the file.
+        """
+        declared = [col for col, dtype in (projection or {}).items() if dtype]
+        yield from self._typed_chunks(source, lambda source, _: self._excel_frames(source, chunksize, projection),
+                                      declared=declared)
+
+    def _excel_frames(self, source: Source, chunksize: int, projection: Projection = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads the rows of the selected sheets of an Excel workbook in chunks, each chunk typed on its own rows.
+        """
+        engine, sheets, cells, header_row, sheet_column = self._excel_options()
+        min_col, min_row, max_col, max_row = cells
+        self.logs.debug(f"Reading Excel file with {engine} in chunks of {chunksize} rows.")
+        start = 0
+        for name, rows in self._excel_sheets(source, engine, sheets):
+            # without a header row nor a range the header is the first row with values
+            first = header_row or min_row or 1
+            header: Optional[List[str]] = None
+            batch: List[List] = []
+            empty: List[List] = []
+            for number, row in rows:
+                if max_row is not None and number > max_row:
+                    break
+                if number < first:
+                    continue
+                row = row[(min_col or 1) - 1:max_col]
+                if header is None:
+                    if header_row is None and min_row is None and all(cell is None for cell in row):
+                        continue
+                    header = _header(row)
+                    keep = [i for i, column in enumerate(header) if projection is None or column in projection]
+                    if projection is not None:
+                        self.logs.info(f"Reading {len(keep)} of {len(header)} columns of sheet {name}")
+                    continue
+                values = [_excel_cell(row[i]) if i < len(row) else NAN for i in keep]
+                if all(value is NAN for value in values):
+                    # kept until a row with values shows they are not the end of the sheet
+                    empty.append(values)
+                    continue
+                if empty:
+                    batch += empty
+                    empty = []
+                batch.append(values)
+                if len(batch) >= chunksize:
+                    yield self._excel_frame(batch, [header[i] for i in keep], projection, name, sheet_column, start)
+                    start += len(batch)
+                    batch = []
+            if batch:
+                yield self._excel_frame(batch, [header[i] for i in keep], projection, name, sheet_column, start)
+                start += len(batch)
+
+    def _excel_frame(self, rows: List[List], columns: List[str], projection: Projection, sheet: str,
+                     sheet_column: Optional[str], start: int) -> pd.DataFrame:
+        frame = _declared_types(pd.DataFrame(rows, columns=columns), projection)
+        if sheet_column:
+            frame[sheet_column] = sheet
+        frame.index = pd.RangeIndex(start, start + len(frame))
+        return frame
 
-    def _load_excel(self, data: object) -> pd.DataFrame:
+    def _iter_excel_tables(self, source: Source, chunksize: int, projection: Projection = None):
         """
-        Loads Excel data into a pandas DataFrame.
+        Reads Excel data as Arrow Tables, the chunks of `_iter_excel` converted.
+        """
+        for frame in self._iter_excel(source, chunksize, projection):
+            yield _frame_to_table(frame)
+
+    def _load_excel(self, data: Source, projection: Projection = None) -> pd.DataFrame:
+        """
+        Loads the selected sheets of an Excel workbook into a pandas DataFrame, row by row.
 
         Args:
-            data (object): Raw binary data of the Excel file.
+            data (Source): Local path or raw binary data of the Excel file.
+            projection (Projection): Columns to read and their dtypes, None for every column.
 
         Returns:
             pd.DataFrame: Loaded data.
         """
         self.logs.debug("Loading Excel file.")
-        return pd.read_excel(BytesIO(data))
+        chunks = list(self._excel_frames(data, self.RECORD_BATCH_SIZE, projection))
+        if not chunks:
+            return pd.DataFrame()
+        if len(chunks) == 1:
+            return chunks[0]
+        # a column can be numbers in one chunk and empty in another, categories differ between chunks
+        return _declared_types(pd.concat(chunks, ignore_index=True, copy=False), projection)
 
-    def _load_parquet(self, data: object) -> pd.DataFrame:
+    def _load_parquet(self, data: Source, projection: Projection = None) -> pd.DataFrame:
         """
-        Loads Parquet data into a pandas DataFrame.
+        Loads Parquet data into a pandas DataFrame, local files are memory mapped by pyarrow.
 
         Args:
-            data (object): Raw binary data of the Parquet file.
+            data (Source): Local path or raw binary data of the Parquet file.
+            projection (Projection): Columns to read, None for every column.
 
         Returns:
             pd.DataFrame: Loaded data.
         """
         self.logs.debug("Loading Parquet file.")
-        return pd.read_parquet(BytesIO(data), engine="pyarrow")
+        options: Dict = self._parquet_options(data, projection)
+        columns = self._parquet_projection(data, projection)
+        return pd.read_parquet(self._as_source(data), engine="pyarrow", columns=columns, **options)
+
+    def _load_csv_table(self, data: Source, projection: Projection = None):
+        """
+        Loads CSV data into an Arrow Table with the multithreaded pyarrow.csv reader.
+
+        Args:
+            data (Source): Local path or raw binary data of the CSV file.
+            projection (Projection): Columns to read and their dtypes, None for every column.
+
+        Returns:
+            pa.Table: Loaded data.
+        """
+        import pyarrow.csv as pacsv
+
+        self.logs.debug("Loading CSV file as an Arrow Table.")
+        return pacsv.read_csv(self._as_source(data), convert_options=self._csv_convert_options(data, projection))
 
-    def _load_xml(self, data: object) -> ET.Element:
+    def _load_parquet_table(self, data: Source, projection: Projection = None):
         """
-        Loads XML data and parses it into an ElementTree.
+        Loads Parquet data into an Arrow Table, local files are memory mapped.
 
         Args:
-            data (object): Raw binary data of the XML file.
+            data (Source): Local path or raw binary data of the Parquet file.
+            projection (Projection): Columns to read, None for every column.
 
         Returns:
-            ET.Element: Parsed XML root element.
+            pa.Table: Loaded data.
+        """
+        import pyarrow.parquet as pq
+
+        self.logs.debug("Loading Parquet file as an Arrow Table.")
+        options: Dict = self._parquet_options(data, projection)
+        columns = self._parquet_projection(data, projection)
+        return pq.read_table(self._as_source(data), columns=columns, **options)
+
+    def _csv_convert_options(self, source: Source, projection: Projection):
+        import pyarrow.csv as pacsv
+
+        usecols, dtypes = self._csv_projection(source, projection)
+        # empty strings are missing values, like in pd.read_csv
+        return pacsv.ConvertOptions(strings_can_be_null=True, include_columns=usecols,
+                                    column_types=self._arrow_types(dtypes))
+
+    def _xml_options(self) -> Tuple[Optional[List[str]], Optional[Dict[str, str]]]:
+        """
+        Reads the XML options of the storage section: the path of the record elements (`xml_record`,
+        e.g. "orders/order", by default the children of the root) and the columns read from each
+        record (`xml_fields`, column: child path, "@attribute" or "child/@attribute").
+        """
+        record = self.read_options.get("xml_record")
+        path = [part for part in record.split("/") if part] if record else None
+        return path, self.read_options.get("xml_fields")
+
+    def _iter_xml(self, source: Source, chunksize: int, projection: Projection = None,
+                  numbers: bool = True) -> Iterator[pd.DataFrame]:
+        """
+        Reads XML data in chunks of records with iterparse. Every record element is turned into a
+        row as soon as it is parsed and then removed from the tree, like the elements outside the
+        records, so memory stays bounded by the chunk whatever the size of the document.
+        Without `xml_fields` the attributes and the text of the children of a record are its
+        columns, nested children give dotted columns and repeated children a list. Text is
+        converted to numbers when every value of a column is a number, like a CSV, the types are
+        inferred on the first rows of the file (see `_typed_chunks`).
+
+        Args:
+            source (Source): Local path, raw binary data or stream of the XML file.
+            chunksize (int): Number of records per chunk.
+            projection (Projection): Columns to keep, None for every column.
+            numbers (bool): Convert the columns of numbers, typed on the first rows of the file.
+
+        Yields:
+            pd.DataFrame: Chunk of the file.
+        """
+        self.logs.debug(f"Reading XML file in chunks of {chunksize} records.")
+        record_path, fields = self._xml_options()
+        if fields is not None and projection is not None:
+            fields = {column: path for column, path in fields.items() if column in projection}
+        columns = list(projection) if projection is not None else (list(fields) if fields is not None else None)
+        def frames(source: Source, dtypes: Dict) -> Iterator[pd.DataFrame]:
+            with self._open_stream(source) as stream:
+                records = _iter_xml_records(stream, record_path, fields)
+                start = 0
+                while True:
+                    batch = list(islice(records, chunksize))
+                    if not batch:
+                        return
+                    frame = _declared_types(pd.DataFrame(batch, columns=columns), projection)
+                    frame.index = pd.RangeIndex(start, start + len(frame))
+                    start += len(frame)
+                    if numbers:
+                        # the columns typed as text in the stream keep the text of their numbers
+                        frame = _parse_numbers(frame, tuple(name for name, dtype in dtypes.items() if dtype == object))
+                    yield frame
+
+        declared = [col for col, dtype in (projection or {}).items() if dtype]
+        yield from self._typed_chunks(source, frames, declared=declared, reparse=True) if numbers else frames(source, {})
+
+    def _iter_xml_tables(self, source: Source, chunksize: int, projection: Projection = None):
+        """
+        Reads XML data as Arrow Tables, the chunks of `_iter_xml` converted.
+        """
+        for frame in self._iter_xml(source, chunksize, projection):
+            yield _frame_to_table(frame)
+
+    def _load_xml(self, data: Source, projection: Projection = None) -> pd.DataFrame:
+        """
+        Loads the records of an XML file into a pandas DataFrame, chunk by chunk with iterparse.
+
+        Args:
+            data (Source): Local path or raw binary data of the XML file.
+            projection (Projection): Columns to keep, None for every column.
+
+        Returns:
+            pd.DataFrame: Loaded data.
         """
         self.logs.debug("Loading XML file.")
-        return ET.fromstring(BytesIO(data))
-    
-    def _load_from_local(self, filepath: str) -> bytes:
+        # the types are inferred on the whole file, a column can be numbers in one chunk only
+        chunks = list(self._iter_xml(data, self.RECORD_BATCH_SIZE, projection, numbers=False))
+        if not chunks:
+            return pd.DataFrame(columns=list(projection) if projection is not None else None)
+        frame = chunks[0] if len(chunks) == 1 else pd.concat(chunks, ignore_index=True, copy=False)
+        # categories differ between chunks, the columns of the projection keep their dtype
+        declared = tuple(col for col, dtype in (projection or {}).items() if dtype)
+        return _declared_types(_parse_numbers(frame, declared), projection)
+
+    def _iter_csv(self, source: Source, chunksize: int, projection: Projection = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads CSV data in chunks of rows. The columns are typed on the first rows of the file (see
+        `_typed_chunks`): a column of numbers with text in these rows is read as text in every
+        chunk, like a full load reads it.
+
+        Args:
+            source (Source): Local path, raw binary data or stream of the CSV file.
+            chunksize (int): Number of rows per chunk.
+            projection (Projection): Columns to read and their dtypes, None for every column.
+
+        Yields:
+            pd.DataFrame: Chunk of the file.
+        """
+        self.logs.debug(f"Reading CSV file in chunks of {chunksize} rows.")
+        usecols, dtypes = self._csv_projection(source, projection)
+        # columns holding numbers in a chunk, they are read as text when another chunk holds text
+        numbers = set()
+
+        def chunks(source: Source, types: Dict) -> Iterator[pd.DataFrame]:
+            text = {name: str for name, dtype in types.items() if dtype == object and name in numbers}
+            with pd.read_csv(self._as_source(source), chunksize=chunksize, usecols=usecols,
+                             dtype={**text, **dtypes} or None) as reader:
+                for frame in reader:
+                    for name, dtype in frame.dtypes.items():
+                        if dtype.kind not in "iufb":
+                            continue
+                        if types.get(name) == object:
+                            # text found after the first rows, the next numbers are text too
+                            frame[name] = frame[name].astype(str).where(frame[name].notna())
+                        elif frame[name].notna().any():
+                            numbers.add(name)
+                    yield frame
+
+        yield from self._typed_chunks(source, chunks, declared=dtypes, reparse=True)
+
+    def _iter_parquet(self, source: Source, chunksize: int, projection: Projection = None) -> Iterator[pd.DataFrame]:
+        """
+        Reads Parquet data batch by batch, never holding more than one row group decoded.
+
+        Args:
+            source (Source): Local path, raw binary data or seekable stream of the Parquet file.
+            chunksize (int): Maximum number of rows per chunk.
+            projection (Projection): Columns to read, None for every column.
+
+        Yields:
+            pd.DataFrame: Chunk of the file.
+        """
+        import pyarrow.parquet as pq
+
+        self.logs.debug(f"Reading Parquet file in chunks of {chunksize} rows.")
+        options: Dict = self._parquet_options(source, projection)
+        columns = self._parquet_projection(source, projection)
+        parquet_file = pq.ParquetFile(self._as_source(source), **options)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield batch.to_pandas()
+
+    def _iter_csv_tables(self, source: Source, chunksize: int, projection: Projection = None):
+        """
+        Reads CSV data block by block with pyarrow.csv, the column types are inferred on the first block.
+
+        Args:
+            source (Source): Local path, raw binary data or stream of the CSV file.
+            chunksize (int): Number of rows per chunk.
+            projection (Projection): Columns to read and their dtypes, None for every column.
+
+        Yields:
+            pa.Table: Chunk of the file.
+        """
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+
+        self.logs.debug(f"Reading CSV file as Arrow Tables of {chunksize} rows.")
+        convert_options = self._csv_convert_options(source, projection)
+        with pacsv.open_csv(self._as_source(source), convert_options=convert_options) as reader:
+            yield from _rechunk((pa.Table.from_batches([batch]) for batch in reader), chunksize)
+
+    def _iter_parquet_tables(self, source: Source, chunksize: int, projection: Projection = None):
+        """
+        Reads Parquet data as Arrow Tables, batch by batch.
+
+        Args:
+            source (Source): Local path, raw binary data or seekable stream of the Parquet file.
+            chunksize (int): Maximum number of rows per chunk.
+            projection (Projection): Columns to read, None for every column.
+
+        Yields:
+            pa.Table: Chunk of the file.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.logs.debug(f"Reading Parquet file as Arrow Tables of {chunksize} rows.")
+        options: Dict = self._parquet_options(source, projection)
+        columns = self._parquet_projection(source, projection)
+        parquet_file = pq.ParquetFile(self._as_source(source), **options)
+        for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+            yield pa.Table.from_batches([batch])
+
+    def _sample_parquet(self, source: Source, chunksize: int, projection: Projection, sample: Sampler,
+                        as_table: bool = False) -> Iterator:
+        """
+        Reads the row groups of a Parquet file picked by a sampler (a fraction of them, or random
+        ones until the reservoir is full), the other row groups are never read.
+
+        Args:
+            source (Source): Local path, raw binary data or seekable stream of the Parquet file.
+            chunksize (int): Maximum number of rows per chunk.
+            projection (Projection): Columns to read, None for every column.
+            sample (Sampler): Sampler of the run.
+            as_table (bool): Yield Arrow Tables instead of DataFrames.
+
+        Yields:
+            Chunk of the row groups read.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        options: Dict = self._parquet_options(source, projection)
+        columns = self._parquet_projection(source, projection)
+        parquet_file = pq.ParquetFile(self._as_source(source), **options)
+        metadata = parquet_file.metadata
+        groups = sample.pick(metadata.num_row_groups)
+        if groups is None:
+            read = self._iter_parquet_tables if as_table else self._iter_parquet
+            yield from read(source, chunksize, projection)
+            return
+        self.logs.info(f"Sampling the row groups of a Parquet file, {len(groups)} of {metadata.num_row_groups} picked")
+        sample.loaded(metadata.num_rows)
+        rows = 0
+        for group in groups.tolist():
+            for batch in parquet_file.iter_batches(batch_size=chunksize, row_groups=[group], columns=columns):
+                rows += batch.num_rows
+                yield pa.Table.from_batches([batch]) if as_table else batch.to_pandas()
+            if sample.method == "reservoir" and rows >= sample.rows:
+                return
+
+    def _sample_csv(self, source: Source, chunksize: int, projection: Projection, sample: Sampler,
+                    as_table: bool = False) -> Iterator:
+        """
+        Reads the blocks of lines of a CSV file picked by a sampler, each block is read with a
+        seek so the rest of the file is never read, and the rows of the file are estimated from
+        the size of the rows read. A line belongs to the block it starts in, so the blocks assume
+        one row per line (no line break inside a quoted value).
+
+        Args:
+            source (Source): Local path, raw binary data or seekable stream of the CSV file.
+            chunksize (int): Number of rows per chunk when the whole file is read.
+            projection (Projection): Columns to read and their dtypes, None for every column.
+            sample (Sampler): Sampler of the run.
+            as_table (bool): Yield Arrow Tables instead of DataFrames.
+
+        Yields:
+            Rows of each block read.
+        """
+        import pyarrow.csv as pacsv
+
+        head = self._peek(source, self.CSV_SAMPLE_SIZE)
+        size = self._source_size(source)
+        header = head[:head.find(b"\n") + 1]
+        blocks = sample.pick(math.ceil((size - len(header)) / self.CSV_BLOCK_SIZE)) if header else None
+        if blocks is None:
+            read = self._iter_csv_tables if as_table else self._iter_csv
+            yield from read(source, chunksize, projection)
+            return
+        self.logs.info(f"Sampling the blocks of lines of a CSV file, {len(blocks)} of "
+                       f"{math.ceil((size - len(header)) / self.CSV_BLOCK_SIZE)} picked")
+        if as_table:
+            convert_options = self._csv_convert_options(source, projection)
+        else:
+            usecols, dtypes = self._csv_projection(source, projection)
+        stream = open(source, "rb") if isinstance(source, str) else self._as_source(source)
+        rows, parsed = 0, 0
+        try:
+            for block in blocks.tolist():
+                start = len(header) + block * self.CSV_BLOCK_SIZE
+                end = min(start + self.CSV_BLOCK_SIZE, size)
+                # the line cut by the start of the block belongs to the previous block
+                stream.seek(start - 1)
+                stream.readline()
+                data = stream.read(max(end - stream.tell(), 0))
+                if data and not data.endswith(b"\n"):
+                    data += stream.readline()
+                if not data.strip():
+                    continue
+                if as_table:
+                    chunk = pacsv.read_csv(BytesIO(header + data), convert_options=convert_options)
+                else:
+                    chunk = pd.read_csv(BytesIO(header + data), usecols=usecols, dtype=dtypes or None)
+                rows += len(chunk)
+                parsed += len(data)
+                sample.loaded(round(rows / parsed * (size - len(header))), estimated=True)
+                yield chunk
+                if sample.method == "reservoir" and rows >= sample.rows:
+                    return
+        finally:
+            if stream is not source:
+                stream.close()
+
+    def _decompress(self, source: Source, extention: str, compression: str) -> IOBase:
         """
-        Loads a file from the local filesystem as binary.
+        Opens a stream of the decompressed content of a compressed file, inflated as the reader
+        reads it so the whole file is never in memory. Parquet and Excel readers seek to the end
+        of the file, their files are decompressed to a temporary file first.
 
         Args:
-            filepath (str): Path to the local file.
+            source (Source): Local path, raw binary data or stream of the compressed file.
+            extention (str): Extension of the format of the file.
+            compression (str): gzip, bz2, xz or zstd.
 
         Returns:
-            bytes: Raw binary data of the file.
+            IOBase: Stream of the decompressed file.
         """
-        self.logs.debug(f"Loading file from local path: {filepath}")
-        with open(filepath, 'rb') as file:
-            data = file.read()
-        self.logs.debug(f"File {filepath} loaded successfully from local.")
-        return data
+        self.logs.debug(f"Decompressing {compression} {extention} file as it is read.")
+        stream = decompress(open(source, "rb") if isinstance(source, str) else self._as_source(source),
+                            compression, self._source_size(source))
+        if extention not in self.RANDOM_ACCESS_FILES:
+            return stream
+        spill = tempfile.TemporaryFile()
+        try:
+            with stream:
+                shutil.copyfileobj(stream, spill, 1024 * 1024)
+        except Exception:
+            spill.close()
+            raise
+        spill.seek(0)
+        return spill
 
-    def load_file(self, filepath:str) -> Any:
+    def file_identity(self, filepath: str) -> str:
         """
-        Downloads and loads the file from blob storage based on its extension.
+        Identity of the current version of a file: ETag or modification time and size from the
+        storage (identity: metadata) or hash of its content (identity: content). Hashing a remote
+        file downloads it, it is then kept in the cache so it is not downloaded again to be loaded.
+
+        Args:
+            filepath (str): Path of the file in the storage.
+
+        Returns:
+            str: Identity of the file.
+        """
+        if self.identity == "metadata":
+            connector = LocalConnection() if self.local_mode else self.connector
+            return connector.get_identity(filepath)
+
+        digest = hashlib.sha256()
+        if self.local_mode:
+            with open(filepath, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            return f"sha256:{digest.hexdigest()}"
+        data = self.connector.read_file(filepath, **self.download_options)
+        digest.update(data)
+        identity = f"sha256:{digest.hexdigest()}"
+        self._cache_file(filepath, identity, data)
+        return identity
+
+    def _cache_file(self, filepath: str, identity: str, data: Union[bytes, bytearray]):
+        if self.cache is not None:
+            self.cache.put_file(self.cache.key("file", identity), self._file_suffix(filepath), data)
+
+    def _remote_identity(self, filepath: str, identity: Optional[str]) -> Optional[str]:
+        """
+        Identity of a remote file when the downloads are cached, None otherwise.
+        """
+        if self.cache is None or self.local_mode:
+            return None
+        return identity or self.file_identity(filepath)
+
+    def _cached_file(self, filepath: str, identity: Optional[str]) -> Optional[str]:
+        """
+        Local path of the cached copy of a remote file, None when it is not cached.
+        """
+        if identity is None:
+            return None
+        path = self.cache.get_file(self.cache.key("file", identity), self._file_suffix(filepath))
+        if path is not None:
+            self.logs.info(f"File {filepath} read from the cache.")
+        return path
+
+    def load_file(self, filepath:str, as_table:bool=False, projection:Projection=None,
+                  identity:Optional[str]=None) -> Any:
+        """
+        Downloads and loads the file from blob storage based on its extension, compressed files
+        (events.csv.gz, .bz2, .xz, .zst) are decompressed as they are read.
+
+        Args:
+            filepath (str): Path of the file in the storage.
+            as_table (bool): Load the file as an Arrow Table (arrow engine), CSV and Parquet are
+                read by pyarrow and the other formats converted from pandas.
+            projection (Projection): Columns to read and their dtypes, CSV, Parquet and Excel
+                files skip the other columns. None reads every column.
+            identity (Optional[str]): Identity of the file when already known, to find it in the cache.
 
         Returns:
             Any: Parsed file content.
@@ -144,14 +1466,140 @@ class FileLoader:
             ".parquet": self._load_parquet
         }
         extention:str = self._detect_extention(filepath=filepath)
+        compression: Optional[str] = self._split_extention(filepath)[1]
+        data = None
         try:
-            if self.local_mode:
-                data = self._load_from_local(filepath)
+            with PeakMemory() as memory:
+                start = time.perf_counter()
+                timer = CheckTimer() if self.metrics is not None else None
+                identity = self._remote_identity(filepath, identity)
+                cached = self._cached_file(filepath, identity)
+                if self.local_mode or cached is not None:
+                    # every reader takes a local path and does its own (memory mapped or multithreaded) IO
+                    data = cached or filepath
+                    self.logs.debug(f"Reading file from local path: {data}")
+                else:
+                    self.logs.info(f"Downloading file from blob: {filepath}")
+                    with self._measure("download", filepath) as download:
+                        data = self.connector.read_file(filepath, **self.download_options)
+                        download["bytes"] = len(data)
+                    self.logs.info(f"File {filepath} downloaded successfully.")
+                    if identity is not None:
+                        self._cache_file(filepath, identity, data)
+                size = self._source_size(data)
+                if compression is not None:
+                    data = self._decompress(data, extention, compression)
+                if as_table:
+                    content = self._to_table(extention, data, projection)
+                elif extention in self.PROJECTED_FILES:
+                    content = extention_type.get(extention)(data, projection)
+                else:
+                    content = extention_type.get(extention)(data)
+            self.logs.info(f"File {filepath} loaded in {time.perf_counter() - start:.2f}s, {memory}")
+            if self.metrics is not None:
+                self.metrics.record("load", filepath, file=filepath, format=extention.lstrip("."),
+                                    engine="arrow" if as_table else "pandas", cached=cached is not None,
+                                    compression=compression, bytes=size, rows=self._count_rows(content),
+                                    **{**timer.stop(), "memory_delta_bytes": memory.increase},
+                                    peak_memory_bytes=memory.peak)
+            return content
+        except Exception as e:
+            self.logs.exception(f"Error loading file: {filepath}")
+            raise e
+        finally:
+            if isinstance(data, IOBase):
+                data.close()
+
+    def _to_table(self, extention: str, data: Source, projection: Projection = None):
+        """
+        Loads data of any supported format as an Arrow Table.
+        """
+        import pyarrow as pa
+
+        readers = {
+            ".csv": self._load_csv_table,
+            ".parquet": self._load_parquet_table,
+            ".xlsx": lambda d, p: _frame_to_table(self._load_excel(d, p)),
+            ".xml": lambda d, p: _frame_to_table(self._load_xml(d, p))
+        }
+        if extention in readers:
+            return readers[extention](data, projection)
+        if extention != ".json":
+            raise UnsupportedFileTypeError(f"Extension {extention} can not be loaded as a table")
+        return self._load_json_table(data, projection)
+
+    def iter_file(self, filepath:str, chunksize:Optional[int]=None, as_table:bool=False,
+                  projection:Projection=None, identity:Optional[str]=None,
+                  sample:Optional[Sampler]=None) -> Iterator[pd.DataFrame]:
+        """
+        Loads the file as a sequence of DataFrame chunks so it can be validated in streaming.
+        CSV is read with chunksize, Parquet batch by batch, JSON Lines line by line, XML record
+        by record and Excel row by row, local
+        files are read straight from disk and remote files through a ranged stream of the connector,
+        so only the parts being parsed are in memory. Compressed files are decompressed as they are read.
+        Other formats are loaded in full and yielded as a single chunk.
+
+        Args:
+            filepath (str): Path of the file in the storage.
+            chunksize (Optional[int]): Number of rows per chunk.
+            as_table (bool): Yield Arrow Tables (arrow engine) instead of DataFrames.
+            projection (Projection): Columns to read and their dtypes, None reads every column.
+            identity (Optional[str]): Identity of the file when already known, to find it in the cache.
+            sample (Optional[Sampler]): Sampler of the run, the row groups of Parquet files and the
+                blocks of lines of uncompressed CSV files are then picked at load time.
+
+        Yields:
+            pd.DataFrame: Chunk of the file.
+
+        Raises:
+            Exception: If file download or parsing fails.
+        """
+        chunksize = chunksize or self.DEFAULT_CHUNKSIZE
+        extention_type = {
+            ".csv": self._iter_csv_tables if as_table else self._iter_csv,
+            ".parquet": self._iter_parquet_tables if as_table else self._iter_parquet,
+            ".json": self._iter_json_tables if as_table else self._iter_json,
+            ".xml": self._iter_xml_tables if as_table else self._iter_xml,
+            ".xlsx": self._iter_excel_tables if as_table else self._iter_excel
+        }
+        extention:str = self._detect_extention(filepath=filepath)
+        compression: Optional[str] = self._split_extention(filepath)[1]
+        if extention not in extention_type:
+            yield self.load_file(filepath, as_table=as_table, projection=projection, identity=identity)
+            return
+
+        source = None
+        try:
+            cached = self._cached_file(filepath, self._remote_identity(filepath, identity))
+            if self.local_mode or cached is not None:
+                source = cached or filepath
+            elif hasattr(self.connector, "open_stream"):
+                self.logs.info(f"Streaming file from storage: {filepath}")
+                source = self.connector.open_stream(filepath, **self.download_options)
             else:
                 self.logs.info(f"Downloading file from blob: {filepath}")
-                data = self.connector.load_file(filepath)
+                with self._measure("download", filepath) as download:
+                    source = self.connector.read_file(filepath, **self.download_options)
+                    download["bytes"] = len(source)
                 self.logs.info(f"File {filepath} downloaded successfully.")
-            return extention_type.get(extention)(data)
+            size = self._source_size(source)
+            if compression is not None:
+                source = self._decompress(source, extention, compression)
+            if sample is not None and extention == ".parquet":
+                chunks = self._sample_parquet(source, chunksize, projection, sample, as_table)
+            elif sample is not None and extention == ".csv" and compression is None:
+                chunks = self._sample_csv(source, chunksize, projection, sample, as_table)
+            else:
+                chunks = extention_type.get(extention)(source, chunksize, projection)
+            if self.metrics is not None:
+                # only the time spent reading the chunks is measured, not the validation of each chunk
+                chunks = self.metrics.measure_iter("load", filepath, chunks, file=filepath,
+                                                   format=extention.lstrip("."), bytes=size, compression=compression,
+                                                   engine="arrow" if as_table else "pandas", streamed=True)
+            yield from chunks
         except Exception as e:
             self.logs.exception(f"Error loading file: {filepath}")
-            raise e
\ No newline at end of file
+            raise e
+        finally:
+            if isinstance(source, IOBase):
+                source.close()
\ No newline at end of file
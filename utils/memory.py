@@ -0,0 +1,85 @@
+import re
+import sys
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_PROC_STATUS = "/proc/self/status"
+
+
+def _read_status(field: str) -> Optional[int]:
+    """
+    Function to read a memory field of /proc/self/status, in bytes
+    """
+    try:
+        with open(_PROC_STATUS) as f:
+            match = re.search(rf"^{field}:\s+(\d+)\s+kB", f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(match.group(1)) * 1024 if match else None
+
+
+def resident_memory() -> int:
+    """
+    Function to return the current resident memory of the process in bytes, 0 when unknown
+    """
+    return _read_status("VmRSS") or 0
+
+
+def _max_rss() -> int:
+    """
+    Function to return the peak resident memory since the process started, in bytes, 0 when unknown
+    """
+    if resource is None:
+        return 0
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes everywhere else
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _peak() -> int:
+    """
+    Function to return the peak resident memory of the process in bytes, 0 when unknown
+    """
+    peak = _read_status("VmHWM")
+    return peak if peak is not None else _max_rss()
+
+
+class PeakMemory:
+    """
+    Context manager measuring the peak resident memory of the process while it is open.
+
+    The peak of the process is never reset, other blocks measuring at the same time (e.g. loads
+    running in parallel threads) are not disturbed. It is compared with the peak recorded when
+    entering: when it rose inside the block `peak` is the highest resident memory reached in the
+    block, otherwise it is the peak reached before and `since_start` is True (an upper bound of the
+    peak of the block). The measure is for the whole process, work done by other threads is included.
+    """
+
+    def __init__(self):
+        self.start: int = 0
+        self.peak: int = 0
+        self.since_start: bool = True
+        self._start_peak: int = 0
+
+    def __enter__(self):
+        self._start_peak = _peak()
+        self.start = _read_status("VmRSS") or 0
+        return self
+
+    def __exit__(self, *exc):
+        self.peak = _peak()
+        self.since_start = self.peak <= self._start_peak
+        return False
+
+    @property
+    def increase(self) -> int:
+        """Growth of the resident memory from the start of the block to the peak"""
+        return max(self.peak - self.start, 0)
+
+    def __str__(self) -> str:
+        scope = " since start" if self.since_start else ""
+        return f"peak memory {self.peak / 2**20:.1f} MiB{scope} (+{self.increase / 2**20:.1f} MiB)"
@@ -0,0 +1,251 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from utils.memory import resident_memory
+
+# fields summed when the measures of the checks of an action are added up
+_SUMMED = ("seconds", "cpu_seconds", "rows", "memory_delta_bytes")
+# metrics of the Prometheus export: field of the records, name and help
+_PROMETHEUS = (
+    ("seconds", "seconds", "Wall time"),
+    ("cpu_seconds", "cpu_seconds", "CPU time of the threads doing the work"),
+    ("rows", "rows", "Rows scanned"),
+    ("bytes", "bytes", "Bytes loaded"),
+    ("memory_delta_bytes", "memory_delta_bytes", "Growth of the resident memory"),
+    ("peak_memory_bytes", "peak_memory_bytes", "Peak resident memory"),
+    ("invalid_count", "invalid_rows", "Invalid rows found")
+)
+# attributes of the records turned into Prometheus labels
+_LABELS = ("file", "action", "position", "format", "engine")
+
+
+class CheckTimer:
+    """
+    Measure of one step (a check over a chunk, a read), started when created
+    """
+
+    __slots__ = ("start", "cpu", "rss", "wall")
+
+    def __init__(self):
+        self.wall = time.time_ns()
+        self.start = time.perf_counter()
+        self.cpu = time.thread_time()
+        self.rss = resident_memory()
+
+    def stop(self) -> Dict:
+        return {
+            "seconds": time.perf_counter() - self.start,
+            "cpu_seconds": time.thread_time() - self.cpu,
+            "memory_delta_bytes": max(resident_memory() - self.rss, 0),
+            "start_ns": self.wall,
+            "end_ns": time.time_ns()
+        }
+
+
+class Metrics:
+    """
+    Recorder of the wall time, CPU time, rows, bytes and memory of the loads and of the actions
+    of a run.
+
+    Every measure is a record: a dict with its `kind` (load, download, check, action, file, run),
+    its `name`, the measures and the attributes (file, action, column, ...). Records are logged as
+    structured records when a logger is given, and exported with `write_prometheus` and `write_spans`.
+    The recorder is not created when the metrics are disabled, the code measured only checks for None.
+    CPU time is the time of the thread doing the work, memory deltas are for the whole process.
+    """
+
+    def __init__(self, logs: Optional[logging.Logger] = None, labels: Optional[Dict] = None):
+        self.logs = logs
+        self.labels: Dict = labels or {}
+        self.records: List[Dict] = []
+        self.trace_id: str = uuid.uuid4().hex
+        self.span_id: str = uuid.uuid4().hex[:16]
+        self._checks: Dict[Tuple[int, int], Dict] = {}
+        self._lock = threading.Lock()
+
+    def scoped(self, **labels) -> "Metrics":
+        """
+        Function to return a recorder adding labels (e.g. the file) to its records, the records
+        are kept with the records of this recorder
+        """
+        scoped = Metrics(self.logs, {**self.labels, **labels})
+        scoped.records, scoped._lock = self.records, self._lock
+        scoped.trace_id, scoped.span_id = self.trace_id, self.span_id
+        return scoped
+
+    def record(self, kind: str, name: str, **fields) -> Dict:
+        """
+        Function to add a record and log it
+        """
+        record = {"kind": kind, "name": name, **self.labels, **fields}
+        if "seconds" in record:
+            record["rows_per_second"] = round(record["rows"] / record["seconds"], 1) \
+                if record.get("rows") and record["seconds"] else None
+        with self._lock:
+            self.records.append(record)
+        if self.logs is not None:
+            self.logs.info(f"{kind} {name}", extra={"metric": record})
+        return record
+
+    @contextmanager
+    def measure(self, kind: str, name: str, **fields) -> Iterator[Dict]:
+        """
+        Context manager recording the time and the memory growth of a block, the block can add
+        fields (rows, bytes, ...) to the yielded dict
+        """
+        extra: Dict = {}
+        timer = CheckTimer()
+        yield extra
+        self.record(kind, name, **fields, **timer.stop(), **extra)
+
+    def measure_iter(self, kind: str, name: str, chunks: Iterable, **fields) -> Iterator:
+        """
+        Function to record the time spent producing the chunks of an iterator, the time of the
+        consumer between two chunks is not counted
+        """
+        iterator = iter(chunks)
+        total = {"seconds": 0.0, "cpu_seconds": 0.0, "memory_delta_bytes": 0, "rows": 0}
+        first, last = None, None
+        try:
+            while True:
+                timer = CheckTimer()
+                try:
+                    chunk = next(iterator)
+                except StopIteration:
+                    return
+                finally:
+                    step = timer.stop()
+                    for field in ("seconds", "cpu_seconds", "memory_delta_bytes"):
+                        total[field] += step[field]
+                    first, last = first or step["start_ns"], step["end_ns"]
+                total["rows"] += len(chunk)
+                yield chunk
+        finally:
+            self.record(kind, name, **fields, **total, start_ns=first, end_ns=last)
+
+    def add_check(self, action, position: int, measures: Dict, rows: Optional[int] = None):
+        """
+        Function to accumulate the measures of one check of an action over one chunk
+        """
+        with self._lock:
+            entry = self._checks.setdefault((id(action), position), {
+                "seconds": 0.0, "cpu_seconds": 0.0, "rows": None, "memory_delta_bytes": 0,
+                "start_ns": measures.get("start_ns"), "end_ns": None
+            })
+            for field in ("seconds", "cpu_seconds", "memory_delta_bytes"):
+                entry[field] += measures.get(field) or 0
+            if rows is not None:
+                # None for the checks run by a database, the rows are not read
+                entry["rows"] = (entry["rows"] or 0) + rows
+            entry["end_ns"] = measures.get("end_ns")
+
+    def close_action(self, action, position: int, reports: List[Dict], finalize: Dict, **fields):
+        """
+        Function to record the checks of an action and the action itself, and add the measures
+        of every check to its report ("Metrics")
+
+        :params action: Finalized action
+        :params position: Position of the action in the configuration
+        :params reports: Reports of the action, one per check
+        :params finalize: Measures of the finalize of the action
+        """
+        name = type(action).__name__
+        total = {field: 0 for field in _SUMMED}
+        starts, ends = [finalize["start_ns"]], [finalize["end_ns"]]
+        for index, report in enumerate(reports):
+            measures = self._checks.pop((id(action), index), None)
+            if measures is None:
+                continue
+            for field in _SUMMED:
+                total[field] += measures[field] or 0
+            starts.append(measures["start_ns"])
+            ends.append(measures["end_ns"])
+            report["Metrics"] = {
+                "seconds": round(measures["seconds"], 6),
+                "cpu_seconds": round(measures["cpu_seconds"], 6),
+                "rows": measures["rows"],
+                "memory_delta_mib": round(measures["memory_delta_bytes"] / 2**20, 1)
+            }
+            self.record("check", name, action=name, position=position, column=report.get("Column"),
+                        invalid_count=report.get("Invalid_count"), **fields, **measures)
+        for field in ("seconds", "cpu_seconds", "memory_delta_bytes"):
+            total[field] += finalize[field]
+        # rows are scanned once per chunk by every check, the action scanned the rows of one check
+        total["rows"] = max((report.get("Metrics", {}).get("rows") or 0 for report in reports), default=0) or None
+        self.record("action", name, action=name, position=position, checks=len(reports),
+                    invalid_count=sum(report.get("Invalid_count") or 0 for report in reports),
+                    finalize_seconds=finalize["seconds"], **fields, **total,
+                    start_ns=min(start for start in starts if start), end_ns=max(end for end in ends if end))
+
+    def drain(self) -> List[Dict]:
+        """
+        Function to return the records and forget them, a long running process exports the records
+        of its runs without keeping them
+        """
+        with self._lock:
+            records = self.records[:]
+            del self.records[:]
+        return records
+
+    def write_prometheus(self, path: str, records: Optional[List[Dict]] = None):
+        """
+        Function to write the records (by default every record) in the Prometheus text format,
+        for the textfile collector of the node exporter, the file is replaced atomically
+        """
+        lines: List[str] = []
+        for field, metric, description in _PROMETHEUS:
+            samples = []
+            for record in self.records if records is None else records:
+                if record.get(field) is None or record["kind"] == "check":
+                    continue
+                labels = {"kind": record["kind"], "name": record["name"],
+                          **{label: record[label] for label in _LABELS if record.get(label) is not None}}
+                rendered = ",".join(f'{key}="{_escape(value)}"' for key, value in labels.items())
+                samples.append(f"dq_{metric}{{{rendered}}} {record[field]}")
+            if samples:
+                lines += [f"# HELP dq_{metric} {description}", f"# TYPE dq_{metric} gauge", *samples]
+        _write(path, "\n".join(lines) + "\n")
+
+    def write_spans(self, path: str, records: Optional[List[Dict]] = None):
+        """
+        Function to append the records (by default every record) to a file as OpenTelemetry style
+        spans, one JSON per line, all children of the span of the run
+        """
+        spans = []
+        for record in self.records if records is None else records:
+            if record.get("start_ns") is None:
+                continue
+            attributes = {key: value for key, value in record.items()
+                          if key not in ("kind", "name", "start_ns", "end_ns") and value is not None}
+            spans.append({
+                "trace_id": self.trace_id,
+                "span_id": self.span_id if record["kind"] == "run" else uuid.uuid4().hex[:16],
+                "parent_span_id": None if record["kind"] == "run" else self.span_id,
+                "name": f"{record['kind']} {record['name']}",
+                "start_time_unix_nano": record["start_ns"],
+                "end_time_unix_nano": record["end_ns"],
+                "attributes": {f"dq.{key}": value if isinstance(value, (int, float, str, bool)) else str(value)
+                               for key, value in attributes.items()}
+            })
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a") as f:
+            for span in spans:
+                f.write(json.dumps(span, ensure_ascii=True, default=str) + "\n")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _write(path: str, text: str):
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(text)
+    os.replace(tmp, path)
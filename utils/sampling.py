@@ -0,0 +1,257 @@
+import math
+from statistics import NormalDist
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+
+def _take(frame, rows: np.ndarray):
+    if isinstance(frame, pd.DataFrame):
+        return frame.take(rows).reset_index(drop=True)
+    return frame.take(rows)
+
+
+def _concat(frames: List):
+    if isinstance(frames[0], pd.DataFrame):
+        return pd.concat(frames, ignore_index=True, copy=False)
+    import pyarrow as pa
+
+    # the types of the chunks of a stream are inferred chunk by chunk
+    return pa.concat_tables(frames, promote_options="permissive")
+
+
+def _strata(frame, column: str) -> Tuple[np.ndarray, List]:
+    """
+    Function to return the stratum of every row of a chunk (codes) and the value of each stratum,
+    the missing values are one stratum (None)
+    """
+    values = frame[column] if isinstance(frame, pd.DataFrame) else frame.column(column).to_pandas()
+    codes, uniques = pd.factorize(values)
+    uniques = list(uniques)
+    if (codes < 0).any():
+        codes = np.where(codes < 0, len(uniques), codes)
+        uniques.append(None)
+    return codes, uniques
+
+
+def wilson_interval(invalid: int, rows: int, z: float) -> Tuple[float, float]:
+    """
+    Function to return the Wilson score interval of a ratio, it stays within [0, 1] and is not
+    empty when no invalid row was sampled
+    """
+    if not rows:
+        return 0.0, 1.0
+    ratio = min(invalid / rows, 1.0)
+    denominator = 1 + z ** 2 / rows
+    centre = (ratio + z ** 2 / (2 * rows)) / denominator
+    half = z * math.sqrt(ratio * (1 - ratio) / rows + z ** 2 / (4 * rows ** 2)) / denominator
+    return max(centre - half, 0.0), min(centre + half, 1.0)
+
+
+class Sampler:
+    """
+    Sample of the rows validated by a run (`execution.sample`), the invalid ratio of every check
+    is then estimated with a confidence interval.
+
+    - uniform: every row is kept with probability `fraction` (Bernoulli sampling), chunk by chunk
+    - reservoir: `rows` rows drawn uniformly from the whole input, every row gets a random key and
+      the rows with the smallest keys are kept, so only `rows` rows are held whatever the input size
+    - stratified: at most `rows` rows of every value of `column`, drawn the same way, each stratum
+      is weighted by its share of the input
+
+    With `at_load` the loader picks whole Parquet row groups or blocks of CSV lines and never reads
+    the rest of the file. The rows of a block are then sampled together: the interval assumes
+    independent rows, it is too narrow when the invalid rows are clustered in the file.
+    A sampler holds the state of one file, a new one is built for every file.
+    """
+
+    METHODS = ("uniform", "reservoir", "stratified")
+
+    def __init__(self, method: str = "uniform", fraction: Optional[float] = None, rows: Optional[int] = None,
+                 column: Optional[str] = None, seed: Optional[int] = None, confidence: float = 0.95,
+                 at_load: bool = True):
+        if method not in self.METHODS:
+            raise ValueError(f"Unsupported sampling method: {method}")
+        if method == "uniform" and not (fraction is not None and 0 < float(fraction) <= 1):
+            raise ValueError("Uniform sampling needs a fraction in (0, 1]")
+        if method != "uniform" and not (rows is not None and int(rows) > 0):
+            raise ValueError(f"{method.capitalize()} sampling needs a positive number of rows")
+        if method == "stratified" and not column:
+            raise ValueError("Stratified sampling needs a column")
+        if not 0 < float(confidence) < 1:
+            raise ValueError("The confidence must be in (0, 1)")
+        self.method = method
+        self.fraction = None if fraction is None else float(fraction)
+        self.rows = None if rows is None else int(rows)
+        self.column = column
+        self.confidence = float(confidence)
+        self.at_load = bool(at_load)
+        # rows of the input the sample is drawn from, counted or given by the loader
+        self.population: int = 0
+        self.population_estimated: bool = False
+        self._population_known: bool = False
+        # the loader already picked the sampled rows
+        self.presampled: bool = False
+        # rows of each stratum of the input and stratum of the last chunk of the sample
+        self.strata: Dict[Hashable, int] = {}
+        self.stratum: Optional[Hashable] = None
+        self._rng = np.random.default_rng(seed)
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict]) -> Optional["Sampler"]:
+        """
+        Function to build a sampler from the `execution.sample` section, None when not sampling
+
+        :params config: {"method": uniform|reservoir|stratified, "fraction": F, "rows": N, "column": C,
+                        "seed": S, "confidence": 0.95, "at_load": true}
+        """
+        if not config:
+            return None
+        return cls(method=config.get("method", "uniform"), fraction=config.get("fraction"),
+                   rows=config.get("rows"), column=config.get("column"), seed=config.get("seed"),
+                   confidence=config.get("confidence", 0.95), at_load=config.get("at_load", True))
+
+    def pick(self, units: int) -> Optional[np.ndarray]:
+        """
+        Function to return the units (row groups, blocks of lines) the loader reads, in the order
+        they are read, None to read every unit. Uniform sampling picks a `fraction` of the units,
+        a reservoir reads units in a random order until it holds `rows` rows.
+
+        :params units: Number of units of the file
+        """
+        if not self.at_load or units <= 1 or self.method == "stratified":
+            return None
+        if self.method == "uniform":
+            count = math.ceil(self.fraction * units)
+            if count >= units:
+                return None
+            return np.sort(self._rng.choice(units, count, replace=False))
+        return self._rng.permutation(units)
+
+    def loaded(self, population: int, estimated: bool = False):
+        """
+        Function to record the rows of a file read by picking units: its rows (or their estimate)
+        and, for uniform sampling, that the rows read are the sample
+        """
+        self.population = int(population)
+        self.population_estimated = estimated
+        self._population_known = True
+        self.presampled = self.method == "uniform"
+
+    def _count(self, chunk):
+        if not self._population_known:
+            self.population += len(chunk)
+
+    def apply(self, chunks: Iterable) -> Iterator:
+        """
+        Function to return the sample of a stream of chunks (DataFrames or Arrow Tables). A uniform
+        sample is yielded chunk by chunk, a reservoir once the input is consumed and a stratified
+        sample one chunk per stratum (`stratum`)
+        """
+        chunks = iter(chunks)
+        try:
+            if self.method == "uniform":
+                yield from self._uniform(chunks)
+            elif self.method == "reservoir":
+                yield from self._reservoir(chunks)
+            else:
+                yield from self._stratified(chunks)
+        finally:
+            # stops the reads of the loader when the consumer stops early
+            close = getattr(chunks, "close", None)
+            if close is not None:
+                close()
+
+    def _uniform(self, chunks: Iterator) -> Iterator:
+        for chunk in chunks:
+            self._count(chunk)
+            if self.presampled:
+                yield chunk
+            else:
+                yield _take(chunk, np.flatnonzero(self._rng.random(len(chunk)) < self.fraction))
+
+    def _reservoir(self, chunks: Iterator) -> Iterator:
+        kept, keys = None, np.empty(0)
+        for chunk in chunks:
+            self._count(chunk)
+            kept = chunk if kept is None else _concat([kept, chunk])
+            keys = np.concatenate([keys, self._rng.random(len(chunk))])
+            if len(keys) > self.rows:
+                # the rows keep the order they were read in
+                rows = np.sort(np.argpartition(keys, self.rows)[:self.rows])
+                kept, keys = _take(kept, rows), keys[rows]
+        if kept is not None:
+            yield kept
+
+    def _stratified(self, chunks: Iterator) -> Iterator:
+        kept, keys, labels = None, np.empty(0), np.empty(0, dtype=object)
+        for chunk in chunks:
+            self._count(chunk)
+            codes, uniques = _strata(chunk, self.column)
+            for value, count in zip(uniques, np.bincount(codes, minlength=len(uniques)).tolist()):
+                self.strata[value] = self.strata.get(value, 0) + count
+            kept = chunk if kept is None else _concat([kept, chunk])
+            keys = np.concatenate([keys, self._rng.random(len(chunk))])
+            labels = np.concatenate([labels, np.array(uniques, dtype=object)[codes]])
+            # the `rows` smallest keys of every stratum
+            codes = pd.factorize(labels)[0]
+            order = np.lexsort((keys, codes))
+            grouped = codes[order]
+            starts = np.r_[0, np.flatnonzero(np.diff(grouped)) + 1]
+            rank = np.arange(len(order)) - np.repeat(starts, np.diff(np.r_[starts, len(order)]))
+            rows = np.sort(order[rank < self.rows])
+            if len(rows) < len(keys):
+                kept, keys, labels = _take(kept, rows), keys[rows], labels[rows]
+        if kept is None:
+            return
+        codes, uniques = pd.factorize(labels)
+        for code, value in enumerate(uniques):
+            self.stratum = value
+            yield _take(kept, np.flatnonzero(codes == code))
+        if (codes < 0).any():
+            self.stratum = None
+            yield _take(kept, np.flatnonzero(codes < 0))
+
+    def estimate(self, invalid: int, rows: int, strata: Optional[Dict[Hashable, Tuple[int, int]]] = None) -> Dict:
+        """
+        Function to return the fields added to the report of a check validated on the sample: the
+        estimated invalid ratio of the input and its confidence interval (Wilson score interval,
+        for a stratified sample the weighted sum of the interval of each stratum)
+
+        :params invalid: Invalid rows of the sample
+        :params rows: Rows of the sample checked
+        :params strata: Invalid and checked rows of each stratum
+        """
+        z = NormalDist().inv_cdf(0.5 + self.confidence / 2)
+        population = self.population or None
+        # the invalid rows of a check comparing rows (duplicates) are not all in the stratum checked
+        if self.method == "stratified" and strata and len(strata) == len(self.strata) and all(bad <= n for bad, n in strata.values()) \
+                and sum(bad for bad, _ in strata.values()) == invalid and sum(n for _, n in strata.values()) == rows:
+            total = sum(self.strata.values())
+            ratio, low, high = 0.0, 0.0, 0.0
+            for value, (bad, checked) in strata.items():
+                size = self.strata.get(value, checked)
+                weight = size / total
+                ratio += weight * bad / max(checked, 1)
+                # a stratum sampled whole is exact
+                bounds = (bad / checked,) * 2 if checked >= size else wilson_interval(bad, checked, z)
+                low, high = low + weight * bounds[0], high + weight * bounds[1]
+        elif population is not None and rows >= population and not self.population_estimated:
+            ratio = invalid / rows if rows else 0.0
+            low = high = ratio
+        else:
+            ratio = invalid / rows if rows else 0.0
+            low, high = wilson_interval(invalid, rows, z)
+        fields = {
+            "Sample_method": self.method,
+            "Sampled_rows": rows,
+            "Population_rows": population,
+            "Estimated_invalid_ratio": round(ratio, 6),
+            "Confidence_interval": [round(low, 6), round(high, 6)],
+            "Confidence": self.confidence
+        }
+        if population is not None:
+            fields["Estimated_invalid_count"] = int(round(ratio * population))
+        if self.population_estimated:
+            fields["Population_estimated"] = True
+        return fields
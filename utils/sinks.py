@@ -0,0 +1,279 @@
+import gzip
+import json
+import os
+import re
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+import pandas as pd
+
+ENCODERS = ("auto", "json", "orjson")
+# suffix added to the results file for each compression
+COMPRESSIONS: Dict[Optional[str], str] = {None: "", "none": "", "gzip": ".gz", "zstd": ".zst"}
+# a folder per run, so a run never overwrites the results of the previous one
+DEFAULT_OUTPUT_PATH = "results/{run_id}/results"
+# folder of the details spilled by a run (`report.details.mode: spill`)
+DEFAULT_DETAILS_PATH = "results/details/{run_id}"
+
+
+def new_run_id() -> str:
+    """
+    Function to return a unique identifier of a run, sortable by its start time
+    """
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+
+def json_encoder(encoder: str = "auto", indent: bool = False) -> Callable[[object], bytes]:
+    """
+    Function to return a function encoding a value as JSON bytes, orjson (several times faster)
+    when it is installed and `encoder` is auto or orjson, the json module otherwise.
+    Values JSON does not know (timestamps, ...) are written as their str, orjson writes NaN as null.
+
+    :params encoder: auto, json or orjson
+    :params indent: Indent the document with 2 spaces
+    """
+    if encoder not in ENCODERS:
+        raise ValueError(f"Unsupported JSON encoder: {encoder}")
+    if encoder != "json":
+        try:
+            import orjson
+        except ImportError:
+            if encoder == "orjson":
+                raise
+        else:
+            option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return lambda value: orjson.dumps(value, default=str, option=option)
+    return lambda value: json.dumps(value, ensure_ascii=True, indent=2 if indent else None, default=str).encode("utf-8")
+
+
+def _open(path: Path, compression: Optional[str]):
+    if compression == "gzip":
+        return gzip.open(path, "wb", compresslevel=6)
+    if compression == "zstd":
+        # the zstd codec of pyarrow, no extra dependency
+        import pyarrow as pa
+        return pa.CompressedOutputStream(str(path), "zstd")
+    return open(path, "wb")
+
+
+def _slug(value) -> str:
+    return re.sub(r"[^0-9A-Za-z_.-]+", "_", str(value)).strip("_")
+
+
+class ResultSink(ABC):
+    """
+    Writer of the reports of a run.
+
+    The path of the results is a template (`{run_id}`, `{date}`, `{time}`) so runs do not overwrite
+    each other, files are written to a temporary name and renamed when complete. Details with at
+    least `details_min_rows` rows can be written to a Parquet file next to the results
+    (`details: parquet`), the report then holds its path as with the spill details.
+    The written files can be uploaded with the `upload_file` method of a storage connector.
+    """
+
+    extension: str = ""
+    # reports are written as soon as a file is validated
+    streaming: bool = False
+
+    def __init__(self, path: str = DEFAULT_OUTPUT_PATH, encoder: str = "auto", compression: Optional[str] = None,
+                 details: str = "inline", details_min_rows: int = 0, run_id: Optional[str] = None):
+        if compression not in COMPRESSIONS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        if details not in ("inline", "parquet"):
+            raise ValueError(f"Unsupported details output: {details}")
+        self.run_id = run_id or new_run_id()
+        now = datetime.now()
+        base = path.format(run_id=self.run_id, date=now.strftime("%Y%m%d"), time=now.strftime("%H%M%S"))
+        self._base = base
+        # folder of the template before any placeholder, uploaded keys are relative to it
+        fixed = path.split("{")[0]
+        self._root = Path(fixed) if fixed.endswith(("/", os.sep)) else Path(fixed or ".").parent
+        self.path = Path(f"{base}{self.extension}{COMPRESSIONS[compression]}")
+        self.compression = compression if compression != "none" else None
+        self.encoder = encoder
+        self.details = details
+        self.details_min_rows = int(details_min_rows)
+        self.written: List[Path] = []
+        self._tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp")
+        self._file = None
+        self._count = 0
+
+    def __enter__(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = _open(self._tmp, self.compression)
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self._finish()
+        self._file.close()
+        if exc_type is None:
+            os.replace(self._tmp, self.path)
+            self.written.append(self.path)
+        else:
+            os.remove(self._tmp)
+        return False
+
+    def _finish(self):
+        """
+        Function to write what is buffered before the file is closed
+        """
+        pass
+
+    def _details(self, report: Dict, filepath: Optional[str]) -> Dict:
+        """
+        Function to move large details to a Parquet file
+        """
+        details = report.get("Details")
+        if self.details != "parquet" or not isinstance(details, list) or not details \
+                or len(details) < self.details_min_rows:
+            return report
+        name = "_".join(filter(None, [_slug(Path(filepath).name) if filepath else None, str(self._count),
+                                      _slug(report.get("Action", "")), _slug(report.get("Column", ""))]))
+        path = Path(f"{self._base}.details") / f"{name}.parquet"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # indices details are positions, the other modes rows
+        frame = pd.DataFrame(details) if isinstance(details[0], dict) else pd.DataFrame({"_position": details})
+        try:
+            frame.to_parquet(path, index=False)
+        except (TypeError, ValueError):
+            # columns mixing types (the invalid values) are written as text
+            frame.astype(str).to_parquet(path, index=False)
+        self.written.append(path)
+        return {**report, "Details": str(path)}
+
+    @abstractmethod
+    def write_file(self, filepath: Optional[str], reports: List[Dict]):
+        """
+        Function to write the reports of one file, `filepath` is None for a run over a single file
+        """
+        pass
+
+    @abstractmethod
+    def write_dataset(self, entries: List[Dict]):
+        """
+        Function to write the aggregated reports of a run over many files
+        """
+        pass
+
+    def upload(self, connector, prefix: str = "") -> List[str]:
+        """
+        Function to upload the written files with the `upload_file` method of a storage connector,
+        the keys keep the layout of the files under the fixed folder of the path template
+        (with the run id when the template has one)
+
+        :params connector: S3 or Blob connection
+        :params prefix: Prefix of the keys in the storage
+        """
+        keys = []
+        for path in self.written:
+            relative = path.relative_to(self._root).as_posix()
+            key = f"{prefix.rstrip('/')}/{relative}" if prefix else relative
+            connector.upload_file(key, str(path))
+            keys.append(key)
+        return keys
+
+
+class JsonSink(ResultSink):
+    """
+    Results as one JSON document: the list of reports of a file, or {"files": ..., "dataset": ...}
+    for many files. The document is built when the sink is closed.
+    """
+
+    extension = ".json"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._files: Dict[Optional[str], List[Dict]] = {}
+        self._dataset: Optional[List[Dict]] = None
+
+    def write_file(self, filepath, reports):
+        prepared = []
+        for report in reports:
+            prepared.append(self._details(report, filepath))
+            self._count += 1
+        self._files[filepath] = prepared
+
+    def write_dataset(self, entries):
+        self._dataset = entries
+
+    def _finish(self):
+        if self._dataset is None and list(self._files) == [None]:
+            document = self._files[None]
+        else:
+            document = {"files": self._files, "dataset": self._dataset or []}
+        self._file.write(json_encoder(self.encoder, indent=True)(document))
+
+
+class NdjsonSink(ResultSink):
+    """
+    Results as one JSON object per line, written as soon as a file is validated: the reports with
+    the file they belong to ("File"), then the aggregated reports ("Scope": "dataset").
+    """
+
+    extension = ".ndjson"
+    streaming = True
+
+    def write_file(self, filepath, reports):
+        encode = json_encoder(self.encoder)
+        for report in reports:
+            line = self._details(report, filepath)
+            if filepath is not None:
+                line = {"File": filepath, **line}
+            self._file.write(encode(line) + b"\n")
+            self._count += 1
+
+    def write_dataset(self, entries):
+        encode = json_encoder(self.encoder)
+        for entry in entries:
+            self._file.write(encode({"Scope": "dataset", **entry}) + b"\n")
+
+
+SINKS = {"json": JsonSink, "ndjson": NdjsonSink}
+
+
+def named_output(config: Optional[Dict], name: str) -> Dict:
+    """
+    Function to return the output configuration of one of many configs run by the same process,
+    by default results/<name>/<run_id>/results so their results never overwrite each other
+
+    :params config: output configuration of the config
+    :params name: Name of the config
+    """
+    config = config or {}
+    return {**config, "path": config.get("path", f"results/{name}/{{run_id}}/results")}
+
+
+def run_details(details: Optional[Dict], run_id: str) -> Optional[Dict]:
+    """
+    Function to return the details policy of a run, spilled details go to a folder of the run
+    (results/details/<run_id> by default, `{run_id}` in `path` is replaced) so runs do not overwrite
+    the files of each other
+
+    :params details: Details policy of the config
+    :params run_id: Identifier of the run
+    """
+    if not details or details.get("mode") != "spill":
+        return details
+    return {**details, "path": details.get("path", DEFAULT_DETAILS_PATH).format(run_id=run_id)}
+
+
+def build_sink(config: Optional[Dict], run_id: Optional[str] = None) -> ResultSink:
+    """
+    Function to build the sink of the results from the output configuration
+
+    :params config: {"path": template, "format": json|ndjson, "encoder": auto|json|orjson,
+                    "compression": gzip|zstd, "details": inline|parquet, "details_min_rows": N}
+    :params run_id: Identifier of the run, a new one by default
+    """
+    config = config or {}
+    fmt = config.get("format", "json")
+    if fmt not in SINKS:
+        raise ValueError(f"Unsupported results format: {fmt}")
+    return SINKS[fmt](path=config.get("path", DEFAULT_OUTPUT_PATH), encoder=config.get("encoder", "auto"),
+                      compression=config.get("compression"), details=config.get("details", "inline"),
+                      details_min_rows=config.get("details_min_rows", 0), run_id=config.get("run_id", run_id))
@@ -0,0 +1,257 @@
+import bz2
+import gzip
+import io
+import lzma
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional, Union
+
+# fetch(start, end) -> bytes of the object in [start, end)
+Fetch = Callable[[int, int], bytes]
+
+DEFAULT_PART_SIZE: int = 8 * 1024 * 1024
+DEFAULT_CONCURRENCY: int = 8
+
+
+class MemoryReader(io.RawIOBase):
+    """
+    Read only, seekable file-like view over a bytes-like object, it never copies the buffer
+    (BytesIO copies bytearray and memoryview on creation).
+    """
+
+    def __init__(self, data: Union[bytes, bytearray, memoryview]):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(base + offset, 0)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), max(len(self._view) - self._pos, 0))
+        buffer[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+    def close(self):
+        # a memory map can only be closed once no view of it is left
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
+def as_stream(data: Union[bytes, bytearray, memoryview]) -> io.IOBase:
+    """
+    Function to wrap downloaded data in a file-like object without copying it
+    """
+    if isinstance(data, bytes):
+        # BytesIO shares the memory of an immutable bytes object until it is written
+        return io.BytesIO(data)
+    return io.BufferedReader(MemoryReader(data), buffer_size=1024 * 1024)
+
+
+class _Borrowed(io.RawIOBase):
+    """
+    View of a stream that is left open when the reader wrapping it is closed or collected.
+    """
+
+    def __init__(self, stream: io.IOBase):
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        return self._stream.readinto(buffer)
+
+
+def borrow(stream: io.IOBase, buffer_size: int = 1024 * 1024) -> io.BufferedReader:
+    """
+    Function to return a buffered reader of a stream that leaves the stream open when it is closed,
+    so the stream can be read again from where it was
+
+    :params stream: Binary stream, raw or buffered
+    :params buffer_size: Bytes read from the stream at once
+    """
+    return io.BufferedReader(_Borrowed(stream), buffer_size=buffer_size)
+
+
+def _zstd_reader(stream: io.IOBase):
+    try:
+        import zstandard
+    except ImportError:
+        # the zstd codec of pyarrow, no extra dependency
+        import pyarrow as pa
+        return pa.CompressedInputStream(pa.PythonFile(_Borrowed(stream), mode="r"), "zstd")
+    return zstandard.ZstdDecompressor().stream_reader(stream, read_across_frames=True, closefd=False)
+
+
+# reader of the decompressed content of a stream, for each compression
+DECOMPRESSORS: Dict[str, Callable] = {
+    "gzip": lambda stream: gzip.GzipFile(fileobj=stream, mode="rb"),
+    "bz2": lambda stream: bz2.BZ2File(stream, mode="rb"),
+    "xz": lambda stream: lzma.LZMAFile(stream, mode="rb"),
+    "zstd": _zstd_reader
+}
+
+
+class DecompressingReader(io.RawIOBase):
+    """
+    Read only stream of the decompressed content of a compressed stream, inflated as it is read
+    so only a buffer of it is in memory. Seeking forward decompresses up to the position, seeking
+    backward starts again from the beginning, the end is unknown until it is reached.
+    The compressed stream is closed with the reader.
+    """
+
+    def __init__(self, stream: io.IOBase, compression: str, compressed_size: Optional[int] = None):
+        if compression not in DECOMPRESSORS:
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.compression = compression
+        self.compressed_size = compressed_size
+        self._stream = stream
+        self._start = stream.tell()
+        self._open()
+
+    def _open(self):
+        self._stream.seek(self._start)
+        self._reader = DECOMPRESSORS[self.compression](self._stream)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_END:
+            raise io.UnsupportedOperation("The size of compressed content is unknown")
+        target = max(offset + (self._pos if whence == io.SEEK_CUR else 0), 0)
+        if target < self._pos:
+            self._open()
+        while self._pos < target:
+            skipped = len(self._reader.read(min(target - self._pos, 1024 * 1024)))
+            if not skipped:
+                break
+            self._pos += skipped
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        size = self._reader.readinto(buffer)
+        self._pos += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._reader.close()
+            self._stream.close()
+        super().close()
+
+
+def decompress(stream: io.IOBase, compression: str, compressed_size: Optional[int] = None) -> io.BufferedReader:
+    """
+    Function to return a buffered stream of the decompressed content of a stream
+
+    :params stream: Seekable binary stream of the compressed data
+    :params compression: gzip, bz2, xz or zstd
+    :params compressed_size: Size of the compressed data, reported as the size of the stream
+    """
+    return io.BufferedReader(DecompressingReader(stream, compression, compressed_size), buffer_size=1024 * 1024)
+
+
+def download_parts(size: int, fetch: Fetch, part_size: Optional[int] = None,
+                   concurrency: Optional[int] = None) -> bytearray:
+    """
+    Function to download an object with concurrent range requests into one preallocated buffer
+
+    :params size: Size of the object in bytes
+    :params fetch: Function returning the bytes of a range of the object
+    :params part_size: Size of every range request
+    :params concurrency: Number of range requests in flight
+    """
+    part_size = part_size or DEFAULT_PART_SIZE
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+
+    def download(start: int):
+        end = min(start + part_size, size)
+        view[start:end] = fetch(start, end)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for future in [pool.submit(download, start) for start in range(0, size, part_size)]:
+            future.result()
+    return buffer
+
+
+class RangedReader(io.RawIOBase):
+    """
+    Seekable file-like object over a remote object read with range requests.
+    The parts after the current position are downloaded ahead in parallel, so memory
+    is bounded by concurrency * part_size whatever the size of the object.
+    """
+
+    def __init__(self, size: int, fetch: Fetch, part_size: Optional[int] = None,
+                 concurrency: Optional[int] = None):
+        self.size = size
+        self.fetch = fetch
+        self.part_size = part_size or DEFAULT_PART_SIZE
+        self.concurrency = concurrency or DEFAULT_CONCURRENCY
+        self._pos = 0
+        self._parts: Dict[int, Future] = {}
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self.size}[whence]
+        self._pos = max(base + offset, 0)
+        return self._pos
+
+    def _part(self, index: int) -> bytes:
+        # keep the current part and the next ones in flight, drop everything else
+        wanted = range(index, min(index + self.concurrency, -(-self.size // self.part_size)))
+        for stale in [i for i in self._parts if i not in wanted]:
+            self._parts.pop(stale).cancel()
+        for i in wanted:
+            if i not in self._parts:
+                start = i * self.part_size
+                self._parts[i] = self._pool.submit(self.fetch, start, min(start + self.part_size, self.size))
+        return self._parts[index].result()
+
+    def readinto(self, buffer) -> int:
+        if self._pos >= self.size:
+            return 0
+        index, offset = divmod(self._pos, self.part_size)
+        part = self._part(index)
+        size = min(len(buffer), len(part) - offset)
+        buffer[:size] = part[offset:offset + size]
+        self._pos += size
+        return size
+
+    def close(self):
+        if not self.closed:
+            for future in self._parts.values():
+                future.cancel()
+            self._parts.clear()
+            self._pool.shutdown(wait=False)
+        super().close()
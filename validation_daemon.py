@@ -0,0 +1,233 @@
+import copy
+import signal
+import threading
+import time
+import yaml
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from logging import Logger
+from pathlib import Path
+from typing import Deque, Dict, List, Optional, Tuple
+from services.local_connection import LocalConnection
+from utils.cron import CronSchedule
+from utils.sinks import named_output
+from validation_processor import ValidationProcessor
+
+
+class Watch:
+    """
+    Config loaded by the daemon: its ValidationProcessor, built once with its storage clients
+    (the plan of the actions is compiled again at every run), and the state of its watch
+    (identity of the files already dispatched), of its schedule and if one of its runs is running.
+    """
+
+    def __init__(self, name: str, processor: ValidationProcessor, options: Dict):
+        self.name = name
+        self.processor = processor
+        storage: Dict = processor.schema.get("storage")
+        self.pattern: str = storage.get(storage.get("type"))
+        # a table has no new files, it is only validated on a schedule
+        self.watch: bool = bool(options.get("watch", not processor._database))
+        self.interval: float = float(options.get("interval", 10))
+        # remote objects are only dispatched when new, unless their ETag is checked at every poll
+        self.track_changes: bool = bool(options.get("track_changes", False))
+        self.process_existing: bool = bool(options.get("process_existing", False))
+        self.schedule: Optional[CronSchedule] = CronSchedule(options["schedule"]) if options.get("schedule") else None
+        self.seen: Dict[str, str] = {}
+        self._candidates: Dict[str, str] = {}
+        self.next_poll: float = 0.0
+        self.last_fired: Optional[datetime] = None
+        # the processor (and its metrics) holds the state of one run, runs of a config never overlap
+        self.running: bool = False
+
+    def _identity(self, filepath: str) -> str:
+        if self.processor.local_mode:
+            return LocalConnection().get_identity(filepath)
+        if self.track_changes:
+            return self.processor.connector.get_identity(filepath)
+        return "listed"
+
+    def _list(self) -> Dict[str, str]:
+        if self.processor._is_multi_file(self.pattern):
+            files = self.processor._list_files(self.pattern, verbose=False)
+        else:
+            files = [self.pattern]
+        identities = {}
+        for filepath in files:
+            try:
+                identities[filepath] = self._identity(filepath)
+            except Exception:
+                # removed between the listing and the identity, or not created yet
+                continue
+        return identities
+
+    def start(self):
+        """
+        Function to take the files already in the storage as seen, unless they must be processed
+        """
+        if self.watch and not self.process_existing:
+            self.seen = self._list()
+
+    def poll(self, settle: bool = True) -> List[str]:
+        """
+        Function to return the files that are new or changed since they were dispatched. A local
+        file is only ready once it is unchanged for a whole interval, so files still being written
+        are not validated, unless `settle` is False.
+        """
+        current = self._list()
+        ready = []
+        for filepath, identity in current.items():
+            if self.seen.get(filepath) == identity:
+                continue
+            if settle and self.processor.local_mode and self._candidates.get(filepath) != identity:
+                continue
+            self.seen[filepath] = identity
+            ready.append(filepath)
+        self._candidates = current
+        # forget the deleted files, a file created again with the same path is new
+        self.seen = {filepath: identity for filepath, identity in self.seen.items() if filepath in current}
+        return ready
+
+
+class ValidationDaemon:
+    """
+    Long running process validating the configs of a folder.
+
+    Every config is loaded once in a ValidationProcessor, with the clients of the storage shared
+    between the configs (Service_Manager reuse), so a file is dispatched in milliseconds instead
+    of starting a process. Each config watches its storage path (local folders are polled with
+    stat, S3 and Blob prefixes listed), new files are validated on a bounded pool of workers, and
+    a cron schedule (`daemon.schedule`) validates the whole path periodically.
+    """
+
+    def __init__(self, folder: str, logs: Logger, workers: int = 4, use_cache: bool = True):
+        self.folder = Path(folder)
+        self.logs = logs
+        self.workers = max(int(workers), 1)
+        self.use_cache = use_cache
+        self.watches: List[Watch] = []
+        self._backlog: Deque[Tuple[Watch, Optional[str], float]] = deque()
+        self._inflight = 0
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def load(self):
+        """
+        Function to load every config (*.yml, *.yaml) of the folder
+        """
+        for path in sorted([*self.folder.glob("*.yml"), *self.folder.glob("*.yaml")]):
+            with open(path, "r") as f:
+                schema = yaml.safe_load(f)
+            if not isinstance(schema, dict) or "storage" not in schema or "actions" not in schema:
+                self.logs.warning(f"Skipping {path}, it is not a validation config")
+                continue
+            schema = copy.deepcopy(schema)
+            # runs of the daemon never overwrite each other
+            schema["output"] = named_output(schema.get("output"), path.stem)
+            processor = ValidationProcessor(schema, self.logs, use_cache=self.use_cache, reuse_connection=True)
+            watch = Watch(path.stem, processor, schema.get("daemon") or {})
+            watch.start()
+            self.watches.append(watch)
+            schedule = f", schedule {watch.schedule.expression}" if watch.schedule else ""
+            self.logs.info(f"Config {path.stem} loaded, watching {watch.pattern if watch.watch else 'nothing'}{schedule}")
+
+    def _enqueue(self, watch: Watch, filepath: Optional[str]):
+        with self._lock:
+            self._backlog.append((watch, filepath, time.perf_counter()))
+
+    def _dispatch(self):
+        """
+        Function to submit the queued runs while there are free workers, the others wait in the
+        backlog. A config runs one file at a time, its next runs wait until it is done.
+        """
+        with self._lock:
+            waiting: Deque[Tuple[Watch, Optional[str], float]] = deque()
+            while self._backlog and self._inflight < self.workers:
+                watch, filepath, queued = self._backlog.popleft()
+                if watch.running:
+                    waiting.append((watch, filepath, queued))
+                    continue
+                watch.running = True
+                self._inflight += 1
+                self._pool.submit(self._execute, watch, filepath, queued)
+            # the runs of busy configs keep their place
+            self._backlog.extendleft(reversed(waiting))
+
+    def _execute(self, watch: Watch, filepath: Optional[str], queued: float):
+        start = time.perf_counter()
+        target = filepath or watch.pattern
+        self.logs.info(f"[{watch.name}] Validating {target}, dispatched in {(start - queued) * 1000:.1f} ms")
+        try:
+            watch.processor.run(filepath)
+            self.logs.info(f"[{watch.name}] {target} validated in {time.perf_counter() - start:.2f}s")
+        except Exception:
+            self.logs.exception(f"[{watch.name}] Validation of {target} failed")
+        finally:
+            with self._lock:
+                watch.running = False
+                self._inflight -= 1
+                self._idle.notify_all()
+            self._dispatch()
+
+    def tick(self, now: Optional[datetime] = None, settle: bool = True):
+        """
+        Function to poll the watches that are due and fire the schedules of the current minute
+        """
+        now = now or datetime.now()
+        clock = time.monotonic()
+        for watch in self.watches:
+            if watch.watch and clock >= watch.next_poll:
+                watch.next_poll = clock + watch.interval
+                try:
+                    for filepath in watch.poll(settle):
+                        self._enqueue(watch, filepath)
+                except Exception:
+                    self.logs.exception(f"[{watch.name}] Polling {watch.pattern} failed")
+            if watch.schedule is not None:
+                minute = now.replace(second=0, microsecond=0)
+                if watch.last_fired != minute and watch.schedule.matches(minute):
+                    watch.last_fired = minute
+                    self._enqueue(watch, None)
+        self._dispatch()
+
+    def wait_idle(self):
+        """
+        Function to wait until every queued and running validation is done
+        """
+        with self._idle:
+            self._idle.wait_for(lambda: not self._backlog and not self._inflight)
+
+    def stop(self, *args):
+        self._stop.set()
+
+    def serve(self, once: bool = False):
+        """
+        Function to run the daemon until SIGINT or SIGTERM, the running validations are finished
+        before it exits, the queued ones are dropped
+
+        :params once: Poll every watch once, wait for the validations and return
+        """
+        if not self.watches:
+            self.load()
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="dq-worker")
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGINT, self.stop)
+            signal.signal(signal.SIGTERM, self.stop)
+        period = min([1.0, *[watch.interval for watch in self.watches if watch.watch]])
+        try:
+            while not self._stop.is_set():
+                self.tick(settle=not once)
+                if once:
+                    self.wait_idle()
+                    break
+                self._stop.wait(period)
+        finally:
+            with self._lock:
+                if self._backlog:
+                    self.logs.warning(f"Stopping, {len(self._backlog)} queued validations dropped")
+                self._backlog.clear()
+            self._pool.shutdown(wait=True)
+            self.logs.info("Daemon stopped")
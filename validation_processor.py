@@ -1,15 +1,27 @@
 import yaml
+import re
 import pandas as pd
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from fnmatch import fnmatch
+from itertools import islice
 from pathlib import Path
 import xml.etree.ElementTree as ET
 import json
-from typing import Dict, Optional, Union, List, Tuple
+from typing import Any, Callable, Dict, Optional, Union, List, Tuple
 import numpy as np
 from logging import Logger
+from contextlib import nullcontext
+from utils.cache import DEFAULT_CACHE_PATH, DEFAULT_CACHE_SIZE, ResultCache
+from utils.metrics import Metrics
+from utils.sampling import Sampler
+from utils.sinks import ResultSink, build_sink, new_run_id, run_details
+from logs.logs import LoggerFactory
 from utils.fileloader import FileLoader
 from services.service_manager import Service_Manager
+from services.local_connection import LocalConnection
 from pipeline.pipeline import Pipeline
+from pipeline.sql import SqlSource
 import jsonschema
 
 class UnsupportedFileTypeError(Exception):
@@ -18,7 +30,8 @@ class UnsupportedFileTypeError(Exception):
 
 class ValidationProcessor(FileLoader):
 
-    def __init__(self, schema_path: Union[Dict,Path,str], logs:Logger):
+    def __init__(self, schema_path: Union[Dict,Path,str], logs:Logger, use_cache:bool=True,
+                 reuse_connection:bool=False):
        
         self.logs = logs
         
@@ -28,8 +41,23 @@ class ValidationProcessor(FileLoader):
             self.schema = schema_path
         #self._validate_schema()
         self._mode = self.schema.get("storage").get("type")=='local' 
-        self.connector = Service_Manager.get_connection(self.schema.get("storage").get("type"))
-        super().__init__(logs=logs, storage_connector=self.connector, local_mode=self._mode)
+        self.connector = Service_Manager.get_connection(self.schema.get("storage").get("type"), reuse=reuse_connection)
+        self._database = self.connector.__connection__ == "Db_Connection"
+        cache_config: Dict = self.schema.get("cache") or {}
+        cache: Optional[ResultCache] = None
+        if use_cache and cache_config.get("enabled", False):
+            cache = ResultCache(path=cache_config.get("path", DEFAULT_CACHE_PATH),
+                                max_size=cache_config.get("max_size", DEFAULT_CACHE_SIZE))
+        self.metrics_config: Dict = self.schema.get("metrics") or {}
+        metrics: Optional[Metrics] = None
+        if self.metrics_config.get("enabled", False):
+            structured = LoggerFactory.get_logger("metrics", structured=True) if self.metrics_config.get("log", True) else None
+            metrics = Metrics(logs=structured)
+        super().__init__(logs=logs, storage_connector=self.connector, local_mode=self._mode,
+                         download_options=self.schema.get("storage").get("download"),
+                         read_options=self.schema.get("storage").get("read"),
+                         cache=cache, identity=cache_config.get("identity", "metadata"),
+                         metrics=metrics)
     
     def _validate_schema(self):
         self.logs.info(f"Initializing validation with schema")
@@ -61,17 +89,388 @@ class ValidationProcessor(FileLoader):
         with open(schema_path, "r") as f:
             return yaml.safe_load(f)
 
-    def run(self):
-        """                                                                                                                                                                                                                                                              
-        Function to get validations and data
+    def _list_files(self, pattern: str, verbose: bool = True) -> List[str]:
+        """
+        Lists the objects matched by a prefix (path ending with "/") or a glob pattern.
+
+        Args:
+            pattern (str): Prefix or glob of the objects in the storage.
+            verbose (bool): Log the number of matched and skipped objects.
+
+        Returns:
+            List[str]: Sorted paths of the matched objects.
+        """
+        glob_at = min([pattern.find(c) for c in "*?[" if c in pattern], default=-1)
+        prefix = pattern if glob_at < 0 else pattern[:glob_at]
+
+        if self.local_mode:
+            files = LocalConnection().get_list_files(folder=prefix)
+        elif self.connector.__connection__ == "Blob_Connection":
+            files = self.connector.get_list_files(folder=prefix)
+        else:
+            files = self.connector.get_list_files(prefix=prefix)
+
+        if glob_at >= 0:
+            files = [f for f in files if fnmatch(f, pattern)]
+        supported = [f for f in files if self._split_extention(f)[0] in self.SUPPORTED_FILES]
+        if len(supported) < len(files) and verbose:
+            self.logs.warning(f"Skipping {len(files) - len(supported)} files with unsupported extensions")
+        files = supported
+        if verbose:
+            self.logs.info(f"{len(files)} files matched by {pattern}")
+        return sorted(files)
+
+    def _is_multi_file(self, filepath: str) -> bool:
+        if self._database:
+            return False
+        return filepath.endswith("/") or any(c in filepath for c in "*?[")
+
+    def _projection(self, details: Optional[Dict], actions: List[Dict],
+                    sample: Optional[Dict] = None) -> Optional[Dict[str, Optional[str]]]:
+        """
+        Columns read by the actions and the dtypes they can be loaded with, plus the column of a
+        stratified sample. Every column is read when the details ask for full rows
+        (`report.details.full_rows: true`).
+
+        Args:
+            details (Optional[Dict]): Details policy of the run.
+            actions (List[Dict]): Actions to run.
+            sample (Optional[Dict]): Sampling policy of the run (`execution.sample`).
+
+        Returns:
+            Optional[Dict[str, Optional[str]]]: Columns to load, None for every column.
+        """
+        if (details or {}).get("full_rows"):
+            return None
+        projection = Pipeline().projection(actions)
+        column = (sample or {}).get("column")
+        if column and sample.get("method") == "stratified":
+            # the strata are read from the loaded rows, the column is loaded even when no action reads it
+            projection.setdefault(column, None)
+        return projection
+
+    def _cache_keys(self, identity: str, options: Dict, projection: Optional[Dict[str, Optional[str]]]) -> List[Optional[str]]:
+        """
+        Addresses in the cache of the reports of each action for one version of a file.
+        Each action is addressed by its own columns and the dtypes they are loaded with, so adding
+        or editing an action keeps the reports of the others. Actions spilling their details to
+        files are never cached, nor a sample drawn without a seed (it changes at every run).
+
+        Args:
+            identity (str): Identity of the file.
+            options (Dict): Options of the run that change the reports (details, engine, sample, fail fast
+                and read options of the storage).
+            projection (Optional[Dict[str, Optional[str]]]): Columns loaded, None for every column.
+
+        Returns:
+            List[Optional[str]]: Address of each action, None when it can not be cached.
+        """
+        keys: List[Optional[str]] = []
+        if options.get("sample") and options["sample"].get("seed") is None:
+            return [None] * len(self.schema.get("actions"))
+        for action in self.schema.get("actions"):
+            params: Dict = list(action.values())[0] or {}
+            details: Dict = params.get("details", options.get("details")) or {}
+            if details.get("mode") == "spill":
+                keys.append(None)
+                continue
+            columns = None if projection is None else \
+                {column: projection.get(column) for column in Pipeline().projection([action])}
+            keys.append(self.cache.key(identity, action, {**options, "columns": columns}))
+        return keys
+
+    def _measure(self, kind: str, name: str):
+        """
+        Records the time of a whole file or run when metrics are enabled.
+        """
+        if self.metrics is None:
+            return nullcontext({})
+        return self.metrics.measure(kind, name)
+
+    def validate_file(self, filepath: str, details: Optional[Dict] = None,
+                      load: Optional[Callable[[], Any]] = None) -> List[Dict]:
+        """
+        Loads one file and runs the actions of the schema over it.
+        With metrics enabled the reports of the actions that ran hold the measures of their checks.
+
+        Args:
+            filepath (str): Path of the file in the storage.
+            details (Optional[Dict]): Details policy, defaults to report.details of the schema.
+            load (Optional[Callable[[], Any]]): Returns the content of the file already loaded
+                (e.g. shared by many configs), only called when an action is not cached.
+
+        Returns:
+            List[Dict]: Reports of the actions.
+        """
+        with self._measure("file", filepath) as measures:
+            reports = self._validate_file(filepath, details, load)
+            measures.update(file=filepath, checks=len(reports))
+        return reports
+
+    def _validate_file(self, filepath: str, details: Optional[Dict] = None,
+                       load: Optional[Callable[[], Any]] = None) -> List[Dict]:
+        """
+        Runs the actions of the schema over one file, reading their reports from the cache when possible.
+        """
+        execution: Dict = self.schema.get("execution") or {}
+        if details is None:
+            details = (self.schema.get("report") or {}).get("details")
+        if details and details.get("mode") == "spill" and "path" not in details:
+            # a file validated outside of a run spills to a folder of its own
+            details = run_details(details, new_run_id())
+        options: Dict = {
+            "executor": execution.get("executor", "serial"),
+            "workers": execution.get("workers"),
+            "metrics": self.metrics.scoped(file=filepath) if self.metrics is not None else None,
+            # a sampler holds the state of one file
+            "sample": Sampler.from_config(execution.get("sample")),
+            "fail_fast": execution.get("fail_fast")
+        }
+        engine: str = execution.get("engine", "pandas")
+        actions: List[Dict] = self.schema.get("actions")
+        # the columns of the rows in the details are those read for every action, cached or not
+        projection = self._projection(details, actions, execution.get("sample"))
+
+        identity: Optional[str] = None
+        keys: List[Optional[str]] = [None] * len(actions)
+        grouped: Dict[int, List[Dict]] = {}
+        # a table has no cheap identity of its version, its reports are never cached
+        if self.cache is not None and not self._database:
+            identity = self.file_identity(filepath)
+            keys = self._cache_keys(identity, {"details": details, "engine": engine, "sample": execution.get("sample"),
+                                               "fail_fast": execution.get("fail_fast"), "read": self.read_options},
+                                    projection)
+            for position, key in enumerate(keys):
+                reports = self.cache.get_reports(key) if key else None
+                if reports is not None:
+                    grouped[position] = reports
+            if grouped:
+                self.logs.info(f"{len(grouped)} of {len(actions)} actions of {filepath} read from the cache")
+
+        missing: List[int] = [position for position in range(len(actions)) if position not in grouped]
+        if missing:
+            pending: List[Dict] = [actions[position] for position in missing]
+            loading: Dict = {
+                "as_table": engine == "arrow",
+                "projection": projection,
+                "identity": identity
+            }
+            if self._database:
+                self.logs.info(f"Validating {filepath} in the database")
+                projection = loading["projection"]
+                source = SqlSource(self.connector, filepath, chunksize=execution.get("chunksize"),
+                                   order_by=self.schema.get("storage").get("order_by"),
+                                   columns=list(projection) if projection is not None else None, logs=self.logs)
+                pipeline = Pipeline(source=source, details=details, **options)
+            elif execution.get("mode") == "stream" or options["sample"] is not None:
+                # a sample is drawn while the file is streamed, Parquet and CSV files are only partly read
+                self.logs.info(f"Validating {filepath} in streaming mode" + (" on a sample" if options["sample"] else ""))
+                chunks = self.iter_file(filepath=filepath, chunksize=execution.get("chunksize"),
+                                        sample=options["sample"], **loading)
+                pipeline = Pipeline(chunks=chunks, details=details, **options)
+            else:
+                data = load() if load is not None else self.load_file(filepath=filepath, **loading)
+                pipeline = Pipeline(df=data, details=details, **options)
+
+            for position, reports in zip(missing, pipeline.run_actions(actions_config=pending)):
+                grouped[position] = reports
+                if keys[position]:
+                    # the measures are of this run, they are not cached
+                    self.cache.put_reports(keys[position], [{key: value for key, value in report.items() if key != "Metrics"}
+                                                            for report in reports])
+
+        return [report for position in range(len(actions)) for report in grouped[position]]
+
+    def _aggregate(self, results: Dict[str, List[Dict]]) -> List[Dict]:
+        """
+        Builds the dataset report from the reports of every file: one entry per check
+        with the total of invalid rows and the files where the check failed.
+
+        Args:
+            results (Dict[str, List[Dict]]): Reports of each file.
+
+        Returns:
+            List[Dict]: Aggregated reports, in the order of the configuration.
+        """
+        dataset: Dict[Tuple, Dict] = {}
+        for filepath, reports in results.items():
+            for position, report in enumerate(reports):
+                column = report.get("Column")
+                # composite keys are reported as a list of columns
+                key = (position, report.get("Action"), tuple(column) if isinstance(column, list) else column)
+                entry = dataset.setdefault(key, {
+                    "Action": report.get("Action"),
+                    "Column": report.get("Column"),
+                    "Files": 0,
+                    "Invalid_count": 0,
+                    "Valid_Column": True,
+                    "Invalid_files": []
+                })
+                entry["Files"] += 1
+                # an estimate (CheckUnique approx) has no Invalid_count
+                entry["Invalid_count"] += report.get("Invalid_count") or 0
+                valid = report.get("Valid_Column", True)
+                if valid is None:
+                    # an estimate within its error bound (CheckUnique approx) leaves the dataset unknown
+                    if entry["Valid_Column"]:
+                        entry["Valid_Column"] = None
+                elif not valid:
+                    entry["Valid_Column"] = False
+                    entry["Invalid_files"].append(filepath)
+        return list(dataset.values())
+
+    def file_details(self, details: Optional[Dict], filepath: str) -> Optional[Dict]:
+        """
+        Details policy of one file of a run over many files, spilled details go to a folder per file.
+
+        Args:
+            details (Optional[Dict]): Details policy of the run.
+            filepath (str): Path of the file in the storage.
+
+        Returns:
+            Optional[Dict]: Details policy of the file.
+        """
+        if details and details.get("mode") == "spill":
+            folder = Path(details.get("path", "results/details")) / re.sub(r"[^0-9A-Za-z_.-]+", "_", filepath)
+            return {**details, "path": str(folder)}
+        return details
+
+    def validate_files(self, files: List[str], sink: Optional[ResultSink] = None,
+                       details: Optional[Dict] = None) -> Dict:
+        """
+        Validates many files concurrently. At most `execution.concurrency` files are
+        downloaded and validated at the same time and new files are only submitted when
+        one finishes, so memory is bounded by the files in flight.
+        With a streaming sink the reports of each file are written as soon as it is validated
+        and only kept without their details.
+
+        Args:
+            files (List[str]): Paths of the files in the storage.
+            sink (Optional[ResultSink]): Writer of the reports of each file.
+            details (Optional[Dict]): Details policy of the run, defaults to report.details of the
+                schema with the spilled details in a folder of the run of the sink.
+
+        Returns:
+            Dict: {"files": reports of each file, "dataset": aggregated reports}
+        """
+        execution: Dict = self.schema.get("execution") or {}
+        concurrency: int = int(execution.get("concurrency", 4))
+        if details is None:
+            details = run_details((self.schema.get("report") or {}).get("details"),
+                                  sink.run_id if sink is not None else new_run_id())
+        streaming: bool = sink is not None and sink.streaming
+
+        def task(filepath: str) -> List[Dict]:
+            return self.validate_file(filepath, details=self.file_details(details, filepath))
+
+        results: Dict[str, List[Dict]] = {}
+        remaining = iter(files)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            pending = {pool.submit(task, filepath): filepath for filepath in islice(remaining, concurrency)}
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    filepath = pending.pop(future)
+                    reports = future.result()
+                    if streaming:
+                        sink.write_file(filepath, reports)
+                        reports = [{key: value for key, value in report.items() if key != "Details"} for report in reports]
+                    results[filepath] = reports
+                    self.logs.info(f"File {filepath} validated")
+                for filepath in islice(remaining, len(done)):
+                    pending[pool.submit(task, filepath)] = filepath
+
+        results = {filepath: results[filepath] for filepath in files}
+        if sink is not None and not streaming:
+            for filepath, reports in results.items():
+                sink.write_file(filepath, reports)
+        return {"files": results, "dataset": self._aggregate(results)}
+
+    def run(self, filepath: Optional[str] = None):
+        """
+        Function to get validations and data.
+        When the storage path is a prefix (ends with "/") or a glob, every matched object
+        is validated and the results hold the reports of each file and of the whole dataset.
+        The results are written by the sink of the `output` section (results/<run_id>/results.json by default).
+        :params filepath: Path to validate instead of the path of the storage section
         """
         file = self.schema.get("storage").get("type")
-        data = self.load_file(filepath=self.schema.get("storage").get(file))
-        pipeline = Pipeline(df=data)
-        results = pipeline.run(actions_config=self.schema.get("actions"))
+        filepath = filepath or self.schema.get("storage").get(file)
+        output: Dict = self.schema.get("output") or {}
+        sink = build_sink(output)
+        # the details spilled by the run are kept under its run id, as its results
+        details = run_details((self.schema.get("report") or {}).get("details"), sink.run_id)
 
-        with open("results/results.json", "w") as f:
-            json.dump(results,f,ensure_ascii=True, indent=2)
-        
-        self.logs.info("Results saved in : results/results.json")
+        with self._measure("run", filepath), sink:
+            if self._is_multi_file(filepath):
+                results = self.validate_files(self._list_files(filepath), sink=sink, details=details)
+                sink.write_dataset(results["dataset"])
+            else:
+                results = self.validate_file(filepath, details=details)
+                sink.write_file(None, results)
+
+        self._publish(sink)
+        return results
+
+    def write_results(self, results: Union[List[Dict], Dict], run_id: Optional[str] = None) -> ResultSink:
+        """
+        Writes results built outside of run (the reports of a file or {"files", "dataset"}) with the
+        sink of the `output` section, then uploads them and exports the metrics.
+
+        Args:
+            results (Union[List[Dict], Dict]): Results of the run.
+            run_id (Optional[str]): Identifier of the run, a new one by default.
+
+        Returns:
+            ResultSink: Sink that wrote the results.
+        """
+        sink = build_sink(self.schema.get("output"), run_id)
+        with sink:
+            if isinstance(results, dict):
+                for filepath, reports in results["files"].items():
+                    sink.write_file(filepath, reports)
+                sink.write_dataset(results["dataset"])
+            else:
+                sink.write_file(None, results)
+        self._publish(sink)
+        return sink
 
+    def _publish(self, sink: ResultSink):
+        """
+        Logs where the results were written, uploads them when configured and exports the metrics.
+        """
+        output: Dict = self.schema.get("output") or {}
+        self.logs.info(f"Results of run {sink.run_id} saved in : {sink.path}")
+        if output.get("upload"):
+            self._upload(sink, output.get("upload_prefix", ""))
+        self._export_metrics()
+
+    def _upload(self, sink: ResultSink, prefix: str):
+        """
+        Uploads the results to the storage of the schema (S3 or Blob).
+
+        Args:
+            sink (ResultSink): Sink that wrote the results.
+            prefix (str): Prefix of the keys of the results in the storage.
+        """
+        if self.local_mode or self._database or not hasattr(self.connector, "upload_file"):
+            self.logs.warning(f"Storage {self.connector.__connection__} does not support uploads, results kept locally")
+            return
+        for key in sink.upload(self.connector, prefix):
+            self.logs.info(f"Results uploaded to : {key}")
+
+    def _export_metrics(self):
+        """
+        Writes the metrics of the run in the Prometheus text format (metrics.prometheus) and appends
+        them as spans (metrics.spans), when configured.
+        """
+        if self.metrics is None:
+            return
+        # the records are exported once, a processor running many times does not keep them
+        records = self.metrics.drain()
+        if self.metrics_config.get("prometheus"):
+            self.metrics.write_prometheus(self.metrics_config["prometheus"], records)
+            self.logs.info(f"Metrics saved in : {self.metrics_config['prometheus']}")
+        if self.metrics_config.get("spans"):
+            self.metrics.write_spans(self.metrics_config["spans"], records)
+            self.logs.info(f"Spans saved in : {self.metrics_config['spans']}")